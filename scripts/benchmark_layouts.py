@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark the layout engine on generated trees.
+
+This is a developer tool — not shipped with the package:
+
+    python scripts/benchmark_layouts.py
+    python scripts/benchmark_layouts.py --layouts hierarchical grid --sizes 1000 100000
+
+Trees are random with a fixed seed, so runs are comparable; --shape star
+puts every node directly under the root, the case the grid, flow and
+centered layouts handle. --relationships adds random connections on top of
+the tree, which only the force and layered layouts follow. Hierarchical and
+layered results are also checked for overlapping nodes on the same level.
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from reifire.visualization.layout import (
+    ComponentType,
+    ConnectionType,
+    LayoutEngine,
+    LayoutType,
+    Position,
+    Size,
+)
+
+DEFAULT_SIZES = [10, 100, 1000, 10_000, 100_000]
+
+
+def build_engine(
+    layout_type: LayoutType,
+    size: int,
+    max_children: int,
+    seed: int,
+    shape: str = "random",
+    relationships: int = 0,
+) -> LayoutEngine:
+    """Build a tree of the given size with nodes of varying widths."""
+    rng = random.Random(seed)
+    engine = LayoutEngine(layout_type=layout_type)
+    engine.add_component("n0", ComponentType.OBJECT, Size(100, 50))
+    root_children = size if shape == "star" else max_children
+    open_nodes: List[Tuple[str, int]] = [("n0", root_children)]
+    for i in range(1, size):
+        slot = 0 if shape == "star" else rng.randrange(len(open_nodes))
+        parent_id, remaining = open_nodes[slot]
+        if remaining == 1:
+            open_nodes[slot] = open_nodes[-1]
+            open_nodes.pop()
+        else:
+            open_nodes[slot] = (parent_id, remaining - 1)
+        node_id = f"n{i}"
+        width = rng.choice((40, 60, 80, 120))
+        engine.add_component(node_id, ComponentType.ATTRIBUTE, Size(width, 30), parent_id)
+        open_nodes.append((node_id, max_children))
+    for _ in range(relationships if size > 1 else 0):
+        source, target = rng.sample(range(size), 2)
+        engine.add_connection(f"n{source}", f"n{target}", ConnectionType.ASSOCIATION)
+    return engine
+
+
+def count_overlaps(layout: Dict[str, Tuple[Position, Size]]) -> int:
+    """Count pairs of horizontally adjacent nodes on the same row that overlap."""
+    rows: Dict[float, List[Tuple[float, float]]] = defaultdict(list)
+    for position, size in layout.values():
+        rows[position.y].append((position.x, position.x + size.width))
+    overlaps = 0
+    for spans in rows.values():
+        spans.sort()
+        for (_, left_end), (right_start, _) in zip(spans, spans[1:]):
+            if right_start < left_end - 1e-6:
+                overlaps += 1
+    return overlaps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--layouts",
+        nargs="+",
+        default=["hierarchical"],
+        choices=[layout_type.value for layout_type in LayoutType],
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--shape", choices=["random", "star"], default="random")
+    parser.add_argument("--max-children", type=int, default=4)
+    parser.add_argument("--relationships", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'layout':<14}{'nodes':>9}{'best (s)':>12}{'us/node':>10}{'overlaps':>10}")
+    for name in args.layouts:
+        layout_type = LayoutType(name)
+        for size in args.sizes:
+            engine = build_engine(
+                layout_type,
+                size,
+                args.max_children,
+                args.seed,
+                args.shape,
+                args.relationships,
+            )
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                layout = engine.layout()
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            leveled = layout_type in (LayoutType.HIERARCHICAL, LayoutType.LAYERED)
+            overlaps = count_overlaps(layout) if leveled else 0
+            print(f"{name:<14}{size:>9}{best:>12.4f}{best / size * 1e6:>10.2f}{overlaps:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Build the offline synonym table used for icon suggestions.
+
+This is a developer tool — not shipped with the package. Run it after
+updating the bundled icon set (see curate_icons.py):
+
+    pip install nltk
+    python scripts/build_synonyms.py
+
+It walks WordNet synonyms, hypernyms and hyponyms for every term in the
+bundled manifest's term index and inverts the relation, so the table maps
+any related word to the manifest terms it can reach. Words that relate to
+no bundled icon are not stored. Words are keyed with the same normalization
+the suggester looks them up with, so the reifire package must be importable
+(e.g. `pip install -e .`).
+"""
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Set
+
+import nltk
+from nltk.corpus import wordnet
+
+from reifire.visualization.suggestions import synonym_key
+
+ICONS_DIR = (
+    Path(__file__).parent.parent / "src" / "reifire" / "visualization" / "providers" / "icons"
+)
+MANIFEST_PATH = ICONS_DIR / "manifest.json"
+OUTPUT_PATH = ICONS_DIR / "synonyms.json"
+
+
+def related_lemmas(term: str) -> Set[str]:
+    """Walk WordNet the same way IconSuggester's WordNet expansion does."""
+    related: Set[str] = set()
+    for synset in wordnet.synsets(term):
+        related.update(lemma.name() for lemma in synset.lemmas())
+        for hypernym in synset.hypernyms():
+            related.update(lemma.name() for lemma in hypernym.lemmas())
+        for hyponym in synset.hyponyms():
+            related.update(lemma.name() for lemma in hyponym.lemmas())
+    return {synonym_key(lemma) for lemma in related}
+
+
+def load_vocabulary() -> Set[str]:
+    """Load the manifest terms worth expanding (skips numbers and single letters)."""
+    manifest = json.loads(MANIFEST_PATH.read_text())
+    return {term for term in manifest["term_index"] if len(term) > 1 and not term.isdigit()}
+
+
+def build_table(vocabulary: Set[str]) -> Dict[str, list]:
+    """Map each word related to a vocabulary term to the vocabulary terms it reaches."""
+    table: Dict[str, Set[str]] = defaultdict(set)
+    for term in sorted(vocabulary):
+        # WordNet joins compound words with underscores, the manifest with hyphens
+        for lemma in related_lemmas(term.replace("-", "_")):
+            if lemma != synonym_key(term):
+                table[lemma].add(term)
+    return {word: sorted(terms) for word, terms in sorted(table.items())}
+
+
+def main() -> None:
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError:
+        nltk.download("wordnet", quiet=True)
+
+    vocabulary = load_vocabulary()
+    table = build_table(vocabulary)
+    output = {"version": 1, "source": "WordNet " + wordnet.get_version(), "terms": table}
+    OUTPUT_PATH.write_text(json.dumps(output, separators=(",", ":"), sort_keys=True) + "\n")
+    print(f"Wrote {len(table)} words related to {len(vocabulary)} terms to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
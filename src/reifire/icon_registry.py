@@ -1,29 +1,38 @@
 """Registry for managing icons."""
 
-from typing import Dict, Optional
+from typing import MutableMapping, Optional
 import json
 from pathlib import Path
 
+from .visualization.sqlite_store import SQLiteMapping
+
 
 class IconRegistry:
     """Registry for managing icons."""
 
-    def __init__(self, storage_file: Optional[Path] = None) -> None:
+    def __init__(self, storage_file: Optional[Path] = None, backend: str = "json") -> None:
         """Initialize the icon registry.
 
         Args:
-            storage_file: Optional path to a JSON file for persistent storage
+            storage_file: Optional path to a JSON file (or SQLite database) for
+                persistent storage
+            backend: Storage backend, "json" or "sqlite". The sqlite backend opens
+                without loading every icon and writes each registration as an upsert.
         """
-        self._icons: Dict[str, str] = {}
-        self.storage_file = (
-            storage_file or Path.home() / ".reifire" / "icon_registry.json"
-        )
+        if backend not in ("json", "sqlite"):
+            raise ValueError(f"Unknown icon registry backend: {backend}")
+        self.backend = backend
+        self._icons: MutableMapping[str, str] = {}
+        default_name = "icons.sqlite3" if backend == "sqlite" else "icon_registry.json"
+        self.storage_file = storage_file or Path.home() / ".reifire" / default_name
         self.storage_file.parent.mkdir(parents=True, exist_ok=True)
         self._load_icons()
 
     def _load_icons(self) -> None:
         """Load icons from storage file if it exists."""
-        if self.storage_file.exists():
+        if self.backend == "sqlite":
+            self._icons = SQLiteMapping(self.storage_file, "icons")
+        elif self.storage_file.exists():
             try:
                 self._icons = json.loads(self.storage_file.read_text())
                 print(f"Loaded {len(self._icons)} icons from registry")
@@ -35,6 +44,8 @@ class IconRegistry:
 
     def _save_icons(self) -> None:
         """Save icons to storage file."""
+        if self.backend == "sqlite":
+            return
         try:
             self.storage_file.write_text(json.dumps(self._icons, indent=2))
             print(f"Saved {len(self._icons)} icons to registry")
@@ -70,7 +81,10 @@ class IconRegistry:
 
     def clear(self) -> None:
         """Clear all icons from the registry."""
-        self._icons = {}
-        if self.storage_file.exists():
-            self.storage_file.unlink()
+        if self.backend == "sqlite":
+            self._icons.clear()
+        else:
+            self._icons = {}
+            if self.storage_file.exists():
+                self.storage_file.unlink()
         print("Cleared icon registry")
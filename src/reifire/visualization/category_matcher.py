@@ -0,0 +1,109 @@
+"""Keyword-based categorization of component names."""
+
+import sys
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+_NO_MATCH = sys.maxsize
+
+# goto transitions, failure links, best priority output per state, category names
+_Automaton = Tuple[List[Dict[str, int]], List[int], List[int], List[str]]
+
+
+class CategoryMatcher:
+    """Finds the highest-priority category with a keyword contained in a text.
+
+    Categories are prioritized in insertion order. The keywords of every
+    category are compiled into a single Aho-Corasick automaton, so a lookup is
+    one pass over the text no matter how many keywords are registered.
+    Matching is case-insensitive.
+    """
+
+    def __init__(self, categories: Optional[Mapping[str, Iterable[str]]] = None) -> None:
+        """Initialize the matcher.
+
+        Args:
+            categories: Mapping of category name to keywords, highest priority first
+        """
+        self._categories: Dict[str, List[str]] = {}
+        for category, keywords in (categories or {}).items():
+            self._add_keywords(category, keywords)
+        self._automaton = self._compile()
+
+    @property
+    def categories(self) -> Dict[str, List[str]]:
+        """Copy of the category table, highest priority first."""
+        return {category: list(keywords) for category, keywords in self._categories.items()}
+
+    def add(self, category: str, keywords: Iterable[str]) -> None:
+        """Add keywords to a category and recompile.
+
+        New categories get the lowest priority; existing categories keep theirs.
+
+        Args:
+            category: Category name
+            keywords: Keywords that identify the category
+        """
+        self._add_keywords(category, keywords)
+        self._automaton = self._compile()
+
+    def _add_keywords(self, category: str, keywords: Iterable[str]) -> None:
+        existing = self._categories.setdefault(category, [])
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword not in existing:
+                existing.append(keyword)
+
+    def _compile(self) -> _Automaton:
+        """Build the automaton's trie, failure links and per-state outputs."""
+        names = list(self._categories)
+        goto: List[Dict[str, int]] = [{}]
+        best = [_NO_MATCH]
+        for priority, keywords in enumerate(self._categories.values()):
+            for keyword in keywords:
+                state = 0
+                for char in keyword:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        best.append(_NO_MATCH)
+                    state = next_state
+                best[state] = min(best[state], priority)
+
+        # Breadth-first, so every failure target is finished before it is used
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            best[state] = min(best[state], best[0])
+        for state in queue:
+            for char, next_state in goto[state].items():
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[next_state] = goto[target].get(char, 0)
+                best[next_state] = min(best[next_state], best[fail[next_state]])
+                queue.append(next_state)
+        return goto, fail, best, names
+
+    def match(self, text: str) -> Optional[str]:
+        """Find the highest-priority category with a keyword in the text.
+
+        Args:
+            text: Text to search, such as a component name
+
+        Returns:
+            The category name, or None if no keyword occurs in the text
+        """
+        goto, fail, best, names = self._automaton
+        state = 0
+        found = best[0]
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best[state] < found:
+                found = best[state]
+                if found == 0:
+                    break
+        return names[found] if found != _NO_MATCH else None
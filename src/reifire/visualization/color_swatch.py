@@ -1,8 +1,14 @@
 """Color swatch generation for visualizations."""
 
 from __future__ import annotations
+import base64
 import re
-from typing import List
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+_HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{3}){1,2}$")
+
+SWATCH_CACHE_SIZE = 1024
 
 
 class ColorSwatchGenerator:
@@ -34,7 +40,7 @@ class ColorSwatchGenerator:
             Hex color value
         """
         # If it's already a hex color, return it
-        if re.match(r"^#(?:[0-9a-fA-F]{3}){1,2}$", color):
+        if _HEX_COLOR.match(color):
             return color
 
         # Try to get from color map
@@ -72,3 +78,61 @@ class ColorSwatchGenerator:
             List of SVG strings for the color swatches
         """
         return [ColorSwatchGenerator.generate_swatch(color, size) for color in colors]
+
+    @staticmethod
+    def generate_striped_swatch(colors: Sequence[str], size: int = 24) -> str:
+        """Generate one SVG swatch with a vertical stripe per color.
+
+        Args:
+            colors: List of color names or hex values
+            size: Size of the swatch in pixels
+
+        Returns:
+            SVG string for the combined swatch
+        """
+        # One user unit per stripe, stretched to the square, so stripes never round
+        stripes = "\n".join(
+            f'    <rect x="{i}" width="1" height="1" '
+            f'fill="{ColorSwatchGenerator._parse_color(c)}"/>'
+            for i, c in enumerate(colors)
+        )
+        svg_open = (
+            f'<svg width="{size}" height="{size}" viewBox="0 0 {len(colors)} 1" '
+            'preserveAspectRatio="none" xmlns="http://www.w3.org/2000/svg">'
+        )
+        return f'<?xml version="1.0" encoding="UTF-8"?>\n{svg_open}\n{stripes}\n</svg>'
+
+    @staticmethod
+    def swatch_data_uris(
+        colors: Sequence[str], size: int = 24, combined: bool = False
+    ) -> List[str]:
+        """Get base64 SVG data URIs for color swatches.
+
+        URIs are cached per color (or per color scheme when combined), since
+        the same schemes recur across documents.
+
+        Args:
+            colors: List of color names or hex values
+            size: Size of each swatch in pixels
+            combined: Return a single striped swatch for all colors
+
+        Returns:
+            One data URI per color, or a single data URI when combined
+        """
+        if combined and colors:
+            return [_striped_data_uri(tuple(colors), size)]
+        return [_swatch_data_uri(color, size) for color in colors]
+
+
+def _to_data_uri(svg: str) -> str:
+    return f"data:image/svg+xml;base64,{base64.b64encode(svg.encode()).decode()}"
+
+
+@lru_cache(maxsize=SWATCH_CACHE_SIZE)
+def _swatch_data_uri(color: str, size: int) -> str:
+    return _to_data_uri(ColorSwatchGenerator.generate_swatch(color, size))
+
+
+@lru_cache(maxsize=SWATCH_CACHE_SIZE)
+def _striped_data_uri(colors: Tuple[str, ...], size: int) -> str:
+    return _to_data_uri(ColorSwatchGenerator.generate_striped_swatch(colors, size))
@@ -0,0 +1,16 @@
+"""Detection of optional dependencies.
+
+Modules with numpy code paths (the "fast" extra) import numpy with
+
+    from .compat import HAVE_NUMPY
+
+    if HAVE_NUMPY:
+        import numpy as np
+
+and check their own HAVE_NUMPY before using np, so tests can turn the numpy
+paths of one module off by patching its flag.
+"""
+
+from importlib.util import find_spec
+
+HAVE_NUMPY = find_spec("numpy") is not None
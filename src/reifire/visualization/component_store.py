@@ -0,0 +1,326 @@
+"""Compact columnar storage for large sets of visualization components.
+
+A document with tens of thousands of attributes produces as many component
+and connection objects, each with its own instance dict. The stores here keep
+one column per field instead: coordinates in typed arrays, types as indexes
+into an interned table, and properties only where they are non-empty. Items
+are read and written through lightweight views that behave like
+VisualizationComponent and VisualizationConnection.
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union, overload
+
+from .compat import HAVE_NUMPY
+from .processor import VisualizationComponent, VisualizationConnection
+
+if HAVE_NUMPY:
+    import numpy as np
+
+
+class _TypeTable:
+    """Interns type names as small integer codes."""
+
+    __slots__ = ("names", "_codes")
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class ComponentView:
+    """View of one component in a ComponentStore.
+
+    Reads and writes go straight to the store's columns, so views are cheap
+    to create and never go stale.
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ComponentStore", index: int) -> None:
+        self._store = store
+        self._index = index
+
+    @property
+    def id(self) -> str:
+        return self._store._ids[self._index]
+
+    @property
+    def type(self) -> str:
+        return self._store._type_table.names[self._store._type_codes[self._index]]
+
+    @type.setter
+    def type(self, value: str) -> None:
+        self._store._type_codes[self._index] = self._store._type_table.code(value)
+
+    @property
+    def label(self) -> str:
+        return self._store._labels[self._index]
+
+    @label.setter
+    def label(self, value: str) -> None:
+        self._store._labels[self._index] = value
+
+    @property
+    def x(self) -> float:
+        return self._store._x[self._index]
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._store._x[self._index] = value
+
+    @property
+    def y(self) -> float:
+        return self._store._y[self._index]
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._store._y[self._index] = value
+
+    @property
+    def width(self) -> float:
+        return self._store._width[self._index]
+
+    @width.setter
+    def width(self, value: float) -> None:
+        self._store._width[self._index] = value
+
+    @property
+    def height(self) -> float:
+        return self._store._height[self._index]
+
+    @height.setter
+    def height(self, value: float) -> None:
+        self._store._height[self._index] = value
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """The component's properties; the dict is created on first access."""
+        properties = self._store._properties[self._index]
+        if properties is None:
+            properties = self._store._properties[self._index] = {}
+        return properties
+
+    def to_component(self) -> VisualizationComponent:
+        """Copy the component out of the store into a VisualizationComponent."""
+        return VisualizationComponent(
+            id=self.id,
+            type=self.type,
+            label=self.label,
+            x=self.x,
+            y=self.y,
+            width=self.width,
+            height=self.height,
+            properties=self.properties,
+        )
+
+    def __repr__(self) -> str:
+        return f"ComponentView(id={self.id!r}, type={self.type!r}, label={self.label!r})"
+
+
+class ComponentStore(Sequence[ComponentView]):
+    """Struct-of-arrays store of visualization components.
+
+    Supports the list operations the processor uses (append and len) and
+    indexing/iteration, which yield ComponentView objects.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._ids: List[str] = []
+        self._labels: List[str] = []
+        self._type_table = _TypeTable()
+        self._type_codes = array("I")
+        self._x = array("d")
+        self._y = array("d")
+        self._width = array("d")
+        self._height = array("d")
+        self._properties: List[Optional[Dict[str, Any]]] = []
+
+    @property
+    def types(self) -> List[str]:
+        """The interned component type names, in code order."""
+        return list(self._type_table.names)
+
+    def append(self, component: VisualizationComponent) -> None:
+        """Add a component to the store.
+
+        Args:
+            component: Component to store; its fields are copied into the columns
+        """
+        self.add(
+            component.id,
+            component.type,
+            component.label,
+            component.x,
+            component.y,
+            component.width,
+            component.height,
+            component.properties,
+        )
+
+    def add(
+        self,
+        id: str,
+        type: str,
+        label: str,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        properties: Optional[Dict[str, Any]] = None,
+    ) -> ComponentView:
+        """Add a component from its fields.
+
+        Returns:
+            A view of the new component
+        """
+        self._ids.append(id)
+        self._labels.append(label)
+        self._type_codes.append(self._type_table.code(type))
+        self._x.append(x)
+        self._y.append(y)
+        self._width.append(width)
+        self._height.append(height)
+        self._properties.append(properties or None)
+        return ComponentView(self, len(self._ids) - 1)
+
+    def as_arrays(self) -> Dict[str, Any]:
+        """Copy the geometry and type columns out for vectorized processing.
+
+        Returns:
+            Mapping of "x", "y", "width", "height" and "type" to NumPy arrays,
+            or to array.array copies when NumPy is not installed. "type" holds
+            codes into the types table
+        """
+        columns: Dict[str, "array[Any]"] = {
+            "x": self._x,
+            "y": self._y,
+            "width": self._width,
+            "height": self._height,
+            "type": self._type_codes,
+        }
+        if not HAVE_NUMPY:
+            return {name: array(column.typecode, column) for name, column in columns.items()}
+        return {name: np.array(column) for name, column in columns.items()}
+
+    def to_components(self) -> List[VisualizationComponent]:
+        """Copy every component out of the store."""
+        return [view.to_component() for view in self]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @overload
+    def __getitem__(self, index: int) -> ComponentView: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[ComponentView]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ComponentView, List[ComponentView]]:
+        if isinstance(index, slice):
+            return [ComponentView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("component index out of range")
+        return ComponentView(self, index)
+
+    def __iter__(self) -> Iterator[ComponentView]:
+        for index in range(len(self)):
+            yield ComponentView(self, index)
+
+
+class ConnectionView:
+    """View of one connection in a ConnectionStore."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ConnectionStore", index: int) -> None:
+        self._store = store
+        self._index = index
+
+    @property
+    def source(self) -> str:
+        return self._store._sources[self._index]
+
+    @property
+    def target(self) -> str:
+        return self._store._targets[self._index]
+
+    @property
+    def type(self) -> str:
+        return self._store._type_table.names[self._store._type_codes[self._index]]
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """The connection's properties; the dict is created on first access."""
+        properties = self._store._properties[self._index]
+        if properties is None:
+            properties = self._store._properties[self._index] = {}
+        return properties
+
+    def to_connection(self) -> VisualizationConnection:
+        """Copy the connection out of the store into a VisualizationConnection."""
+        return VisualizationConnection(
+            source=self.source, target=self.target, type=self.type, properties=self.properties
+        )
+
+    def __repr__(self) -> str:
+        return f"ConnectionView({self.source!r} -> {self.target!r}, type={self.type!r})"
+
+
+class ConnectionStore(Sequence[ConnectionView]):
+    """Struct-of-arrays store of connections between components."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._sources: List[str] = []
+        self._targets: List[str] = []
+        self._type_table = _TypeTable()
+        self._type_codes = array("I")
+        self._properties: List[Optional[Dict[str, Any]]] = []
+
+    def append(self, connection: VisualizationConnection) -> None:
+        """Add a connection to the store.
+
+        Args:
+            connection: Connection to store; its fields are copied into the columns
+        """
+        self._sources.append(connection.source)
+        self._targets.append(connection.target)
+        self._type_codes.append(self._type_table.code(connection.type))
+        self._properties.append(connection.properties or None)
+
+    def to_connections(self) -> List[VisualizationConnection]:
+        """Copy every connection out of the store."""
+        return [view.to_connection() for view in self]
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @overload
+    def __getitem__(self, index: int) -> ConnectionView: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[ConnectionView]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ConnectionView, List[ConnectionView]]:
+        if isinstance(index, slice):
+            return [ConnectionView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("connection index out of range")
+        return ConnectionView(self, index)
+
+    def __iter__(self) -> Iterator[ConnectionView]:
+        for index in range(len(self)):
+            yield ConnectionView(self, index)
@@ -0,0 +1,356 @@
+"""Force-directed placement of component graphs.
+
+Nodes repel each other and connections pull their endpoints together like
+springs (Fruchterman and Reingold, "Graph Drawing by Force-directed
+Placement", 1991). Repulsion between all pairs is approximated with a
+Barnes–Hut quadtree: a group of distant nodes acts as one node at its center
+of mass, so an iteration costs O(n log n) instead of O(n²). The quadtree is
+built and walked level by level with numpy, for all nodes at once.
+
+Large graphs untangle slowly when every node starts at a random position, so
+the graph is first coarsened by merging nodes with their neighbors, the
+coarsest graph is laid out, and each finer graph starts from the layout of the
+one above (Hu, "Efficient and High Quality Force-Directed Graph Drawing",
+2005).
+"""
+
+from typing import Any, List, Optional, Tuple
+
+from .compat import HAVE_NUMPY
+
+if HAVE_NUMPY:
+    import numpy as np
+
+
+class _QuadTree:
+    """Barnes–Hut quadtree over a set of points, stored one level at a time.
+
+    Cells of a level are numbered so that the children of cell c of the level
+    above are contiguous, starting at child_start[c]. A cell with one point,
+    or any cell at max_depth, is a leaf.
+    """
+
+    def __init__(self, points: Any, max_depth: int = 16) -> None:
+        n = len(points)
+        low = points.min(axis=0)
+        self.extent = float((points.max(axis=0) - low).max()) or 1.0
+        # Points scaled into the unit square, nudged in from its far edges
+        unit = np.minimum((points - low) / self.extent, 1 - 1e-12)
+
+        self.mass: List[Any] = []
+        self.center_x: List[Any] = []
+        self.center_y: List[Any] = []
+        self.leaf: List[Any] = []
+        self.body_cell: List[Any] = []  # Cell of each point on the level, or -1
+        self.child_start: List[Any] = []
+        self.child_count: List[Any] = []
+
+        bodies = np.arange(n)
+        keys = np.zeros(n, dtype=np.int64)
+        for depth in range(max_depth + 1):
+            cells, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            inverse = inverse.reshape(-1)
+            mass = counts.astype(float)
+            leaf = (counts == 1) | (depth == max_depth)
+            body_cell = np.full(n, -1, dtype=np.int64)
+            body_cell[bodies] = inverse
+            if depth:
+                # Keys are parent * 4 + quadrant, so each parent's children are a run
+                parents = cells // 4
+                parent_count = len(self.mass[-1])
+                self.child_start.append(np.searchsorted(parents, np.arange(parent_count)))
+                self.child_count.append(np.bincount(parents, minlength=parent_count))
+            self.mass.append(mass)
+            self.center_x.append(np.bincount(inverse, weights=points[bodies, 0]) / mass)
+            self.center_y.append(np.bincount(inverse, weights=points[bodies, 1]) / mass)
+            self.leaf.append(leaf)
+            self.body_cell.append(body_cell)
+
+            split = ~leaf[inverse]
+            if not split.any():
+                break
+            bodies, inverse = bodies[split], inverse[split]
+            quadrant = np.floor(unit[bodies] * (2 << depth)).astype(np.int64) & 1
+            keys = inverse * 4 + quadrant[:, 0] * 2 + quadrant[:, 1]
+        self.child_start.append(np.zeros(len(self.mass[-1]), dtype=np.int64))
+        self.child_count.append(np.zeros(len(self.mass[-1]), dtype=np.int64))
+
+    def repulsion(self, points: Any, strength: float, theta: float, min_distance: float) -> Any:
+        """Repulsive force on every point from all the others.
+
+        The force between two points is strength / distance. A cell whose side
+        is less than theta times its distance from a point acts on it as a
+        single point of the cell's mass.
+        """
+        n = len(points)
+        x, y = np.ascontiguousarray(points[:, 0]), np.ascontiguousarray(points[:, 1])
+        force_x, force_y = np.zeros(n), np.zeros(n)
+        bodies = np.arange(n)
+        cells = np.zeros(n, dtype=np.int64)
+        size = self.extent
+        for level in range(len(self.mass)):
+            if not len(bodies):
+                break
+            dx = x[bodies] - self.center_x[level][cells]
+            dy = y[bodies] - self.center_y[level][cells]
+            distance2 = np.maximum(dx * dx + dy * dy, min_distance**2)
+            inside = self.body_cell[level][bodies] == cells
+            leaf = self.leaf[level][cells]
+            far = (size * size < theta * theta * distance2) & ~inside
+            # Points sharing a leaf with another point are coincident to within
+            # extent / 2 ** max_depth; their mutual force is left out
+            direct = np.flatnonzero(far | (leaf & ~inside))
+            if len(direct):
+                scale = strength * self.mass[level][cells[direct]] / distance2[direct]
+                target = bodies[direct]
+                force_x += np.bincount(target, weights=dx[direct] * scale, minlength=n)
+                force_y += np.bincount(target, weights=dy[direct] * scale, minlength=n)
+
+            # Everything else is too close to approximate: visit the children
+            expand = np.flatnonzero(~(leaf | far))
+            bodies, parents = bodies[expand], cells[expand]
+            counts = self.child_count[level][parents]
+            bodies = np.repeat(bodies, counts)
+            run_start = np.repeat(np.cumsum(counts) - counts, counts)
+            cells = np.repeat(self.child_start[level][parents], counts) + (
+                np.arange(len(bodies)) - run_start
+            )
+            size /= 2
+        return np.stack((force_x, force_y), axis=1)
+
+
+def _coarsen(n: int, edges: Any, rng: Any) -> Tuple[Any, int, Any]:
+    """Merge every node with its not yet merged neighbors.
+
+    Nodes are visited by decreasing degree, so hubs take in their neighbors;
+    ties are broken randomly.
+
+    Returns:
+        The cluster of each node, the number of clusters and the edges
+        between clusters
+    """
+    degree, offsets, neighbors = _adjacency(n, edges)
+    order = rng.permutation(n)
+    order = order[np.argsort(-degree[order], kind="stable")]
+
+    cluster = [-1] * n
+    count = 0
+    for v in order.tolist():
+        if cluster[v] >= 0:
+            continue
+        cluster[v] = count
+        for w in neighbors[offsets[v] : offsets[v + 1]]:
+            if cluster[w] < 0:
+                cluster[w] = count
+        count += 1
+    clusters = np.array(cluster, dtype=np.int64)
+    return clusters, count, _unique_edges(clusters[edges])
+
+
+def _components(n: int, edges: Any) -> Tuple[Any, int]:
+    """Label the connected components of a graph, in order of their first node."""
+    _, offsets, neighbors = _adjacency(n, edges)
+    label = [-1] * n
+    count = 0
+    for start in range(n):
+        if label[start] >= 0:
+            continue
+        label[start] = count
+        stack = [start]
+        while stack:
+            v = stack.pop()
+            for w in neighbors[offsets[v] : offsets[v + 1]]:
+                if label[w] < 0:
+                    label[w] = count
+                    stack.append(w)
+        count += 1
+    return np.array(label, dtype=np.int64), count
+
+
+def _adjacency(n: int, edges: Any) -> Tuple[Any, List[int], List[int]]:
+    """Degrees and adjacency lists; v's neighbors are neighbors[offsets[v] : offsets[v + 1]]."""
+    ends = np.concatenate((edges, edges[:, ::-1]))
+    ends = ends[np.argsort(ends[:, 0], kind="stable")]
+    degree = np.bincount(ends[:, 0], minlength=n)
+    offsets = np.concatenate(([0], np.cumsum(degree))).tolist()
+    return degree, offsets, ends[:, 1].tolist()
+
+
+def _unique_edges(edges: Any) -> Any:
+    """Drop loops and repeated edges, ignoring direction."""
+    edges = np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1)
+    return np.unique(edges, axis=0) if len(edges) else edges
+
+
+class ForceLayout:
+    """Force-directed placement of nodes joined by edges.
+
+    The random start is drawn from a seeded generator, so the same graph
+    always gets the same drawing. Each iteration moves every node along the
+    net force on it by at most the current step length, which cools
+    geometrically; a graph stops when no node moves more than tolerance times
+    the spring length, or after the given number of iterations. Unconnected
+    parts of the graph are drawn separately and packed in rows.
+    """
+
+    def __init__(
+        self,
+        spring_length: Optional[float] = None,
+        repulsion: float = 0.2,
+        theta: float = 1.2,
+        iterations: int = 300,
+        tolerance: float = 0.01,
+        cooling: float = 0.95,
+        seed: int = 0,
+        coarsest: int = 50,
+    ) -> None:
+        """Initialize the force layout.
+
+        Args:
+            spring_length: Preferred distance between connected nodes; by
+                default derived from the node sizes
+            repulsion: Strength of the repulsion relative to the springs
+            theta: Barnes–Hut opening angle; larger is faster and less exact,
+                0 computes every pair exactly
+            iterations: Maximum number of iterations for each level
+            tolerance: Stop once the largest move is below this fraction of
+                the spring length
+            cooling: Factor the step length is multiplied by each iteration
+            seed: Seed for the random start and the coarsening
+            coarsest: Stop coarsening graphs at this many nodes
+        """
+        self.spring_length = spring_length
+        self.repulsion = repulsion
+        self.theta = theta
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.cooling = cooling
+        self.seed = seed
+        self.coarsest = coarsest
+        self.iterations_run = 0
+
+    def positions(self, sizes: Any, edges: Any) -> Any:
+        """Compute node centers.
+
+        Args:
+            sizes: Array of shape (n, 2) with the width and height of each node
+            edges: Array of shape (m, 2) with the node indexes each edge joins
+
+        Returns:
+            Array of shape (n, 2) with the center of each node
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if not HAVE_NUMPY:
+            raise ImportError("The force layout needs numpy: pip install 'reifire[fast]'")
+        sizes = np.asarray(sizes, dtype=float).reshape(-1, 2)
+        edges = _unique_edges(np.asarray(edges, dtype=np.int64).reshape(-1, 2))
+        n = len(sizes)
+        self.iterations_run = 0
+        if n == 0:
+            return np.zeros((0, 2))
+
+        k = self.spring_length
+        if k is None:
+            # Room for two average nodes side by side plus a margin
+            k = float(np.mean(np.hypot(sizes[:, 0], sizes[:, 1]))) + 20
+        rng = np.random.default_rng(self.seed)
+
+        labels, count = _components(n, edges)
+        if count == 1:
+            return self._layout_connected(edges, n, k, rng)
+
+        # Repulsion would push unconnected parts ever further apart, so each
+        # connected component is drawn on its own and the drawings are packed
+        nodes = np.argsort(labels, kind="stable")
+        starts = np.searchsorted(labels[nodes], np.arange(count + 1))
+        local = np.empty(n, dtype=np.int64)
+        local[nodes] = np.arange(n) - starts[labels[nodes]]
+        edges = edges[np.argsort(labels[edges[:, 0]], kind="stable")]
+        edge_starts = np.searchsorted(labels[edges[:, 0]], np.arange(count + 1))
+        centers = np.empty((n, 2))
+        boxes = []
+        for label in range(count):
+            members = nodes[starts[label] : starts[label + 1]]
+            points = self._layout_connected(
+                local[edges[edge_starts[label] : edge_starts[label + 1]]], len(members), k, rng
+            )
+            low = (points - sizes[members] / 2).min(axis=0)
+            high = (points + sizes[members] / 2).max(axis=0)
+            centers[members] = points - low
+            boxes.append(high - low)
+        offsets = _pack(np.array(boxes), k / 2)
+        centers += offsets[labels]
+        return centers
+
+    def _layout_connected(self, edges: Any, n: int, k: float, rng: Any) -> Any:
+        """Compute the node centers of a connected graph."""
+        levels = []
+        count = n
+        while count > self.coarsest:
+            clusters, coarse_count, coarse_edges = _coarsen(count, edges, rng)
+            if coarse_count > 0.8 * count:
+                break  # Too few merges to be worth another level
+            levels.append((clusters, edges))
+            count, edges = coarse_count, coarse_edges
+
+        points = rng.uniform(0, k * np.sqrt(count), size=(count, 2))
+        self._relax(points, edges, k, k * np.sqrt(count) / 10, self.cooling)
+        for clusters, edges in reversed(levels):
+            # Spread each cluster's nodes around it over an area that grows
+            # with the cluster, and make room for them by scaling the layout
+            cluster_sizes = np.bincount(clusters)[clusters]
+            spread = rng.uniform(-0.5, 0.5, size=(len(clusters), 2))
+            spread *= (k * np.sqrt(cluster_sizes))[:, None]
+            points = points[clusters] * np.sqrt(len(clusters) / len(points)) + spread
+            # Finer levels start from a good layout and can cool faster
+            self._relax(points, edges, k, k, self.cooling**2)
+        return points
+
+    def _relax(self, points: Any, edges: Any, k: float, step: float, cooling: float) -> None:
+        """Move points in place until the forces on them balance."""
+        n = len(points)
+        if n < 2:
+            return
+        source, target = edges[:, 0], edges[:, 1]
+        for _ in range(self.iterations):
+            self.iterations_run += 1
+            force = _QuadTree(points).repulsion(points, self.repulsion * k * k, self.theta, k / 100)
+            delta = points[source] - points[target]
+            # Spring force distance² / k along the edge
+            pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+            for axis in (0, 1):
+                force[:, axis] += np.bincount(target, weights=pull[:, axis], minlength=n)
+                force[:, axis] -= np.bincount(source, weights=pull[:, axis], minlength=n)
+
+            length = np.hypot(force[:, 0], force[:, 1])
+            move = np.minimum(length, step)
+            moving = length > 0
+            points[moving] += force[moving] * (move[moving] / length[moving])[:, None]
+            if move.max() < self.tolerance * k:
+                break
+            step *= cooling
+
+
+def _pack(boxes: Any, gap: float) -> Any:
+    """Arrange boxes in rows, tallest first, in a roughly square area.
+
+    Args:
+        boxes: Array of shape (n, 2) with the width and height of each box
+        gap: Space between boxes
+
+    Returns:
+        Array of shape (n, 2) with the top left corner of each box
+    """
+    row_width = max(float(boxes[:, 0].max()), float(np.sqrt((boxes + gap).prod(axis=1).sum())))
+    corners = np.empty_like(boxes)
+    x = y = row_height = 0.0
+    for i in np.argsort(-boxes[:, 1], kind="stable").tolist():
+        width, height = boxes[i].tolist()
+        if x and x + width > row_width:
+            x, y, row_height = 0.0, y + row_height + gap, 0.0
+        corners[i] = (x, y)
+        x += width + gap
+        row_height = max(row_height, height)
+    return corners
@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 
+from .icon_manager import IconManager, resolve_fallback_icon
 from .processor import (
     VisualizationProcessor,
     VisualizationComponent,
@@ -29,13 +30,17 @@ class HTMLRenderer:
         )
         self.processor = VisualizationProcessor()
 
-    def render(self, data: Dict[str, Any], output_file: Optional[Path] = None) -> str:
+    def render(
+        self, data: Dict[str, Any], output_file: Optional[Path] = None, offline: bool = False
+    ) -> str:
         """Render visualization data to HTML.
 
         Args:
             data: The visualization data to render
             output_file: Optional output file path. If not absolute, will be relative to
                 current directory.
+            offline: Guarantee the page makes no external requests by replacing any
+                image that is not an inline data URI with a bundled fallback icon
 
         Returns:
             The rendered HTML content as a string.
@@ -44,8 +49,11 @@ class HTMLRenderer:
         components, connections = self.processor.process_json(data)
 
         # Prepare template data
+        component_dicts = [self._component_to_dict(c) for c in components]
+        if offline:
+            component_dicts = [self._inline_images(c) for c in component_dicts]
         template_data = {
-            "components": [self._component_to_dict(c) for c in components],
+            "components": component_dicts,
             "connections": [self._connection_to_dict(c) for c in connections],
             "metadata": {
                 "title": data.get("metadata", {}).get("title", "Reifire Visualization"),
@@ -85,6 +93,32 @@ class HTMLRenderer:
             "properties": component.properties,
         }
 
+    @staticmethod
+    def _inline_images(component: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace images that would be fetched over the network with bundled icons.
+
+        Returns a copy; the processor's component properties are not modified.
+        """
+        vis = component["properties"].get("visualization")
+        if not isinstance(vis, dict):
+            return component
+
+        fallback_icon = IconManager.FALLBACK_ICONS.get(
+            component["type"], IconManager.FALLBACK_ICONS["default"]
+        )
+
+        def inline(image: Any) -> Any:
+            if not image or (isinstance(image, str) and image.startswith("data:")):
+                return image
+            return resolve_fallback_icon(fallback_icon)
+
+        vis = dict(vis)
+        if "image" in vis:
+            vis["image"] = inline(vis["image"])
+        if vis.get("images"):
+            vis["images"] = [inline(image) for image in vis["images"]]
+        return {**component, "properties": {**component["properties"], "visualization": vis}}
+
     def _connection_to_dict(
         self, connection: VisualizationConnection
     ) -> Dict[str, Any]:
@@ -1,47 +1,60 @@
 """Icon management for visualizations."""
 
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Mapping, Optional
 from reifire.icon_registry import IconRegistry
+from .category_matcher import CategoryMatcher
 from .color_swatch import ColorSwatchGenerator
-import base64
+from .providers.bundled import BundledIconProvider
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _bundled_provider() -> BundledIconProvider:
+    return BundledIconProvider()
+
+
+@lru_cache(maxsize=None)
+def resolve_fallback_icon(icon: str) -> str:
+    """Resolve a fallback icon to an inline data URI when it is bundled.
+
+    Args:
+        icon: Bundled icon ID (e.g. "octicons/package-24"), URL or data URI
+
+    Returns:
+        The bundled icon's data URI, or the icon unchanged if it is not bundled
+    """
+    bundled = _bundled_provider().get_icon(icon)
+    return bundled["image"] if bundled else icon
+
+
 class IconManager:
     """Manages icon fetching and registration for visualizations."""
 
-    # Generic fallback icons for different types
+    # Generic fallback icons for different types, as bundled icon IDs. Values
+    # that are not bundled icon IDs (URLs, data URIs) are used as they are.
     FALLBACK_ICONS = {
-        "default": "https://raw.githubusercontent.com/primer/octicons/main/icons/dot-24.svg",
-        "object": "https://raw.githubusercontent.com/primer/octicons/main/icons/package-24.svg",
-        "modifier": "https://raw.githubusercontent.com/primer/octicons/main/icons/gear-24.svg",
-        "type": "https://raw.githubusercontent.com/primer/octicons/main/icons/file-code-24.svg",
-        "artifact": "https://raw.githubusercontent.com/primer/octicons/main/icons/file-24.svg",
-        "attribute": (
-            "https://raw.githubusercontent.com/primer/octicons/main/icons/list-unordered-24.svg"
-        ),
-        "alternative": (
-            "https://raw.githubusercontent.com/primer/octicons/main/icons/git-branch-24.svg"
-        ),
-        "ui_component": (
-            "https://raw.githubusercontent.com/primer/octicons/main/icons/browser-24.svg"
-        ),
-        "form_element": "https://raw.githubusercontent.com/primer/octicons/main/icons/form-24.svg",
-        "navigation": (
-            "https://raw.githubusercontent.com/primer/octicons/main/icons/navigation-24.svg"
-        ),
-        "data_display": "https://raw.githubusercontent.com/primer/octicons/main/icons/graph-24.svg",
-        "feedback": "https://raw.githubusercontent.com/primer/octicons/main/icons/comment-24.svg",
-        "layout": "https://raw.githubusercontent.com/primer/octicons/main/icons/layout-24.svg",
-        "api": "https://raw.githubusercontent.com/primer/octicons/main/icons/api-24.svg",
-        "database": "https://raw.githubusercontent.com/primer/octicons/main/icons/database-24.svg",
-        "security": (
-            "https://raw.githubusercontent.com/primer/octicons/main/icons/shield-lock-24.svg"
-        ),
-        "analytics": "https://raw.githubusercontent.com/primer/octicons/main/icons/graph-24.svg",
-        "deployment": "https://raw.githubusercontent.com/primer/octicons/main/icons/rocket-24.svg",
+        "default": "lucide/circle-dot",
+        "object": "octicons/package-24",
+        "modifier": "octicons/gear-24",
+        "type": "octicons/file-code-24",
+        "artifact": "octicons/file-24",
+        "attribute": "octicons/list-unordered-24",
+        "alternative": "octicons/git-branch-24",
+        "ui_component": "octicons/browser-24",
+        "form_element": "octicons/checklist-24",
+        "navigation": "lucide/navigation",
+        "data_display": "octicons/graph-24",
+        "feedback": "octicons/comment-24",
+        "layout": "lucide/layout-dashboard",
+        "api": "octicons/plug-24",
+        "database": "octicons/database-24",
+        "security": "octicons/shield-lock-24",
+        "analytics": "octicons/graph-24",
+        "deployment": "octicons/rocket-24",
     }
 
     # Component type categorization
@@ -90,12 +103,18 @@ class IconManager:
         self,
         icon_registry: IconRegistry,
         provider_chain: Optional[Any] = None,
+        combine_color_swatches: bool = False,
+        resolve_workers: int = 8,
     ) -> None:
         """Initialize the icon manager.
 
         Args:
             icon_registry: The icon registry to use for storing and retrieving icons
             provider_chain: ProviderChain for fetching icons. If None, creates a default chain.
+            combine_color_swatches: Render a color scheme as one striped swatch image
+                instead of one image per color
+            resolve_workers: Maximum number of concurrent provider searches in
+                resolve_icons
         """
         self.icon_registry = icon_registry
         if provider_chain is None:
@@ -103,17 +122,111 @@ class IconManager:
 
             provider_chain = ProviderChain()
         self.provider_chain = provider_chain
+        self.combine_color_swatches = combine_color_swatches
+        self.resolve_workers = resolve_workers
+        self._category_matcher = CategoryMatcher(self.COMPONENT_CATEGORIES)
+        self._fallback_images = {
+            category: resolve_fallback_icon(icon) for category, icon in self.FALLBACK_ICONS.items()
+        }
+
+    def register_category(
+        self, category: str, keywords: Iterable[str], fallback_icon: Optional[str] = None
+    ) -> None:
+        """Add a component category, or more keywords for an existing one.
+
+        New categories are checked after the built-in ones. The change only
+        affects this manager.
+
+        Args:
+            category: Category name
+            keywords: Substrings of component names that indicate the category
+            fallback_icon: Optional bundled icon ID, URL or data URI to use for the
+                category when no icon is found
+        """
+        self._category_matcher.add(category, keywords)
+        self.COMPONENT_CATEGORIES = self._category_matcher.categories
+        if fallback_icon is not None:
+            self.FALLBACK_ICONS = {**self.FALLBACK_ICONS, category: fallback_icon}
+            self._fallback_images[category] = resolve_fallback_icon(fallback_icon)
+
+    def _fallback_image(self, *categories: str) -> str:
+        """Get the fallback image for the first known category, or the default."""
+        for category in categories:
+            if category in self._fallback_images:
+                return self._fallback_images[category]
+        return self._fallback_images["default"]
 
     def _get_component_category(self, term: str) -> str:
         """Determine the category of a component based on its name."""
-        normalized = term.lower()
-        for category, terms in self.COMPONENT_CATEGORIES.items():
-            if any(t in normalized for t in terms):
-                return category
-        return "default"
-
-    def get_visualization_properties(self, obj: Dict[str, Any]) -> dict[str, Any]:
-        """Get visualization properties for an object."""
+        return self._category_matcher.match(term) or "default"
+
+    @staticmethod
+    def icon_term(obj: Dict[str, Any]) -> Optional[str]:
+        """Get the term get_visualization_properties would resolve an icon for.
+
+        Args:
+            obj: An object, modifier, attribute or relationship from a reified document
+
+        Returns:
+            The term, or None if the object's image does not come from a provider
+        """
+        if "visualization" in obj:
+            vis_props = obj["visualization"]
+            if (
+                isinstance(vis_props, dict)
+                and "name" in vis_props
+                and "source" in vis_props
+                and vis_props["source"] not in ["openai", "custom", "colors"]
+            ):
+                return str(vis_props["name"])
+            return None
+        if "icon" in obj:
+            return None
+        return obj.get("name", "") or obj.get("type", "") or None
+
+    def resolve_icons(self, terms: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve icons for many terms at once.
+
+        Terms are deduplicated and looked up in the registry first; the misses
+        are searched in the provider chain concurrently and the results are
+        registered.
+
+        Args:
+            terms: Terms to resolve, typically collected with icon_term
+
+        Returns:
+            Mapping of each term to its image URL/data URI, or None if not found
+        """
+        resolved: Dict[str, Optional[str]] = {}
+        misses: List[str] = []
+        for term in dict.fromkeys(terms):
+            icon_url = self.icon_registry.get_icon(term)
+            if icon_url:
+                resolved[term] = icon_url
+            else:
+                misses.append(term)
+
+        if misses:
+            workers = max(1, min(self.resolve_workers, len(misses)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                images = list(executor.map(self._search_icon, misses))
+            # Register from this thread; the registry is not thread-safe
+            for term, image in zip(misses, images):
+                if image:
+                    self.icon_registry.register_icon(term, image)
+                resolved[term] = image
+        return resolved
+
+    def get_visualization_properties(
+        self, obj: Dict[str, Any], resolved: Optional[Mapping[str, Optional[str]]] = None
+    ) -> dict[str, Any]:
+        """Get visualization properties for an object.
+
+        Args:
+            obj: An object, modifier, attribute or relationship from a reified document
+            resolved: Optional icons already resolved with resolve_icons. Terms
+                missing from it are resolved individually
+        """
         # If visualization properties are already specified, use those
         if "visualization" in obj:
             vis_props = obj["visualization"]
@@ -124,12 +237,9 @@ class IconManager:
             if vis_props.get("source") == "colors":
                 logger.debug("Generating color swatches for: %s", vis_props.get("name", ""))
                 colors = vis_props["name"].split("-")
-                swatches = ColorSwatchGenerator.generate_swatches(colors)
-
-                data_urls = []
-                for swatch in swatches:
-                    b64 = base64.b64encode(swatch.encode()).decode()
-                    data_urls.append(f"data:image/svg+xml;base64,{b64}")
+                data_urls = ColorSwatchGenerator.swatch_data_uris(
+                    colors, combined=self.combine_color_swatches
+                )
 
                 return {
                     "images": data_urls,
@@ -146,16 +256,14 @@ class IconManager:
 
                 # For any provider-backed source, try to resolve the icon
                 if vis_props["source"] not in ["openai", "custom", "colors"]:
-                    icon_image = self._resolve_icon(vis_props["name"])
+                    icon_image = self._lookup_icon(vis_props["name"], resolved)
                     if icon_image:
                         result["image"] = icon_image
                     else:
                         category = self._get_component_category(vis_props["name"])
-                        result["image"] = self.FALLBACK_ICONS.get(
-                            category, self.FALLBACK_ICONS["default"]
-                        )
+                        result["image"] = self._fallback_image(category)
                 elif vis_props["source"] in ["openai", "custom"]:
-                    result["image"] = self.FALLBACK_ICONS["default"]
+                    result["image"] = self._fallback_image("default")
                 return result
             return dict(vis_props)
 
@@ -170,19 +278,16 @@ class IconManager:
         # Try to fetch an icon based on the object's name or type
         icon_name = obj.get("name", "") or obj.get("type", "")
         if not icon_name:
-            return {"image": self.FALLBACK_ICONS["default"], "source": "fallback"}
+            return {"image": self._fallback_image("default"), "source": "fallback"}
 
-        icon_image = self._resolve_icon(icon_name)
+        icon_image = self._lookup_icon(icon_name, resolved)
         if icon_image:
             return {"image": icon_image, "name": icon_name, "source": "provider"}
 
         category = self._get_component_category(icon_name)
         component_type = obj.get("type", "default").lower()
-        fallback_url = self.FALLBACK_ICONS.get(
-            category,
-            self.FALLBACK_ICONS.get(component_type, self.FALLBACK_ICONS["default"]),
-        )
-        return {"image": fallback_url, "name": icon_name, "source": "fallback"}
+        fallback_image = self._fallback_image(category, component_type)
+        return {"image": fallback_image, "name": icon_name, "source": "fallback"}
 
     def _resolve_icon(self, term: str) -> Optional[str]:
         """Resolve an icon for a term using the registry cache then provider chain.
@@ -199,13 +304,25 @@ class IconManager:
             return icon_url
 
         # Search provider chain
+        image = self._search_icon(term)
+        if image:
+            self.icon_registry.register_icon(term, image)
+        return image
+
+    def _lookup_icon(
+        self, term: str, resolved: Optional[Mapping[str, Optional[str]]]
+    ) -> Optional[str]:
+        """Read a term's icon from a resolved map, resolving it now if missing."""
+        if resolved is not None and term in resolved:
+            return resolved[term]
+        return self._resolve_icon(term)
+
+    def _search_icon(self, term: str) -> Optional[str]:
+        """Search the provider chain for a term's best image."""
         results = self.provider_chain.search(term, limit=1)
         if results:
-            image = results[0].get("image", "")
-            if image:
-                self.icon_registry.register_icon(term, image)
-                return image
-
+            image: Optional[str] = results[0].get("image") or None
+            return image
         return None
 
     def get_icon_data(
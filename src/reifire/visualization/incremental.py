@@ -0,0 +1,375 @@
+"""Incremental processing of reified documents that change a little at a time.
+
+An editor re-processes the whole document after every keystroke, although
+usually only one subtree changed. IncrementalProcessor splits a document into
+subtrees (the object, each modifier, the type, the artifact, each attribute
+with its alternatives, and each relationship) and keys them by a hash of their
+content. Subtrees seen in the previous update reuse the components and
+connections built then; only new or edited subtrees are processed. Each update
+returns a patch of the components and connections that changed.
+"""
+
+import hashlib
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .icon_manager import IconManager
+from .processor import (
+    VisualizationComponent,
+    VisualizationConnection,
+    VisualizationProcessor,
+    _BuildContext,
+)
+
+# Connection endpoints within a fragment: ("local", component index),
+# ("parent", None) for the parent component, or ("raw", endpoint) as written
+_Ref = Tuple[str, Any]
+_PARENT: _Ref = ("parent", None)
+
+# Child collections that are separate subtrees, not part of their parent's
+_CHILD_KEYS = ("modifiers", "attributes", "relationships")
+
+
+@dataclass
+class VisualizationPatch:
+    """Changes between two processed versions of a document.
+
+    Components are identified by id. Connections have no id, so a connection
+    whose properties changed appears as removed and added.
+    """
+
+    added: List[VisualizationComponent] = field(default_factory=list)
+    changed: List[VisualizationComponent] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    added_connections: List[VisualizationConnection] = field(default_factory=list)
+    removed_connections: List[VisualizationConnection] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        """Whether the document's visualization did not change."""
+        return not (
+            self.added
+            or self.changed
+            or self.removed
+            or self.added_connections
+            or self.removed_connections
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary for a client to apply."""
+        return {
+            "added": [asdict(component) for component in self.added],
+            "changed": [asdict(component) for component in self.changed],
+            "removed": list(self.removed),
+            "added_connections": [asdict(connection) for connection in self.added_connections],
+            "removed_connections": [asdict(connection) for connection in self.removed_connections],
+        }
+
+
+@dataclass
+class _Link:
+    """A connection recorded relative to its fragment."""
+
+    source: _Ref
+    target: _Ref
+    type: str
+    properties: Dict[str, Any]
+
+
+@dataclass
+class _Fragment:
+    """Components and connections of one subtree, built at index 0 and y 0."""
+
+    components: List[VisualizationComponent]
+    links: List[_Link]
+    height: float
+    placement: Optional[Tuple[int, float, Optional[str]]] = None
+    placed: Optional[Tuple[List[VisualizationComponent], List[VisualizationConnection]]] = None
+
+    def place(
+        self, offset: int, y: float, parent_id: Optional[str]
+    ) -> Tuple[List[VisualizationComponent], List[VisualizationConnection]]:
+        """Position the fragment in a document.
+
+        The components from the last placement are returned again when the
+        fragment has not moved.
+
+        Args:
+            offset: Number of components before the fragment
+            y: Vertical position of the fragment's first component
+            parent_id: Id of the component the fragment hangs from
+        """
+        placement = (offset, y, parent_id)
+        if self.placed is not None and placement == self.placement:
+            return self.placed
+
+        components = [
+            replace(component, id=_shift_id(component.id, offset), y=component.y + y)
+            for component in self.components
+        ]
+
+        def endpoint(ref: _Ref) -> Any:
+            kind, value = ref
+            if kind == "local":
+                return components[value].id
+            if kind == "parent":
+                return parent_id
+            return value
+
+        connections = [
+            VisualizationConnection(
+                source=endpoint(link.source),
+                target=endpoint(link.target),
+                type=link.type,
+                properties=link.properties,
+            )
+            for link in self.links
+        ]
+        self.placement = placement
+        self.placed = (components, connections)
+        return self.placed
+
+
+class _FragmentBuilder:
+    """Builds a fragment with the processor's component methods."""
+
+    def __init__(self, resolved_icons: Dict[str, Optional[str]]) -> None:
+        self.ctx = _BuildContext(resolved_icons=resolved_icons)
+        self.links: List[_Link] = []
+        self._indexes: Dict[str, int] = {}
+        self._seen_connections = 0
+
+    def add(self, add_component: Callable[..., str], *args: Any, **kwargs: Any) -> _Ref:
+        """Add components with a processor _add_* method and return a reference."""
+        component_id = add_component(*args, ctx=self.ctx, **kwargs)
+        for index in range(len(self._indexes), len(self.ctx.components)):
+            self._indexes[self.ctx.components[index].id] = index
+        # Connections made by the method itself (color compositions) are local
+        for connection in self.ctx.connections[self._seen_connections :]:
+            self.link(
+                ("local", self._indexes[connection.source]),
+                ("local", self._indexes[connection.target]),
+                connection.type,
+                connection.properties,
+            )
+        self._seen_connections = len(self.ctx.connections)
+        return ("local", self._indexes[component_id])
+
+    def link(self, source: _Ref, target: _Ref, type: str, properties: Dict[str, Any]) -> None:
+        self.links.append(_Link(source, target, type, properties))
+
+    def finish(self) -> _Fragment:
+        components = self.ctx.components
+        if isinstance(components, list):
+            components = list(components)
+        else:
+            components = components.to_components()
+        return _Fragment(components, self.links, self.ctx.current_y)
+
+
+def _shift_id(component_id: str, offset: int) -> str:
+    """Renumber a positional component id such as "attr_3"."""
+    if not offset:
+        return component_id
+    prefix, number = component_id.rsplit("_", 1)
+    return f"{prefix}_{int(number) + offset}"
+
+
+def _digest(kind: str, item: Dict[str, Any]) -> str:
+    """Hash the content of a subtree, excluding the child subtrees.
+
+    repr() of JSON data is much cheaper than serializing it. Key order counts,
+    which is also what decides the order of the component's properties.
+    """
+    if kind in ("object", "type", "artifact"):
+        item = {key: value for key, value in item.items() if key not in _CHILD_KEYS}
+    content = repr((kind, item))
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _connection_key(connection: VisualizationConnection) -> str:
+    return json.dumps(
+        [connection.source, connection.target, connection.type, connection.properties],
+        sort_keys=True,
+        default=repr,
+    )
+
+
+class IncrementalProcessor:
+    """Re-processes only the subtrees of a document that changed.
+
+    Produces the same components and connections as
+    VisualizationProcessor.process_json. Icons are resolved when a subtree is
+    first processed; call reset() to pick up changes in the icon registry.
+    An instance tracks one document and is not thread-safe.
+    """
+
+    def __init__(self, processor: Optional[VisualizationProcessor] = None) -> None:
+        """Initialize the incremental processor.
+
+        Args:
+            processor: Processor whose settings and icon manager to use
+        """
+        self.processor = processor or VisualizationProcessor()
+        self.components: List[VisualizationComponent] = []
+        self.connections: List[VisualizationConnection] = []
+        self._fragments: Dict[Tuple[str, int], _Fragment] = {}
+
+    def reset(self) -> None:
+        """Forget the previous document; the next update processes everything."""
+        self.components = []
+        self.connections = []
+        self._fragments = {}
+
+    def update(self, data: Dict[str, Any]) -> VisualizationPatch:
+        """Process a new version of the document.
+
+        Args:
+            data: Reified document
+
+        Returns:
+            Patch from the previous version's components and connections to
+            the new ones; the full result is in components and connections
+        """
+        subtrees = list(self._subtrees(data))
+        occurrences: Counter = Counter()
+        keys = []
+        for kind, item in subtrees:
+            digest = _digest(kind, item)
+            occurrences[digest] += 1
+            keys.append((digest, occurrences[digest]))
+
+        missing = [subtree for subtree, key in zip(subtrees, keys) if key not in self._fragments]
+        resolved = self._resolve_icons(missing)
+
+        fragments: Dict[Tuple[str, int], _Fragment] = {}
+        components: List[VisualizationComponent] = []
+        connections: List[VisualizationConnection] = []
+        y: float = 0
+        main_id: Optional[str] = None
+        artifact_id: Optional[str] = None
+        for (kind, item), key in zip(subtrees, keys):
+            fragment = self._fragments.get(key) or self._build(kind, item, resolved)
+            fragments[key] = fragment
+            parent_id = artifact_id if kind == "attribute" else main_id
+            placed_components, placed_connections = fragment.place(len(components), y, parent_id)
+            if kind == "object":
+                main_id = placed_components[0].id
+            elif kind == "artifact":
+                artifact_id = placed_components[0].id
+            components.extend(placed_components)
+            connections.extend(placed_connections)
+            y += fragment.height
+
+        patch = self._diff(components, connections)
+        self._fragments = fragments
+        self.components = components
+        self.connections = connections
+        return patch
+
+    @staticmethod
+    def _subtrees(data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (kind, item) for each subtree, in processing order."""
+        yield "object", data.get("object", {})
+        if "object" in data:
+            for modifier in data["object"].get("modifiers", []):
+                yield "modifier", modifier
+        if "type" in data:
+            yield "type", data["type"]
+        if "artifact" in data:
+            artifact = data["artifact"]
+            yield "artifact", artifact
+            for attr in artifact.get("attributes", []):
+                yield "attribute", attr
+            for rel in artifact.get("relationships", []):
+                yield "relationship", rel
+
+    def _resolve_icons(
+        self, subtrees: List[Tuple[str, Dict[str, Any]]]
+    ) -> Dict[str, Optional[str]]:
+        """Resolve the icons of the given subtrees in one batch."""
+        icon_manager = self.processor.icon_manager
+        if not icon_manager:
+            return {}
+        items = []
+        for kind, item in subtrees:
+            items.append(item)
+            if kind == "attribute":
+                items.extend(item.get("alternatives", []))
+        return icon_manager.resolve_icons(
+            term for term in map(IconManager.icon_term, items) if term
+        )
+
+    def _build(
+        self, kind: str, item: Dict[str, Any], resolved: Dict[str, Optional[str]]
+    ) -> _Fragment:
+        """Build the fragment of one subtree the way process_json would."""
+        processor = self.processor
+        builder = _FragmentBuilder(resolved)
+        base_x, x_offset = processor.base_x, processor.x_offset
+        if kind == "object":
+            builder.add(processor._add_object_component, item, "object", x_offset=base_x)
+        elif kind == "modifier":
+            ref = builder.add(processor._add_modifier_component, item, x_offset=base_x + x_offset)
+            builder.link(_PARENT, ref, "modifier", item.get("properties", {}))
+        elif kind in ("type", "artifact"):
+            offset = x_offset if kind == "type" else x_offset * 2
+            ref = builder.add(processor._add_object_component, item, kind, x_offset=base_x + offset)
+            builder.link(_PARENT, ref, kind, item.get("properties", {}))
+        elif kind == "attribute":
+            ref = builder.add(
+                processor._add_attribute_component, item, x_offset=base_x + x_offset * 2
+            )
+            builder.link(_PARENT, ref, "attribute", item.get("properties", {}))
+            for alt in item.get("alternatives", []):
+                alt_ref = builder.add(
+                    processor._add_attribute_component,
+                    alt,
+                    is_alternative=True,
+                    x_offset=base_x + x_offset * 3,
+                )
+                builder.link(ref, alt_ref, "alternative", alt.get("properties", {}))
+        else:
+            ref = builder.add(processor._add_relationship_component, item)
+            if "source" in item and "target" in item:
+                builder.link(("raw", item["source"]), ref, "source", {})
+                builder.link(ref, ("raw", item["target"]), "target", {})
+        return builder.finish()
+
+    def _diff(
+        self,
+        components: List[VisualizationComponent],
+        connections: List[VisualizationConnection],
+    ) -> VisualizationPatch:
+        """Compare new components and connections with the previous update's."""
+        patch = VisualizationPatch()
+        previous = {component.id: component for component in self.components}
+        for component in components:
+            old = previous.pop(component.id, None)
+            if old is None:
+                patch.added.append(component)
+            elif old is not component and old != component:
+                patch.changed.append(component)
+        patch.removed = list(previous)
+
+        # Reused connections are the same objects; compare the rest by content
+        reused = {id(c) for c in connections} & {id(c) for c in self.connections}
+        new = [c for c in connections if id(c) not in reused]
+        old_connections = [c for c in self.connections if id(c) not in reused]
+        old_keys = Counter(_connection_key(c) for c in old_connections)
+        new_keys = Counter(_connection_key(c) for c in new)
+        for connection in new:
+            key = _connection_key(connection)
+            if old_keys[key]:
+                old_keys[key] -= 1
+            else:
+                patch.added_connections.append(connection)
+        for connection in old_connections:
+            key = _connection_key(connection)
+            if new_keys[key]:
+                new_keys[key] -= 1
+            else:
+                patch.removed_connections.append(connection)
+        return patch
@@ -1,9 +1,24 @@
 """Layout engine for visual components."""
 
+import sys
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional, Any, Tuple
 
+from .compat import HAVE_NUMPY
+from .force_layout import ForceLayout
+from .layered_layout import LayeredLayout
+
+if HAVE_NUMPY:
+    import numpy as np
+
+# Slotted records save memory on large layouts (needs Python 3.10)
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# Below this many children the scalar layouts are faster than the numpy ones
+_VECTORIZE_MIN_CHILDREN = 256
+
 
 class ConnectionType(Enum):
     """Types of connections between components."""
@@ -17,7 +32,7 @@ class ConnectionType(Enum):
     REFERENCE = "reference"  # References/points to
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Connection:
     """Represents a connection between two components."""
 
@@ -36,6 +51,8 @@ class LayoutType(Enum):
     GRID = "grid"  # Matrix layout
     FLOW = "flow"  # Natural flow layout
     CENTERED = "centered"  # Centered layout
+    FORCE = "force"  # Force-directed graph layout (needs numpy)
+    LAYERED = "layered"  # Layers along the direction of connections
 
 
 class ComponentType(Enum):
@@ -50,7 +67,7 @@ class ComponentType(Enum):
     GROUP = "group"  # Grouped components
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Position:
     """2D position with optional depth for hierarchical layouts."""
 
@@ -59,7 +76,7 @@ class Position:
     z: Optional[float] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Size:
     """Component size."""
 
@@ -67,7 +84,7 @@ class Size:
     height: float
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class LayoutComponent:
     """A component to be laid out."""
 
@@ -100,9 +117,22 @@ class LayoutComponent:
 class LayoutEngine:
     """Engine for laying out visual components."""
 
-    def __init__(self, layout_type: LayoutType = LayoutType.HIERARCHICAL) -> None:
-        """Initialize the layout engine."""
+    def __init__(
+        self,
+        layout_type: LayoutType = LayoutType.HIERARCHICAL,
+        force_layout: Optional[ForceLayout] = None,
+        layered_layout: Optional[LayeredLayout] = None,
+    ) -> None:
+        """Initialize the layout engine.
+
+        Args:
+            layout_type: How to arrange the components
+            force_layout: Settings for the force layout
+            layered_layout: Settings for the layered layout
+        """
         self.layout_type = layout_type
+        self.force_layout = force_layout or ForceLayout()
+        self.layered_layout = layered_layout or LayeredLayout()
         self.components: Dict[str, LayoutComponent] = {}
         self.root: Optional[LayoutComponent] = None
 
@@ -168,62 +198,48 @@ class LayoutEngine:
         if not self.root:
             return {}
 
+        tree = _FlatTree(self.root)
         if self.layout_type == LayoutType.HIERARCHICAL:
-            self._layout_hierarchical(self.root, Position(0, 0))
+            self._layout_hierarchical(tree, Position(0, 0))
         elif self.layout_type == LayoutType.VERTICAL:
-            self._layout_vertical(self.root, Position(0, 0))
+            self._layout_vertical(tree, Position(0, 0))
         elif self.layout_type == LayoutType.HORIZONTAL:
-            self._layout_horizontal(self.root, Position(0, 0))
+            self._layout_horizontal(tree, Position(0, 0))
         elif self.layout_type == LayoutType.GRID:
-            self._layout_grid(self.root, Position(0, 0))
+            self._layout_grid(tree, Position(0, 0))
         elif self.layout_type == LayoutType.FLOW:
-            self._layout_flow(self.root, Position(0, 0))
+            self._layout_flow(tree, Position(0, 0))
         elif self.layout_type == LayoutType.CENTERED:
-            self._layout_centered(self.root, Position(0, 0))
+            self._layout_centered(tree, Position(0, 0))
+        elif self.layout_type == LayoutType.FORCE:
+            self._layout_force(Position(0, 0))
+        elif self.layout_type == LayoutType.LAYERED:
+            self._layout_layered(Position(0, 0))
 
         return {id: (c.position, c.size) for id, c in self.components.items()}
 
-    def _layout_hierarchical(
-        self, component: LayoutComponent, start_pos: Position
-    ) -> Size:
-        """Layout components in a tree structure."""
-        component.position = start_pos
-        if not component.children:
-            return component.size
+    def _layout_hierarchical(self, tree: "_FlatTree", start_pos: Position) -> Size:
+        """Layout components as a tidy tree.
 
-        # Calculate positions for children
-        total_width = 0.0
-        max_height = 0.0
-        x = start_pos.x
-        y = start_pos.y + component.size.height + 50  # Vertical spacing
-
-        for child in component.children:
-            child_size = self._layout_hierarchical(child, Position(x, y))
-            total_width += child_size.width
-            max_height = max(max_height, child_size.height)
-            x += child_size.width + 20  # Horizontal spacing
-
-        # Center children under parent
-        offset = (total_width - component.size.width) / 2
-        for child in component.children:
-            child.position.x -= offset
-
-        return Size(
-            max(total_width, component.size.width),
-            component.size.height + max_height + 50,
-        )
+        Subtrees are packed as closely as their contours allow, parents are
+        centered over their children and siblings keep their order. The root
+        is placed at start_pos.
+        """
+        return _TidyTree(tree).layout(start_pos)
 
-    def _layout_vertical(self, component: LayoutComponent, start_pos: Position) -> Size:
+    def _layout_vertical(self, tree: "_FlatTree", start_pos: Position) -> Size:
         """Layout components vertically."""
+        component = tree.nodes[0]
         component.position = start_pos
-        if not component.children:
+        children = tree.child_nodes(0)
+        if not children:
             return component.size
 
         total_height = component.size.height
         max_width = component.size.width
         y = start_pos.y + component.size.height + 20  # Vertical spacing
 
-        for child in component.children:
+        for child in children:
             child.position = Position(start_pos.x, y)
             total_height += child.size.height + 20  # Include spacing
             max_width = max(max_width, child.size.width)
@@ -231,19 +247,19 @@ class LayoutEngine:
 
         return Size(max_width, total_height)
 
-    def _layout_horizontal(
-        self, component: LayoutComponent, start_pos: Position
-    ) -> Size:
+    def _layout_horizontal(self, tree: "_FlatTree", start_pos: Position) -> Size:
         """Layout components horizontally."""
+        component = tree.nodes[0]
         component.position = start_pos
-        if not component.children:
+        children = tree.child_nodes(0)
+        if not children:
             return component.size
 
         total_width = component.size.width
         max_height = component.size.height
         x = start_pos.x + component.size.width + 20  # Horizontal spacing
 
-        for child in component.children:
+        for child in children:
             child.position = Position(x, start_pos.y)
             total_width += child.size.width + 20  # Include spacing
             max_height = max(max_height, child.size.height)
@@ -251,22 +267,33 @@ class LayoutEngine:
 
         return Size(total_width, max_height)
 
-    def _layout_grid(self, component: LayoutComponent, start_pos: Position) -> Size:
+    def _layout_grid(self, tree: "_FlatTree", start_pos: Position) -> Size:
         """Layout components in a grid."""
+        component = tree.nodes[0]
         component.position = start_pos
-        if not component.children:
+        children = tree.child_nodes(0)
+        if not children:
             return component.size
 
         # Calculate grid dimensions
-        n = len(component.children)
+        n = len(children)
         cols = int(n**0.5)  # Square root for roughly square grid
         rows = (n + cols - 1) // cols
 
-        max_cell_width = max(child.size.width for child in component.children)
-        max_cell_height = max(child.size.height for child in component.children)
+        max_cell_width = max(child.size.width for child in children)
+        max_cell_height = max(child.size.height for child in children)
+
+        if HAVE_NUMPY and n >= _VECTORIZE_MIN_CHILDREN:
+            index = np.arange(n)
+            xs = start_pos.x + (index % cols) * (max_cell_width + 20)
+            ys = start_pos.y + (index // cols) * (max_cell_height + 20)
+            _place(children, xs, ys)
+            return Size(
+                cols * max_cell_width + (cols - 1) * 20, rows * max_cell_height + (rows - 1) * 20
+            )
 
         # Position children in grid
-        for i, child in enumerate(component.children):
+        for i, child in enumerate(children):
             row = i // cols
             col = i % cols
             x = start_pos.x + col * (max_cell_width + 20)
@@ -278,19 +305,26 @@ class LayoutEngine:
 
         return Size(total_width, total_height)
 
-    def _layout_flow(self, component: LayoutComponent, start_pos: Position) -> Size:
+    def _layout_flow(self, tree: "_FlatTree", start_pos: Position) -> Size:
         """Layout components in a natural flow."""
+        component = tree.nodes[0]
         component.position = start_pos
-        if not component.children:
+        children = tree.child_nodes(0)
+        if not children:
             return component.size
 
+        if HAVE_NUMPY and len(children) >= _VECTORIZE_MIN_CHILDREN:
+            size = self._layout_flow_vectorized(tree, start_pos)
+            if size is not None:
+                return size
+
         x = start_pos.x
         y = start_pos.y + component.size.height + 20
         row_height = 0.0
         max_width = 0.0
         row_start_x = x
 
-        for child in component.children:
+        for child in children:
             if x + child.size.width > 1000:  # Max width threshold
                 x = row_start_x
                 y += row_height + 20
@@ -303,18 +337,31 @@ class LayoutEngine:
 
         return Size(max_width, y + row_height - start_pos.y)
 
-    def _layout_centered(self, component: LayoutComponent, start_pos: Position) -> Size:
+    def _layout_centered(self, tree: "_FlatTree", start_pos: Position) -> Size:
         """Layout components with center alignment."""
+        component = tree.nodes[0]
         component.position = start_pos
-        if not component.children:
+        children = tree.child_nodes(0)
+        if not children:
             return component.size
 
+        if HAVE_NUMPY and len(children) >= _VECTORIZE_MIN_CHILDREN:
+            widths, heights = tree.child_sizes(0)
+            # Each child is centered in the widest box seen so far, as in the loop below
+            running_max = np.maximum.accumulate(np.append(component.size.width, widths))[1:]
+            xs = start_pos.x + (running_max - widths) / 2
+            # cumsum adds in order, so the sums match the loop's running totals
+            ys = np.cumsum(np.append(start_pos.y + component.size.height + 20, heights + 20))
+            heights_so_far = np.cumsum(np.append(component.size.height, heights + 20))
+            _place(children, xs, ys[:-1])
+            return Size(running_max[-1].item(), heights_so_far[-1].item())
+
         # First layout children vertically
         total_height = component.size.height
         max_width = component.size.width
         y = start_pos.y + component.size.height + 20
 
-        for child in component.children:
+        for child in children:
             child_width = child.size.width
             max_width = max(max_width, child_width)
             child.position = Position(
@@ -324,3 +371,305 @@ class LayoutEngine:
             y += child.size.height + 20
 
         return Size(max_width, total_height)
+
+    def _layout_force(self, start_pos: Position) -> Size:
+        """Layout all components as a graph with the force layout.
+
+        Connections of any type, parent-child included, act as springs.
+        Components outside the root's tree are placed too. The drawing's top
+        left corner is placed at start_pos.
+        """
+        components = list(self.components.values())
+        index = {id: i for i, id in enumerate(self.components)}
+        edges = [
+            (index[connection.source_id], index[connection.target_id])
+            for connection in self.get_all_connections()
+            if connection.target_id in index
+        ]
+        sizes = [(component.size.width, component.size.height) for component in components]
+        centers = self.force_layout.positions(sizes, edges)
+
+        widths, heights = np.array(sizes, dtype=float).T
+        xs, ys = centers[:, 0] - widths / 2, centers[:, 1] - heights / 2
+        left, top = xs.min(), ys.min()
+        _place(components, xs - left + start_pos.x, ys - top + start_pos.y)
+        return Size(float(np.max(xs + widths) - left), float(np.max(ys + heights) - top))
+
+    def _layout_layered(self, start_pos: Position) -> Size:
+        """Layout all components in layers along their connections.
+
+        Parents go above their children and other connections point down,
+        from source to target. Components outside the root's tree are placed
+        too. The drawing's top left corner is placed at start_pos.
+        """
+        components = list(self.components.values())
+        index = {id: i for i, id in enumerate(self.components)}
+        edges = []
+        for connection in self.get_all_connections():
+            if connection.target_id not in index:
+                continue
+            source, target = index[connection.source_id], index[connection.target_id]
+            if connection.type == ConnectionType.PARENT_CHILD:
+                # Children connect to their parents
+                source, target = target, source
+            edges.append((source, target))
+        sizes = [(component.size.width, component.size.height) for component in components]
+        centers = self.layered_layout.positions(sizes, edges)
+
+        corners = [
+            (x - width / 2, y - height / 2) for (x, y), (width, height) in zip(centers, sizes)
+        ]
+        left = min(x for x, _ in corners)
+        top = min(y for _, y in corners)
+        for component, (x, y) in zip(components, corners):
+            component.position = Position(x - left + start_pos.x, y - top + start_pos.y)
+        right = max(x + width for (x, _), (width, _) in zip(corners, sizes))
+        bottom = max(y + height for (_, y), (_, height) in zip(corners, sizes))
+        return Size(right - left, bottom - top)
+
+    def _layout_flow_vectorized(self, tree: "_FlatTree", start_pos: Position) -> Optional[Size]:
+        """Vectorized _layout_flow for the root's children.
+
+        Row breaks are found with a binary search over the cumulative widths,
+        one search per row. The cumulative sums reproduce the loop's running
+        x exactly only for whole-number widths; for others this returns None
+        and the loop is used.
+        """
+        widths, heights = tree.child_sizes(0)
+        if not float(start_pos.x).is_integer() or np.any(np.mod(widths, 1)):
+            return None
+
+        n = len(widths)
+        steps = widths + 20
+        # offsets[j]: x of child j relative to the start of a row beginning at child 0
+        offsets = np.concatenate(([0.0], np.cumsum(steps)))
+        # Right edges only grow with the index, so they can be binary searched
+        right_edges = (offsets[:-1] + widths).tolist()
+        row_offsets = offsets.tolist()
+        budget = 1000 - start_pos.x  # Max width threshold
+        row_starts = [0]
+        while True:
+            start = row_starts[-1]
+            # First child after start whose right edge crosses the threshold
+            end = max(bisect_right(right_edges, budget + row_offsets[start]), start + 1)
+            if end >= n:
+                break
+            row_starts.append(end)
+
+        starts = np.array(row_starts)
+        row_of = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+        xs = start_pos.x + offsets[:-1] - offsets[starts][row_of]
+        row_heights = np.maximum.reduceat(heights, starts)
+        first_y = start_pos.y + tree.nodes[0].size.height + 20
+        if widths[0] > budget:
+            # The loop wraps before the first child too, adding an empty row
+            first_y += 20
+        row_ys = np.cumsum(np.append(first_y, row_heights[:-1] + 20))
+        _place(tree.child_nodes(0), xs, row_ys[row_of])
+
+        max_width = float(np.max(offsets[1:] - offsets[starts][row_of]))
+        return Size(max_width, float(row_ys[-1] + row_heights[-1]) - start_pos.y)
+
+
+def _place(children: List[LayoutComponent], xs: Any, ys: Any) -> None:
+    """Write positions computed as numpy arrays back to the components."""
+    for child, position in zip(children, map(Position, xs.tolist(), ys.tolist())):
+        child.position = position
+
+
+class _FlatTree:
+    """A component tree flattened into breadth-first arrays.
+
+    Node 0 is the root. The children of node v are the contiguous range
+    first_child[v] to first_child[v] + child_count[v], and every node comes
+    after its parent, so layouts can work bottom-up by walking the arrays
+    backwards and top-down by walking them forwards, without recursion.
+    """
+
+    def __init__(self, root: LayoutComponent) -> None:
+        self.nodes: List[LayoutComponent] = [root]
+        self.parent: List[int] = [-1]
+        self.first_child: List[int] = []
+        self.child_count: List[int] = []
+        # The list grows while it is walked, which makes the walk breadth-first
+        nodes, parent = self.nodes, self.parent
+        first_child, child_count = self.first_child, self.child_count
+        for index, component in enumerate(nodes):
+            children = component.children
+            first_child.append(len(nodes))
+            child_count.append(len(children))
+            if children:
+                nodes.extend(children)
+                parent.extend([index] * len(children))
+        self.width = [node.size.width for node in self.nodes]
+        self.height = [node.size.height for node in self.nodes]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def child_nodes(self, v: int) -> List[LayoutComponent]:
+        """The children of node v, in order."""
+        first = self.first_child[v]
+        return self.nodes[first : first + self.child_count[v]]
+
+    def child_sizes(self, v: int) -> Tuple[Any, Any]:
+        """Widths and heights of the children of node v as numpy arrays."""
+        first = self.first_child[v]
+        end = first + self.child_count[v]
+        return (
+            np.array(self.width[first:end], dtype=float),
+            np.array(self.height[first:end], dtype=float),
+        )
+
+
+class _TidyTree:
+    """Tidy tree drawing in linear time.
+
+    Walker's algorithm with the improvements of Buchheim, Jünger and Leipert
+    ("Improving Walker's Algorithm to Run in Linear Time", 2002), generalized
+    to nodes of different widths. The paper's recursive walks are replaced by
+    passes over a _FlatTree, so trees of any depth can be laid out.
+    """
+
+    def __init__(self, tree: _FlatTree, sibling_gap: float = 20, level_gap: float = 50) -> None:
+        self.tree = tree
+        self.sibling_gap = sibling_gap
+        self.level_gap = level_gap
+        n = len(tree)
+        self.prelim = [0.0] * n
+        self.mod = [0.0] * n
+        self.shift = [0.0] * n
+        self.change = [0.0] * n
+        self.thread = [-1] * n
+        self.ancestor = list(range(n))
+
+    def layout(self, start_pos: Position) -> Size:
+        """Position every node and return the size of the drawing."""
+        self._first_walk()
+        # Shift the drawing so that the root's left edge is at start_pos.x
+        self._second_walk(start_pos.x + self.tree.width[0] / 2 - self.prelim[0], start_pos.y)
+        nodes = self.tree.nodes
+        left = min(node.position.x for node in nodes)
+        right = max(node.position.x + node.size.width for node in nodes)
+        bottom = max(node.position.y + node.size.height for node in nodes)
+        return Size(right - left, bottom - start_pos.y)
+
+    def _distance(self, left: int, right: int) -> float:
+        """Minimum distance between the centers of two adjacent nodes."""
+        width = self.tree.width
+        return (width[left] + width[right]) / 2 + self.sibling_gap
+
+    def _next_left(self, v: int) -> int:
+        return self.tree.first_child[v] if self.tree.child_count[v] else self.thread[v]
+
+    def _next_right(self, v: int) -> int:
+        count = self.tree.child_count[v]
+        return self.tree.first_child[v] + count - 1 if count else self.thread[v]
+
+    def _first_walk(self) -> None:
+        """Compute preliminary x coordinates bottom-up.
+
+        A node's subtree is finished before its parent is visited; the parent
+        then places its children left to right, pushing each clear of the
+        ones before it.
+        """
+        first_child, child_count = self.tree.first_child, self.tree.child_count
+        prelim, mod = self.prelim, self.mod
+        # Center of each node's children, needed when the node itself is placed
+        midpoint = [0.0] * len(self.tree)
+        for v in range(len(self.tree) - 1, -1, -1):
+            count = child_count[v]
+            if not count:
+                continue
+            first = first_child[v]
+            default_ancestor = first
+            for child in range(first, first + count):
+                if child > first:
+                    sibling = child - 1
+                    prelim[child] = prelim[sibling] + self._distance(sibling, child)
+                    if child_count[child]:
+                        mod[child] = prelim[child] - midpoint[child]
+                else:
+                    prelim[child] = midpoint[child]
+                default_ancestor = self._apportion(child, default_ancestor)
+            self._execute_shifts(v)
+            midpoint[v] = (prelim[first] + prelim[first + count - 1]) / 2
+        prelim[0] = midpoint[0]
+
+    def _apportion(self, v: int, default_ancestor: int) -> int:
+        """Push the subtree of v clear of the subtrees of its left siblings."""
+        leftmost = self.tree.first_child[self.tree.parent[v]]
+        if v == leftmost:
+            return default_ancestor
+        prelim, mod = self.prelim, self.mod
+        # Inner and outer contours on the right (p) and left (m) side
+        v_ip = v_op = v
+        v_im = v - 1
+        v_om = leftmost
+        s_ip, s_op, s_im, s_om = mod[v_ip], mod[v_op], mod[v_im], mod[v_om]
+        next_im, next_ip = self._next_right(v_im), self._next_left(v_ip)
+        while next_im >= 0 and next_ip >= 0:
+            v_im, v_ip = next_im, next_ip
+            v_om, v_op = self._next_left(v_om), self._next_right(v_op)
+            self.ancestor[v_op] = v
+            shift = (prelim[v_im] + s_im) - (prelim[v_ip] + s_ip) + self._distance(v_im, v_ip)
+            if shift > 0:
+                self._move_subtree(self._ancestor(v_im, v, default_ancestor), v, shift)
+                s_ip += shift
+                s_op += shift
+            s_im += mod[v_im]
+            s_ip += mod[v_ip]
+            s_om += mod[v_om]
+            s_op += mod[v_op]
+            next_im, next_ip = self._next_right(v_im), self._next_left(v_ip)
+        if next_im >= 0 and self._next_right(v_op) < 0:
+            self.thread[v_op] = next_im
+            mod[v_op] += s_im - s_op
+        if next_ip >= 0 and self._next_left(v_om) < 0:
+            self.thread[v_om] = next_ip
+            mod[v_om] += s_ip - s_om
+            default_ancestor = v
+        return default_ancestor
+
+    def _ancestor(self, v_im: int, v: int, default_ancestor: int) -> int:
+        ancestor = self.ancestor[v_im]
+        parent = self.tree.parent
+        return ancestor if parent[ancestor] == parent[v] else default_ancestor
+
+    def _move_subtree(self, w_m: int, w_p: int, shift: float) -> None:
+        """Shift the subtree of w_p and spread the shift over the siblings between."""
+        # Siblings are contiguous, so their distance is the number of subtrees
+        subtrees = w_p - w_m
+        self.change[w_p] -= shift / subtrees
+        self.shift[w_p] += shift
+        self.change[w_m] += shift / subtrees
+        self.prelim[w_p] += shift
+        self.mod[w_p] += shift
+
+    def _execute_shifts(self, v: int) -> None:
+        shift = change = 0.0
+        first = self.tree.first_child[v]
+        for child in range(first + self.tree.child_count[v] - 1, first - 1, -1):
+            self.prelim[child] += shift
+            self.mod[child] += shift
+            change += self.change[child]
+            shift += self.shift[child] + change
+
+    def _second_walk(self, root_offset: float, root_y: float) -> None:
+        """Compute final positions top-down by summing modifiers."""
+        tree = self.tree
+        n = len(tree)
+        offset = [0.0] * n
+        y = [0.0] * n
+        offset[0] = root_offset
+        y[0] = root_y
+        for v in range(n):
+            node = tree.nodes[v]
+            node.position = Position(self.prelim[v] + offset[v] - tree.width[v] / 2, y[v])
+            first = tree.first_child[v]
+            if tree.child_count[v]:
+                child_offset = offset[v] + self.mod[v]
+                child_y = y[v] + tree.height[v] + self.level_gap
+                for child in range(first, first + tree.child_count[v]):
+                    offset[child] = child_offset
+                    y[child] = child_y
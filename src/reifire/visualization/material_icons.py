@@ -1,39 +1,189 @@
 """Material Design Icons provider."""
 
+import hashlib
+import heapq
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Set, Optional
+from typing import Any, Dict, List, Set, Optional, Tuple
 import logging
 
+from .persistence import atomic_write_text
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_INDEX_CACHE_DIR = Path.home() / ".reifire" / "material_index"
+
+# Bump when the cached index layout changes
+INDEX_CACHE_VERSION = 1
+
+# Ranked search weights by how an index term relates to an icon name
+FULL_NAME_WEIGHT = 4.0
+BIGRAM_WEIGHT = 2.0
+WORD_WEIGHT = 1.0
+VARIANT_WEIGHT = 0.5
+
 
 class MaterialIconProvider:
     """Provider for Material Design Icons."""
 
-    def __init__(self) -> None:
-        """Initialize the Material Design Icons provider."""
+    def __init__(
+        self, cache_dir: Optional[Path] = None, max_workers: Optional[int] = None
+    ) -> None:
+        """Initialize the Material Design Icons provider.
+
+        The icon index is not built here. It is loaded on first use, either from
+        the on-disk index cache or by scanning the icon directory.
+
+        Args:
+            cache_dir: Directory for the scanned index cache. Defaults to
+                ~/.reifire/material_index/
+            max_workers: Number of threads used to scan categories on a cold rebuild
+        """
         self.base_dir = os.environ.get("MATERIAL_DESIGN_ICONS_DIR")
         self.style = "materialicons"  # Default style
         self.size = "24dp"  # Default size
         self.resolution = "1x"  # Default resolution
+        self.cache_dir = cache_dir or DEFAULT_INDEX_CACHE_DIR
+        self.max_workers = max_workers
+        self._available: Optional[bool] = None
         self._icon_cache: Dict[str, str] = {}
-        self._available_icons: Dict[str, List[str]] = {}  # category -> icon names
-        self._term_to_icons: Dict[str, List[tuple[str, str]]] = (
+        self._index_lock = threading.Lock()
+        self._index_loaded = threading.Event()
+        self._icons_by_category: Dict[str, List[str]] = {}  # category -> icon names
+        self._term_index: Dict[str, List[Tuple[str, str]]] = (
             {}
         )  # term -> [(category, icon_name)]
+        self._icon_entries: List[Tuple[str, str, str]] = []  # (category, icon_name, path)
+        self._ranked_index: Dict[str, List[Tuple[int, float]]] = (
+            {}
+        )  # term -> [(entry index, weight)]
 
-        if self.is_available():
-            self._load_available_icons()
-            total_icons = sum(len(icons) for icons in self._available_icons.values())
-            logger.info(f"Loaded {total_icons} Material Design icons")
+    @property
+    def _available_icons(self) -> Dict[str, List[str]]:
+        """Icon names by category, loading the index on first access."""
+        self._ensure_index()
+        return self._icons_by_category
+
+    @property
+    def _term_to_icons(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Term mappings to (category, icon_name), loading the index on first access."""
+        self._ensure_index()
+        return self._term_index
 
     def is_available(self) -> bool:
         """Check if Material Design Icons are available."""
-        return bool(self.base_dir and Path(self.base_dir).exists())
+        if self._available is None:
+            self._available = bool(self.base_dir and Path(self.base_dir).exists())
+        return self._available
+
+    def _ensure_index(self) -> None:
+        """Load the icon index from cache or by scanning, once per provider."""
+        if self._index_loaded.is_set():
+            return
+        with self._index_lock:
+            if self._index_loaded.is_set():
+                return
+            if self.is_available():
+                if not self._load_index_cache():
+                    self._load_available_icons()
+                    self._save_index_cache()
+                self._build_ranked_index()
+                total_icons = sum(len(icons) for icons in self._icons_by_category.values())
+                logger.info(f"Loaded {total_icons} Material Design icons")
+            self._index_loaded.set()
+
+    def _index_cache_key(self) -> Optional[Dict[str, Any]]:
+        """Build the key that a cached index must match to be reused."""
+        if not self.base_dir:
+            return None
+        base_path = Path(self.base_dir) / "png"
+        try:
+            mtime_ns = base_path.stat().st_mtime_ns
+        except OSError:
+            return None
+        return {
+            "version": INDEX_CACHE_VERSION,
+            "base_dir": str(base_path.resolve()),
+            "mtime_ns": mtime_ns,
+            "style": self.style,
+            "size": self.size,
+            "resolution": self.resolution,
+        }
+
+    def _index_cache_file(self) -> Path:
+        """Path of the index cache file for the current directory and settings."""
+        ident = "|".join(
+            [str(Path(self.base_dir or "").resolve()), self.style, self.size, self.resolution]
+        )
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:16]
+        return self.cache_dir / f"{digest}.json"
+
+    def _load_index_cache(self) -> bool:
+        """Load the scanned index from the cache file if it is still valid.
+
+        Returns:
+            True if the index was loaded from cache, False otherwise
+        """
+        key = self._index_cache_key()
+        cache_file = self._index_cache_file()
+        if key is None or not cache_file.exists():
+            return False
+        try:
+            cached = json.loads(cache_file.read_text())
+        except (json.JSONDecodeError, OSError):
+            logger.debug(f"Ignoring unreadable Material index cache {cache_file}")
+            return False
+        if cached.get("key") != key:
+            logger.debug(f"Material index cache {cache_file} is stale")
+            return False
+        self._icons_by_category = cached["available_icons"]
+        self._term_index = {
+            term: [(category, icon_name) for category, icon_name in matches]
+            for term, matches in cached["term_to_icons"].items()
+        }
+        logger.debug(f"Loaded Material index from cache {cache_file}")
+        return True
+
+    def _save_index_cache(self) -> None:
+        """Serialize the scanned index to the cache file."""
+        key = self._index_cache_key()
+        if key is None:
+            return
+        cache_file = self._index_cache_file()
+        payload = {
+            "key": key,
+            "available_icons": self._icons_by_category,
+            "term_to_icons": self._term_index,
+        }
+        try:
+            atomic_write_text(cache_file, json.dumps(payload))
+        except OSError as e:
+            logger.warning(f"Failed to write Material index cache {cache_file}: {e}")
+
+    def _scan_category(self, category: Path) -> List[str]:
+        """List the icons in a category that exist with our style/size/resolution."""
+        icon_names = []
+        for icon_dir in sorted(category.iterdir()):
+            if icon_dir.is_dir():
+                # Check if the icon actually exists with our style/size/resolution preferences
+                icon_path = (
+                    icon_dir
+                    / self.style
+                    / self.size
+                    / self.resolution
+                    / f"baseline_{icon_dir.name}_black_24dp.png"
+                )
+                if icon_path.exists():
+                    icon_names.append(icon_dir.name)
+        return icon_names
 
     def _load_available_icons(self) -> None:
-        """Load all available icon names from the Material Design Icons directory."""
+        """Scan the Material Design Icons directory, one category per worker thread."""
+        self._icons_by_category = {}
+        self._term_index = {}
         if not self.base_dir:
             logger.warning("Material Design Icons directory not set")
             return
@@ -42,37 +192,21 @@ class MaterialIconProvider:
             logger.warning(f"Material Design Icons directory not found at {base_path}")
             return
 
-        for category in base_path.iterdir():
-            if not category.is_dir():
-                continue
-            self._available_icons[category.name] = []
-            for icon_dir in category.iterdir():
-                if icon_dir.is_dir():
-                    # Check if the icon actually exists with our style/size/resolution preferences
-                    icon_path = (
-                        icon_dir
-                        / self.style
-                        / self.size
-                        / self.resolution
-                        / f"baseline_{icon_dir.name}_black_24dp.png"
-                    )
-                    if icon_path.exists():
-                        self._available_icons[category.name].append(icon_dir.name)
-                        # Add the icon name and its variations to term mappings
-                        terms = self._extract_terms(icon_dir.name)
-                        for term in terms:
-                            if term not in self._term_to_icons:
-                                self._term_to_icons[term] = []
-                            self._term_to_icons[term].append(
-                                (category.name, icon_dir.name)
-                            )
-                        logger.debug(
-                            f"Found icon {icon_dir.name} in category {category.name}"
-                        )
-
-            if self._available_icons[category.name]:
-                icon_count = len(self._available_icons[category.name])
-                logger.info(f"Loaded {icon_count} icons from category {category.name}")
+        categories = sorted(c for c in base_path.iterdir() if c.is_dir())
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scanned = list(executor.map(self._scan_category, categories))
+
+        for category, icon_names in zip(categories, scanned):
+            self._icons_by_category[category.name] = icon_names
+            for icon_name in icon_names:
+                # Add the icon name and its variations to term mappings
+                for term in self._extract_terms(icon_name):
+                    if term not in self._term_index:
+                        self._term_index[term] = []
+                    self._term_index[term].append((category.name, icon_name))
+
+            if icon_names:
+                logger.info(f"Loaded {len(icon_names)} icons from category {category.name}")
             else:
                 logger.debug(f"No valid icons found in category {category.name}")
 
@@ -108,8 +242,90 @@ class MaterialIconProvider:
 
         return terms
 
+    def _build_ranked_index(self) -> None:
+        """Build the weighted inverted index used for ranked search.
+
+        Icon paths are resolved here once, from icons already known to exist, so
+        searches never touch the filesystem.
+        """
+        self._icon_entries = []
+        entry_ids: Dict[Tuple[str, str], int] = {}
+        for category, icon_names in self._icons_by_category.items():
+            for icon_name in icon_names:
+                entry_ids[(category, icon_name)] = len(self._icon_entries)
+                icon_path = self._icon_path(category, icon_name)
+                self._icon_entries.append((category, icon_name, str(icon_path)))
+
+        self._ranked_index = {}
+        for term, matches in self._term_index.items():
+            postings = []
+            for category, icon_name in matches:
+                entry_id = entry_ids.get((category, icon_name))
+                if entry_id is not None:
+                    postings.append((entry_id, self._match_weight(term, icon_name)))
+            if postings:
+                self._ranked_index[term] = postings
+
+    @staticmethod
+    def _match_weight(term: str, icon_name: str) -> float:
+        """Weight of an index term for an icon, by how the term was extracted."""
+        if term == icon_name:
+            return FULL_NAME_WEIGHT
+        if "_" in term:
+            return BIGRAM_WEIGHT
+        if term in icon_name.split("_"):
+            return WORD_WEIGHT
+        return VARIANT_WEIGHT
+
+    def search(self, term: str, limit: int = 5) -> List[Dict[str, str]]:
+        """Find the best matching icons for a term.
+
+        Candidates are scored by full-name, bigram and word matches of the
+        normalized term against the inverted index.
+
+        Args:
+            term: The term to search for
+            limit: Maximum number of candidates to return
+
+        Returns:
+            List of dicts with 'name', 'category' and 'path', best match first
+        """
+        if not self.is_available() or limit <= 0:
+            return []
+        self._ensure_index()
+
+        normalized_term = term.lower().replace(" ", "_").replace("-", "_")
+        words = [word for word in normalized_term.split("_") if word]
+        features = {normalized_term, *words}
+        features.update("_".join(words[i : i + 2]) for i in range(len(words) - 1))
+
+        scores: Dict[int, float] = {}
+        for feature in features:
+            for entry_id, weight in self._ranked_index.get(feature, ()):
+                scores[entry_id] = scores.get(entry_id, 0.0) + weight
+
+        entries = self._icon_entries
+        best = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (
+                -item[1],
+                entries[item[0]][1].count("_"),
+                entries[item[0]][1],
+                entries[item[0]][0],
+            ),
+        )
+        return [
+            {
+                "name": entries[entry_id][1],
+                "category": entries[entry_id][0],
+                "path": entries[entry_id][2],
+            }
+            for entry_id, _ in best
+        ]
+
     def get_icon_path(self, term: str) -> Optional[str]:
-        """Get the path to a Material Design icon."""
+        """Get the path to the best matching Material Design icon."""
         if not self.is_available():
             return None
 
@@ -120,43 +336,20 @@ class MaterialIconProvider:
             logger.debug(f"Found cached icon path for {term}")
             return self._icon_cache[term]
 
-        # Normalize the term
-        normalized_term = term.lower().replace(" ", "_").replace("-", "_")
-        logger.debug(f"Normalized term: {normalized_term}")
-
-        # Check term mappings
-        matches = self._term_to_icons.get(normalized_term, [])
+        matches = self.search(term, limit=1)
         if matches:
-            category, icon_name = matches[0]  # Use first match
-            icon_path = self._build_icon_path(category, icon_name)
-            if icon_path and icon_path.exists():
-                result = str(icon_path)
-                self._icon_cache[term] = result
-                logger.debug(f"Found icon match: {result}")
-                return result
-
-        # Try individual words if no direct match
-        words = normalized_term.split("_")
-        for word in words:
-            matches = self._term_to_icons.get(word, [])
-            if matches:
-                category, icon_name = matches[0]  # Use first match
-                icon_path = self._build_icon_path(category, icon_name)
-                if icon_path and icon_path.exists():
-                    result = str(icon_path)
-                    self._icon_cache[term] = result
-                    logger.debug(f"Found word match: {result}")
-                    return result
+            result = matches[0]["path"]
+            self._icon_cache[term] = result
+            logger.debug(f"Found icon match: {result}")
+            return result
 
         logger.debug(f"No Material Design icon found for {term}")
         return None
 
-    def _build_icon_path(self, category: str, icon_name: str) -> Optional[Path]:
-        """Build the full path to a Material Design icon."""
-        if not self.base_dir:
-            return None
-        icon_path = (
-            Path(self.base_dir)
+    def _icon_path(self, category: str, icon_name: str) -> Path:
+        """Path of an icon for the current style, size and resolution."""
+        return (
+            Path(self.base_dir or "")
             / "png"
             / category
             / icon_name
@@ -165,13 +358,22 @@ class MaterialIconProvider:
             / self.resolution
             / f"baseline_{icon_name}_black_24dp.png"
         )
+
+    def _build_icon_path(self, category: str, icon_name: str) -> Optional[Path]:
+        """Build the full path to a Material Design icon."""
+        if not self.base_dir:
+            return None
+        icon_path = self._icon_path(category, icon_name)
         return icon_path if icon_path.exists() else None
 
     def get_icon_data(self, icon_name: str) -> dict[str, Any]:
-        """Get icon data for a given icon name."""
+        """Get icon data for an icon name, optionally prefixed with its category."""
         if not self.base_dir:
             raise ValueError("Icon directory not set")
-        icon_path = self._build_icon_path(icon_name.split("/")[0], icon_name)
-        if not icon_path:
-            raise ValueError(f"Icon {icon_name} not found")
-        return {"path": str(icon_path), "name": icon_name}
+        self._ensure_index()
+        category, _, name = icon_name.rpartition("/")
+        for entry_id, weight in self._ranked_index.get(name, ()):
+            entry_category, entry_name, icon_path = self._icon_entries[entry_id]
+            if weight == FULL_NAME_WEIGHT and category in ("", entry_category):
+                return {"path": icon_path, "name": entry_name, "category": entry_category}
+        raise ValueError(f"Icon {icon_name} not found")
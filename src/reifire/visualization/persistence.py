@@ -0,0 +1,216 @@
+"""Helpers for persisting visualization data to disk."""
+
+import atexit
+import logging
+import os
+import sys
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+from typing import IO, Any, Callable, Optional, Tuple
+
+if sys.platform == "win32":  # pragma: no cover - Windows
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+FileSignature = Tuple[int, int, int]
+
+
+def file_signature(path: Path) -> Optional[FileSignature]:
+    """Get a cheap signature that changes whenever a file is rewritten.
+
+    Atomic writes replace the file, so the inode changes even when the
+    modification time is too coarse to tell two writes apart.
+
+    Args:
+        path: File to check
+
+    Returns:
+        (mtime_ns, size, inode) tuple, or None if the file does not exist
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write text to a file atomically.
+
+    The content is written to a temporary file in the same directory and then
+    renamed over the target, so readers never observe a partially written file.
+    Missing parent directories are created.
+
+    Args:
+        path: Destination file path
+        text: Text content to write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+            tmp_file.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class FileLock:
+    """Advisory lock shared between processes writing the same file.
+
+    The lock is held on a sidecar ".lock" file rather than on the data file,
+    because atomic writes replace the data file's inode. The lock is also
+    exclusive between threads of one process.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Initialize the lock.
+
+        Args:
+            path: Data file the lock protects
+        """
+        self.lock_path = path.with_name(path.name + ".lock")
+        self._thread_lock = threading.Lock()
+        self._file: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        try:
+            lock_file = open(self.lock_path, "a+b")
+            try:
+                _lock_file(lock_file)
+            except BaseException:
+                lock_file.close()
+                raise
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._file = lock_file
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        lock_file, self._file = self._file, None
+        try:
+            if lock_file is not None:
+                _unlock_file(lock_file)
+                lock_file.close()
+        finally:
+            self._thread_lock.release()
+
+
+def _lock_file(lock_file: IO[bytes]) -> None:
+    """Block until an exclusive lock on an open file is acquired."""
+    if sys.platform == "win32":  # pragma: no cover - Windows
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after about ten seconds; keep waiting
+                continue
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(lock_file: IO[bytes]) -> None:
+    """Release a lock taken by _lock_file."""
+    if sys.platform == "win32":  # pragma: no cover - Windows
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class WriteBehind:
+    """Coalesces changes and persists them in the background.
+
+    Owners call mark_dirty() after each in-memory change. The flush callback
+    runs once the flush interval has elapsed since the first unsaved change,
+    once max_pending changes have accumulated, on flush()/close(), or at
+    interpreter exit.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[], None],
+        interval: Optional[float] = 1.0,
+        max_pending: int = 100,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            flush: Callback that persists the owner's current state
+            interval: Seconds to wait before flushing unsaved changes. 0 writes
+                through on every change; None disables timed flushes
+            max_pending: Number of unsaved changes that triggers an immediate flush
+        """
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = 0
+        self._timer: Optional[threading.Timer] = None
+        self._state_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        _live_writers.add(self)
+
+    @property
+    def pending(self) -> int:
+        """Number of changes not yet flushed."""
+        return self._pending
+
+    def mark_dirty(self) -> None:
+        """Record an unsaved change and schedule a flush."""
+        with self._state_lock:
+            self._pending += 1
+            flush_now = self._closed or self.interval == 0 or self._pending >= self.max_pending
+            if not flush_now and self._timer is None and self.interval is not None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self) -> None:
+        """Persist unsaved changes now."""
+        with self._flush_lock:
+            with self._state_lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, 0
+            if not pending:
+                return
+            try:
+                self._flush()
+            except Exception:
+                logger.exception("Failed to flush %d pending changes", pending)
+                with self._state_lock:
+                    self._pending += pending
+
+    def close(self) -> None:
+        """Flush unsaved changes and stop scheduling timed flushes."""
+        with self._state_lock:
+            self._closed = True
+        self.flush()
+        _live_writers.discard(self)
+
+
+_live_writers: "weakref.WeakSet[WriteBehind]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_writers() -> None:
+    """Flush every open writer when the interpreter exits."""
+    for writer in list(_live_writers):
+        writer.flush()
@@ -1,11 +1,30 @@
 """Processor for converting JSON data into visualization components."""
 
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Any,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from dataclasses import dataclass, field
+from .color_swatch import ColorSwatchGenerator
 from .icon_manager import IconManager
 
+if TYPE_CHECKING:
+    from .component_store import ComponentStore, ConnectionStore
 
-@dataclass
+# Large documents create many records; drop their instance dicts where supported
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class VisualizationComponent:
     """Component in the visualization."""
 
@@ -19,7 +38,7 @@ class VisualizationComponent:
     properties: Dict[str, Any]
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class VisualizationConnection:
     """Connection between components in the visualization."""
 
@@ -29,8 +48,28 @@ class VisualizationConnection:
     properties: Dict[str, Any]
 
 
+@dataclass
+class _BuildContext:
+    """State of building the components of one document."""
+
+    components: Union[List[VisualizationComponent], "ComponentStore"] = field(
+        default_factory=list
+    )
+    connections: Union[List[VisualizationConnection], "ConnectionStore"] = field(
+        default_factory=list
+    )
+    current_y: float = 0  # Start at 0 for test compatibility
+    resolved_icons: Optional[Dict[str, Optional[str]]] = None
+
+
 class VisualizationProcessor:
-    """Processes JSON data into visualization components."""
+    """Processes JSON data into visualization components.
+
+    Processing is reentrant: each call builds into its own context, so one
+    processor can serve many threads. The components, connections and
+    current_y attributes expose the most recently finished document, or the
+    state used by the _add_* methods when called without a context.
+    """
 
     def __init__(self, icon_manager: Optional[IconManager] = None) -> None:
         """Initialize the visualization processor.
@@ -38,64 +77,194 @@ class VisualizationProcessor:
         Args:
             icon_manager: Optional IconManager instance for handling icons
         """
-        self.components: List[VisualizationComponent] = []
-        self.connections: List[VisualizationConnection] = []
-        self.current_y = 0  # Start at 0 for test compatibility
+        self._context = _BuildContext()
         self.spacing = 100
         self.x_offset = 250  # Increased horizontal spacing for better readability
         self.level_offset = 50  # Additional offset for nested components
         self.base_x = 50  # Base x position for the leftmost components
         self.icon_manager = icon_manager
 
+    @property
+    def components(self) -> List[VisualizationComponent]:
+        """Components of the most recently processed document."""
+        return self._context.components  # type: ignore[return-value]
+
+    @components.setter
+    def components(self, components: List[VisualizationComponent]) -> None:
+        self._context.components = components
+
+    @property
+    def connections(self) -> List[VisualizationConnection]:
+        """Connections of the most recently processed document."""
+        return self._context.connections  # type: ignore[return-value]
+
+    @connections.setter
+    def connections(self, connections: List[VisualizationConnection]) -> None:
+        self._context.connections = connections
+
+    @property
+    def current_y(self) -> float:
+        """Vertical position of the next component."""
+        return self._context.current_y
+
+    @current_y.setter
+    def current_y(self, current_y: float) -> None:
+        self._context.current_y = current_y
+
+    @staticmethod
+    def _iter_icon_items(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield every item of a document that becomes a component with an icon."""
+        yield data.get("object", {})
+        if "object" in data:
+            yield from data["object"].get("modifiers", [])
+        if "type" in data:
+            yield data["type"]
+        if "artifact" in data:
+            artifact = data["artifact"]
+            yield artifact
+            for attr in artifact.get("attributes", []):
+                yield attr
+                yield from attr.get("alternatives", [])
+            yield from artifact.get("relationships", [])
+
+    def collect_icon_terms(self, documents: Iterable[Dict[str, Any]]) -> List[str]:
+        """Collect the icon terms of one or more documents (phase one).
+
+        Args:
+            documents: Reified documents to scan
+
+        Returns:
+            Unique terms whose icons the documents need, in first-seen order
+        """
+        terms: Dict[str, None] = {}
+        for data in documents:
+            for item in self._iter_icon_items(data):
+                term = IconManager.icon_term(item)
+                if term:
+                    terms[term] = None
+        return list(terms)
+
+    def resolve_icons(self, documents: Iterable[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """Resolve every icon the documents need at once (phases one and two).
+
+        Args:
+            documents: Reified documents to scan
+
+        Returns:
+            Mapping of term to image, or an empty mapping without an icon manager
+        """
+        if not self.icon_manager:
+            return {}
+        return self.icon_manager.resolve_icons(self.collect_icon_terms(documents))
+
+    def process_batch(
+        self, documents: Sequence[Dict[str, Any]]
+    ) -> List[Tuple[List[VisualizationComponent], List[VisualizationConnection]]]:
+        """Process several documents, resolving their icons in a single pass.
+
+        Args:
+            documents: Reified documents to process
+
+        Returns:
+            Components and connections for each document, in order
+        """
+        resolved = self.resolve_icons(documents)
+        return [self.process_json(data, resolved=resolved) for data in documents]
+
     def process_json(
-        self, data: Dict[str, Any]
+        self, data: Dict[str, Any], resolved: Optional[Dict[str, Optional[str]]] = None
     ) -> Tuple[List[VisualizationComponent], List[VisualizationConnection]]:
-        """Process JSON data into visualization components and connections."""
-        self.components = []
-        self.connections = []
-        self.current_y = 0  # Reset to 0 for test compatibility
+        """Process JSON data into visualization components and connections.
+
+        Args:
+            data: Reified document
+            resolved: Icons already resolved with resolve_icons. If omitted,
+                the document's icons are resolved in one pass before processing
+        """
+        if resolved is None:
+            resolved = self.resolve_icons([data])
+        ctx = _BuildContext(resolved_icons=resolved)
+        self._build(data, ctx)
+        # Publish the finished document; assigning the context is atomic
+        self._context = ctx
+        return ctx.components, ctx.connections  # type: ignore[return-value]
+
+    def process_compact(
+        self, data: Dict[str, Any], resolved: Optional[Dict[str, Optional[str]]] = None
+    ) -> Tuple["ComponentStore", "ConnectionStore"]:
+        """Process JSON data into compact columnar stores.
+
+        Produces the same components and connections as process_json, stored
+        column-wise for very large documents. The results are not published
+        on the components and connections attributes.
+
+        Args:
+            data: Reified document
+            resolved: Icons already resolved with resolve_icons. If omitted,
+                the document's icons are resolved in one pass before processing
+
+        Returns:
+            Component and connection stores, indexable like lists
+        """
+        from .component_store import ComponentStore, ConnectionStore
+
+        if resolved is None:
+            resolved = self.resolve_icons([data])
+        components = ComponentStore()
+        connections = ConnectionStore()
+        self._build(data, _BuildContext(components, connections, resolved_icons=resolved))
+        return components, connections
 
+    def _build(self, data: Dict[str, Any], ctx: _BuildContext) -> None:
+        """Add the components and connections of a document to a context."""
         # Process main object
         main_id = self._add_object_component(
-            data.get("object", {}), "object", x_offset=self.base_x
+            data.get("object", {}), "object", x_offset=self.base_x, ctx=ctx
         )
 
         # Process modifiers if present
         if "object" in data and "modifiers" in data["object"]:
             for modifier in data["object"]["modifiers"]:
                 mod_id = self._add_modifier_component(
-                    modifier, x_offset=self.base_x + self.x_offset
+                    modifier, x_offset=self.base_x + self.x_offset, ctx=ctx
                 )
                 self._add_connection(
-                    main_id, mod_id, "modifier", modifier.get("properties", {})
+                    main_id, mod_id, "modifier", modifier.get("properties", {}), ctx=ctx
                 )
 
         # Process type
         if "type" in data:
             type_id = self._add_object_component(
-                data["type"], "type", x_offset=self.base_x + self.x_offset
+                data["type"], "type", x_offset=self.base_x + self.x_offset, ctx=ctx
             )
             self._add_connection(
-                main_id, type_id, "type", data["type"].get("properties", {})
+                main_id, type_id, "type", data["type"].get("properties", {}), ctx=ctx
             )
 
         # Process artifact
         if "artifact" in data:
             artifact_id = self._add_object_component(
-                data["artifact"], "artifact", x_offset=self.base_x + self.x_offset * 2
+                data["artifact"],
+                "artifact",
+                x_offset=self.base_x + self.x_offset * 2,
+                ctx=ctx,
             )
             self._add_connection(
-                main_id, artifact_id, "artifact", data["artifact"].get("properties", {})
+                main_id,
+                artifact_id,
+                "artifact",
+                data["artifact"].get("properties", {}),
+                ctx=ctx,
             )
 
             # Process attributes
             if "attributes" in data["artifact"]:
                 for attr in data["artifact"]["attributes"]:
                     attr_id = self._add_attribute_component(
-                        attr, x_offset=self.base_x + self.x_offset * 2
+                        attr, x_offset=self.base_x + self.x_offset * 2, ctx=ctx
                     )
                     self._add_connection(
-                        artifact_id, attr_id, "attribute", attr.get("properties", {})
+                        artifact_id, attr_id, "attribute", attr.get("properties", {}), ctx=ctx
                     )
 
                     # Process alternatives
@@ -105,35 +274,42 @@ class VisualizationProcessor:
                                 alt,
                                 is_alternative=True,
                                 x_offset=self.base_x + self.x_offset * 3,
+                                ctx=ctx,
                             )
                             self._add_connection(
                                 attr_id,
                                 alt_id,
                                 "alternative",
                                 alt.get("properties", {}),
+                                ctx=ctx,
                             )
 
             # Process relationships
             if "relationships" in data["artifact"]:
                 for rel in data["artifact"]["relationships"]:
-                    rel_id = self._add_relationship_component(rel)
+                    rel_id = self._add_relationship_component(rel, ctx=ctx)
                     # Add connections to source and target
                     if "source" in rel and "target" in rel:
-                        self._add_connection(rel["source"], rel_id, "source", {})
-                        self._add_connection(rel_id, rel["target"], "target", {})
-
-        return self.components, self.connections
+                        self._add_connection(rel["source"], rel_id, "source", {}, ctx=ctx)
+                        self._add_connection(rel_id, rel["target"], "target", {}, ctx=ctx)
 
     def _add_object_component(
-        self, obj: Dict[str, Any], type_name: str, x_offset: float = 0
+        self,
+        obj: Dict[str, Any],
+        type_name: str,
+        x_offset: float = 0,
+        ctx: Optional[_BuildContext] = None,
     ) -> str:
         """Add a component for an object."""
-        component_id = f"{type_name}_{len(self.components)}"
+        ctx = ctx or self._context
+        component_id = f"{type_name}_{len(ctx.components)}"
 
         # Get visualization properties using IconManager if available
         vis_props = {}
         if self.icon_manager:
-            vis_props = self.icon_manager.get_visualization_properties(obj)
+            vis_props = self.icon_manager.get_visualization_properties(
+                obj, ctx.resolved_icons
+            )
         elif "visualization" in obj:
             vis_props = obj.get("visualization", {})
         elif "icon" in obj:
@@ -145,7 +321,7 @@ class VisualizationProcessor:
             type=type_name,
             label=obj.get("name", type_name),
             x=x_offset,
-            y=self.current_y,
+            y=ctx.current_y,
             width=200,  # Increased width for better readability
             height=60,  # Increased height for better spacing
             properties={
@@ -166,20 +342,26 @@ class VisualizationProcessor:
             },
         )
 
-        self.components.append(component)
-        self.current_y += self.spacing
+        ctx.components.append(component)
+        ctx.current_y += self.spacing
         return component_id
 
     def _add_modifier_component(
-        self, modifier: Dict[str, Any], x_offset: float = 0
+        self,
+        modifier: Dict[str, Any],
+        x_offset: float = 0,
+        ctx: Optional[_BuildContext] = None,
     ) -> str:
         """Add a component for a modifier."""
-        component_id = f"mod_{len(self.components)}"
+        ctx = ctx or self._context
+        component_id = f"mod_{len(ctx.components)}"
 
         # Get visualization properties using IconManager if available
         vis_props = {}
         if self.icon_manager:
-            vis_props = self.icon_manager.get_visualization_properties(modifier)
+            vis_props = self.icon_manager.get_visualization_properties(
+                modifier, ctx.resolved_icons
+            )
         elif "visualization" in modifier:
             vis_props = modifier.get("visualization", {})
         elif "icon" in modifier:
@@ -199,7 +381,7 @@ class VisualizationProcessor:
             type="modifier",
             label=label,
             x=x_offset,
-            y=self.current_y,
+            y=ctx.current_y,
             width=180,
             height=50,
             properties={
@@ -213,20 +395,27 @@ class VisualizationProcessor:
             },
         )
 
-        self.components.append(component)
-        self.current_y += self.spacing
+        ctx.components.append(component)
+        ctx.current_y += self.spacing
         return component_id
 
     def _add_attribute_component(
-        self, attr: Dict[str, Any], is_alternative: bool = False, x_offset: float = 0
+        self,
+        attr: Dict[str, Any],
+        is_alternative: bool = False,
+        x_offset: float = 0,
+        ctx: Optional[_BuildContext] = None,
     ) -> str:
         """Add a component for an attribute."""
-        component_id = f"attr_{len(self.components)}"
+        ctx = ctx or self._context
+        component_id = f"attr_{len(ctx.components)}"
 
         # Get visualization properties using IconManager if available
         vis_props = {}
         if self.icon_manager:
-            vis_props = self.icon_manager.get_visualization_properties(attr)
+            vis_props = self.icon_manager.get_visualization_properties(
+                attr, ctx.resolved_icons
+            )
         elif "visualization" in attr:
             vis_props = attr.get("visualization", {})
         elif "icon" in attr:
@@ -246,7 +435,7 @@ class VisualizationProcessor:
             type="alternative" if is_alternative else "attribute",
             label=label,
             x=x_offset,
-            y=self.current_y,
+            y=ctx.current_y,
             width=180,
             height=50,
             properties={
@@ -260,52 +449,61 @@ class VisualizationProcessor:
             },
         )
 
-        self.components.append(component)
-        self.current_y += self.spacing
+        ctx.components.append(component)
+        ctx.current_y += self.spacing
 
         # Special handling for color scheme attributes
         if attr.get("name") == "color scheme" and "visualization" in attr:
             vis = attr["visualization"]
             if vis.get("source") == "colors" and vis.get("name"):
                 colors = vis["name"].split("-")
+                images = vis_props.get("images") or []
                 # Create individual color nodes
-                for color in colors:
-                    color_id = f"color_{len(self.components)}"
+                for index, color in enumerate(colors):
+                    if not images:
+                        color_images = None
+                    elif len(images) == len(colors):
+                        color_images = [images[index]]
+                    else:
+                        # The scheme was rendered as one combined swatch
+                        color_images = ColorSwatchGenerator.swatch_data_uris([color])
+                    color_id = f"color_{len(ctx.components)}"
                     color_component = VisualizationComponent(
                         id=color_id,
                         type="color",
                         label=color,
                         x=x_offset + self.x_offset,
-                        y=self.current_y,
+                        y=ctx.current_y,
                         width=120,
                         height=50,
                         properties={
                             "visualization": {
                                 "source": "colors",
                                 "name": color,
-                                "images": (
-                                    [vis_props.get("images", [])[colors.index(color)]]
-                                    if vis_props.get("images")
-                                    else None
-                                ),
+                                "images": color_images,
                             }
                         },
                     )
-                    self.components.append(color_component)
+                    ctx.components.append(color_component)
                     # Add composition connection
-                    self._add_connection(component_id, color_id, "composition", {})
-                    self.current_y += self.spacing
+                    self._add_connection(component_id, color_id, "composition", {}, ctx=ctx)
+                    ctx.current_y += self.spacing
 
         return component_id
 
-    def _add_relationship_component(self, rel: Dict[str, Any]) -> str:
+    def _add_relationship_component(
+        self, rel: Dict[str, Any], ctx: Optional[_BuildContext] = None
+    ) -> str:
         """Add a component for a relationship."""
-        component_id = f"rel_{len(self.components)}"
+        ctx = ctx or self._context
+        component_id = f"rel_{len(ctx.components)}"
 
         # Get visualization properties using IconManager if available
         vis_props = {}
         if self.icon_manager:
-            vis_props = self.icon_manager.get_visualization_properties(rel)
+            vis_props = self.icon_manager.get_visualization_properties(
+                rel, ctx.resolved_icons
+            )
         elif "visualization" in rel:
             vis_props = rel.get("visualization", {})
         elif "icon" in rel:
@@ -323,7 +521,7 @@ class VisualizationProcessor:
             label=label,
             x=self.base_x
             + self.x_offset * 2,  # Position relationships at same level as artifacts
-            y=self.current_y,
+            y=ctx.current_y,
             width=180,
             height=50,
             properties={
@@ -336,8 +534,8 @@ class VisualizationProcessor:
             },
         )
 
-        self.components.append(component)
-        self.current_y += self.spacing
+        ctx.components.append(component)
+        ctx.current_y += self.spacing
         return component_id
 
     def _add_connection(
@@ -346,8 +544,10 @@ class VisualizationProcessor:
         target_id: str,
         connection_type: str,
         properties: Optional[Dict[str, Any]] = None,
+        ctx: Optional[_BuildContext] = None,
     ) -> None:
         """Add a connection between components."""
+        ctx = ctx or self._context
         if properties is None:
             properties = {}
 
@@ -357,4 +557,4 @@ class VisualizationProcessor:
             type=connection_type,
             properties=properties,
         )
-        self.connections.append(connection)
+        ctx.connections.append(connection)
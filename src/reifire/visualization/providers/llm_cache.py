@@ -0,0 +1,304 @@
+"""Single-file SQLite store for LLM-generated icons."""
+
+import atexit
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Seconds between writes of the last-used times of looked up icons
+DEFAULT_TOUCH_INTERVAL = 60.0
+
+# Icons cached before the SQLite store were one "<id>.json" file per term
+_LEGACY_FILE = re.compile(r"^[0-9a-f]{16}\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS icons (
+    id TEXT PRIMARY KEY,
+    term TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS icons_last_used ON icons (last_used);
+CREATE TABLE IF NOT EXISTS stats (total_size INTEGER NOT NULL);
+INSERT INTO stats (total_size) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM stats);
+CREATE TRIGGER IF NOT EXISTS icons_insert AFTER INSERT ON icons BEGIN
+    UPDATE stats SET total_size = total_size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS icons_update AFTER UPDATE OF size ON icons BEGIN
+    UPDATE stats SET total_size = total_size + NEW.size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS icons_delete AFTER DELETE ON icons BEGIN
+    UPDATE stats SET total_size = total_size - OLD.size;
+END;
+"""
+
+
+class LLMIconCache:
+    """Stores generated icons in one SQLite file keyed by (term, model, prompt version).
+
+    The least recently used icons are evicted once the stored entries exceed
+    max_bytes. Lookups only read the database: the times icons were last used
+    are kept in memory and written in one transaction every touch_interval
+    seconds, before evicting and exporting, and on close. Icons can be
+    exported to and imported from JSON lines files to warm the cache on new
+    hosts. Pending last-used times of caches still open are written when the
+    interpreter exits.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        touch_interval: float = DEFAULT_TOUCH_INTERVAL,
+    ) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite database file
+            max_bytes: Maximum total size of stored entries, or None for no limit
+            touch_interval: Seconds between writes of pending last-used times
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._touched: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._closed = False
+        _live_caches.add(self)
+
+    @staticmethod
+    def make_id(term: str, model: str, prompt_version: str) -> str:
+        """Generate the stable identifier for a cache key."""
+        key = "\0".join([term.lower(), model, prompt_version])
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def get(self, term: str, model: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Look up the icon generated for a term by a model and prompt version."""
+        return self.get_by_id(self.make_id(term, model, prompt_version))
+
+    def get_by_id(self, icon_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an icon by its identifier."""
+        with self._lock:
+            row = self._conn.execute("SELECT entry FROM icons WHERE id = ?", (icon_id,)).fetchone()
+            if row is None:
+                return None
+            self._touched[icon_id] = time.time()
+            if time.monotonic() - self._last_flush >= self.touch_interval:
+                self._flush_touched()
+                self._conn.commit()
+        try:
+            entry: Dict[str, Any] = json.loads(row[0])
+            return entry
+        except json.JSONDecodeError:
+            logger.warning("Ignoring corrupt LLM icon cache entry '%s'", icon_id)
+            return None
+
+    def put(self, term: str, model: str, prompt_version: str, entry: Dict[str, Any]) -> str:
+        """Store an icon, evicting the least recently used icons if over budget.
+
+        Returns:
+            The identifier of the stored icon
+        """
+        icon_id = self.make_id(term, model, prompt_version)
+        self._write([(icon_id, term, model, prompt_version, entry)])
+        return icon_id
+
+    def _write(self, records: List[Tuple[str, str, str, str, Dict[str, Any]]]) -> None:
+        """Store (id, term, model, prompt version, entry) records in one transaction."""
+        now = time.time()
+        rows = []
+        for icon_id, term, model, prompt_version, entry in records:
+            payload = json.dumps(entry)
+            rows.append((icon_id, term.lower(), model, prompt_version, payload, len(payload), now))
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO icons (id, term, model, prompt_version, entry, size, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        entry = excluded.entry, size = excluded.size, last_used = excluded.last_used
+                    """,
+                    rows,
+                )
+                # A pending touch is older than the write and would undo its last_used
+                for row in rows:
+                    self._touched.pop(row[0], None)
+                self._evict()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def flush(self) -> None:
+        """Write the pending last-used times to the database."""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Write the pending last-used times; the caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE icons SET last_used = ? WHERE id = ?",
+                [(last_used, icon_id) for icon_id, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def _evict(self) -> None:
+        """Delete least recently used icons until the store fits in max_bytes."""
+        if self.max_bytes is None:
+            return
+        excess = self._total_size() - self.max_bytes
+        if excess <= 0:
+            return
+        self._flush_touched()
+        victims = []
+        freed = 0
+        for icon_id, size in self._conn.execute("SELECT id, size FROM icons ORDER BY last_used"):
+            victims.append((icon_id,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM icons WHERE id = ?", victims)
+        logger.debug("Evicted %d LLM icons (%d bytes) from cache", len(victims), freed)
+
+    def _total_size(self) -> int:
+        row = self._conn.execute("SELECT total_size FROM stats").fetchone()
+        return int(row[0])
+
+    @property
+    def total_size(self) -> int:
+        """Total size in bytes of the stored entries."""
+        with self._lock:
+            return self._total_size()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM icons").fetchone()[0])
+
+    def export(self, path: Path) -> int:
+        """Export all icons to a JSON lines file.
+
+        Returns:
+            Number of icons exported
+        """
+        count = 0
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT id, term, model, prompt_version, entry FROM icons ORDER BY last_used"
+            ).fetchall()
+        with path.open("w", encoding="utf-8") as export_file:
+            for icon_id, term, model, prompt_version, entry in rows:
+                record = {
+                    "id": icon_id,
+                    "term": term,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "entry": json.loads(entry),
+                }
+                export_file.write(json.dumps(record) + "\n")
+                count += 1
+        return count
+
+    def import_file(self, path: Path) -> int:
+        """Import icons from a JSON lines file written by export, in one transaction.
+
+        Returns:
+            Number of icons imported
+        """
+        records = []
+        with path.open(encoding="utf-8") as import_file:
+            for line in import_file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                term, model, version = record["term"], record["model"], record["prompt_version"]
+                # Exports list ids so that icons imported from legacy files keep theirs
+                icon_id = record.get("id") or self.make_id(term, model, version)
+                records.append((icon_id, term, model, version, record["entry"]))
+        self._write(records)
+        return len(records)
+
+    def import_legacy(self, directory: Path) -> int:
+        """Move icons from the per-term JSON files of older versions into the store.
+
+        The files carry no model or prompt version, so their icons are only
+        found by their old identifiers, which registries may still hold. The
+        files are deleted once imported.
+
+        Args:
+            directory: Directory holding the legacy "<id>.json" files
+
+        Returns:
+            Number of icons imported
+        """
+        if not directory.is_dir():
+            return 0
+        records = []
+        imported = []
+        for path in directory.iterdir():
+            if not _LEGACY_FILE.match(path.name):
+                continue
+            try:
+                entry = json.loads(path.read_text())
+            except (json.JSONDecodeError, OSError):
+                logger.warning("Skipping unreadable legacy LLM icon '%s'", path)
+                continue
+            if isinstance(entry, dict):
+                records.append((path.stem, "", "", "", entry))
+                imported.append(path)
+        if not records:
+            return 0
+        self._write(records)
+        for path in imported:
+            try:
+                path.unlink()
+            except OSError:
+                logger.warning("Failed to remove imported legacy LLM icon '%s'", path)
+        logger.info("Imported %d legacy LLM icons from %s", len(records), directory)
+        return len(records)
+
+    def close(self) -> None:
+        """Write pending last-used times and close the database connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+        _live_caches.discard(self)
+
+
+_live_caches: "weakref.WeakSet[LLMIconCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_caches() -> None:
+    """Write the pending last-used times of every open cache when the interpreter exits."""
+    for cache in list(_live_caches):
+        cache.close()
@@ -1,15 +1,26 @@
 """LLM-powered SVG icon generation provider using Pydantic AI."""
 
-import hashlib
-import json
+import asyncio
 import logging
+import sqlite3
+import threading
+from concurrent.futures import Future
+import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .llm_cache import DEFAULT_MAX_BYTES, LLMIconCache
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CACHE_DIR = Path.home() / ".reifire" / "llm_icons"
 
+# Bump when the prompts change so icons generated under old prompts are not reused
+PROMPT_VERSION = "1"
+
 SVG_SYSTEM_PROMPT = """\
 You are an icon designer. Generate clean, simple SVG icons suitable for use as UI icons.
 
@@ -23,6 +34,14 @@ Rules:
 - No XML declaration or doctype — just the <svg> element
 """
 
+BATCH_PROMPT_SUFFIX = """
+When asked for several concepts, return one icon per concept and copy each
+concept into the icon's `term` field exactly as given.
+"""
+
+# Elements a generated SVG may contain, per the rules in SVG_SYSTEM_PROMPT
+ALLOWED_SVG_ELEMENTS = {"svg", "path", "circle", "rect", "line", "polyline", "polygon"}
+
 
 class LLMSVGProvider:
     """Generate SVG icons on demand using an LLM via Pydantic AI.
@@ -33,25 +52,44 @@ class LLMSVGProvider:
     Usage:
         provider = LLMSVGProvider(model="anthropic:claude-haiku-4-5-20251001")
         results = provider.search("database")
+        batched = provider.search_many(["database", "server", "network"])
     """
 
     def __init__(
         self,
-        model: Optional[str] = None,
+        model: Optional[Union[str, Any]] = None,
         cache_dir: Optional[Path] = None,
+        batch_size: int = 8,
+        max_concurrency: int = 4,
+        cache_max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
     ) -> None:
         """Initialize the LLM SVG provider.
 
         Args:
             model: Pydantic AI model string (e.g. "anthropic:claude-haiku-4-5-20251001",
-                   "openai:gpt-4o-mini"). If None, uses pydantic-ai default.
+                   "openai:gpt-4o-mini") or model instance. If None, uses pydantic-ai default.
             cache_dir: Directory for caching generated SVGs. Defaults to ~/.reifire/llm_icons/
+            batch_size: Maximum number of icons requested in one batched LLM call
+            max_concurrency: Maximum number of batched LLM calls in flight at once
+            cache_max_bytes: Size budget of the icon cache before least recently used
+                icons are evicted, or None for no limit
         """
         self._model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
         self._cache_dir = cache_dir or DEFAULT_CACHE_DIR
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
-        self._agent = None
+        self._cache = LLMIconCache(self._cache_dir / "icons.sqlite3", max_bytes=cache_max_bytes)
+        try:
+            # Keep resolving "llm/<id>" identifiers stored before the SQLite cache
+            self._cache.import_legacy(self._cache_dir)
+        except (sqlite3.Error, OSError):
+            logger.warning("Failed to import legacy LLM icons from %s", self._cache_dir)
+        self._agent: Optional["Agent[Any, Any]"] = None
+        self._batch_agent: Optional["Agent[Any, Any]"] = None
         self._pydantic_ai_available = self._check_pydantic_ai()
+        # Generations in progress, keyed by (term, model), shared by concurrent callers
+        self._inflight: Dict[Tuple[str, str], "Future[List[Dict[str, Any]]]"] = {}
+        self._inflight_lock = threading.Lock()
 
     def _check_pydantic_ai(self) -> bool:
         """Check if pydantic-ai is installed and set up the agent."""
@@ -64,6 +102,12 @@ class LLMSVGProvider:
                 name: str
                 tags: list[str]
 
+            class BatchGeneratedIcon(GeneratedIcon):
+                term: str
+
+            class GeneratedIconBatch(BaseModel):
+                icons: list[BatchGeneratedIcon]
+
             self._generated_icon_cls = GeneratedIcon
             agent_kwargs: Dict[str, Any] = {
                 "system_prompt": SVG_SYSTEM_PROMPT,
@@ -73,6 +117,13 @@ class LLMSVGProvider:
                 agent_kwargs["model"] = self._model
 
             self._agent = Agent(**agent_kwargs)
+            self._batch_agent = Agent(
+                **{
+                    **agent_kwargs,
+                    "system_prompt": SVG_SYSTEM_PROMPT + BATCH_PROMPT_SUFFIX,
+                    "output_type": GeneratedIconBatch,
+                }
+            )
             return True
         except ImportError:
             logger.debug("pydantic-ai not installed — LLM SVG provider unavailable")
@@ -90,27 +141,39 @@ class LLMSVGProvider:
         return self._pydantic_ai_available and self._agent is not None
 
     def _cache_key(self, term: str) -> str:
-        """Generate a filesystem-safe cache key for a term."""
-        return hashlib.sha256(term.lower().encode()).hexdigest()[:16]
+        """Generate the cache key for a term under the current model and prompt."""
+        return LLMIconCache.make_id(term, self.model_name, PROMPT_VERSION)
 
     def _get_cached(self, term: str) -> Optional[Dict[str, Any]]:
         """Look up a cached icon."""
-        cache_file = self._cache_dir / f"{self._cache_key(term)}.json"
-        if cache_file.exists():
-            try:
-                return json.loads(cache_file.read_text())
-            except (json.JSONDecodeError, OSError):
-                return None
-        return None
+        try:
+            return self._cache.get(term, self.model_name, PROMPT_VERSION)
+        except sqlite3.Error:
+            logger.warning("Failed to read cached LLM icon for '%s'", term)
+            return None
 
     def _save_cache(self, term: str, result: Dict[str, Any]) -> None:
         """Save a generated icon to cache."""
-        cache_file = self._cache_dir / f"{self._cache_key(term)}.json"
         try:
-            cache_file.write_text(json.dumps(result))
-        except OSError:
+            self._cache.put(term, self.model_name, PROMPT_VERSION, result)
+        except sqlite3.Error:
             logger.warning("Failed to cache LLM icon for '%s'", term)
 
+    @property
+    def cache(self) -> LLMIconCache:
+        """The icon cache, e.g. for export and import when warming new hosts."""
+        return self._cache
+
+    def close(self) -> None:
+        """Write pending cache updates and close the icon cache."""
+        self._cache.close()
+
+    def __enter__(self) -> "LLMSVGProvider":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
     def _svg_to_data_uri(self, svg: str) -> str:
         """Convert SVG string to a data URI."""
         import base64
@@ -118,8 +181,115 @@ class LLMSVGProvider:
         b64 = base64.b64encode(svg.encode()).decode()
         return f"data:image/svg+xml;base64,{b64}"
 
+    @property
+    def model_name(self) -> str:
+        """Name of the configured model, used to key shared generations."""
+        if self._model is None:
+            return ""
+        if isinstance(self._model, str):
+            return self._model
+        return str(getattr(self._model, "model_name", type(self._model).__name__))
+
+    def _flight_key(self, term: str) -> Tuple[str, str]:
+        """Key identifying a generation that concurrent callers can share."""
+        return (term.lower(), self.model_name)
+
+    def _claim(self, term: str) -> Tuple["Future[List[Dict[str, Any]]]", bool]:
+        """Join the in-flight generation for a term, or become its leader.
+
+        Returns:
+            The shared future and whether the caller must run the generation
+        """
+        key = self._flight_key(term)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _release(
+        self, term: str, future: "Future[List[Dict[str, Any]]]", results: List[Dict[str, Any]]
+    ) -> None:
+        """Publish a generation's results to waiting callers."""
+        with self._inflight_lock:
+            self._inflight.pop(self._flight_key(term), None)
+        future.set_result(results)
+
+    def _prompt(self, term: str) -> str:
+        return f"Generate a simple icon for the concept: {term}"
+
+    def _batch_prompt(self, terms: List[str]) -> str:
+        concepts = "\n".join(f"- {term}" for term in terms)
+        return f"Generate a simple icon for each of these concepts:\n{concepts}"
+
+    @staticmethod
+    def _validate_svg(svg: str) -> None:
+        """Check that generated SVG markup follows the icon rules.
+
+        Raises:
+            ValueError: If the SVG is malformed or uses disallowed elements or attributes
+        """
+        try:
+            root = ET.fromstring(svg)
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid SVG markup: {e}") from e
+        for element in root.iter():
+            tag = element.tag.rpartition("}")[2]
+            if tag not in ALLOWED_SVG_ELEMENTS:
+                raise ValueError(f"Disallowed SVG element <{tag}>")
+            if any(attr.lower().startswith("on") for attr in element.attrib):
+                raise ValueError(f"Disallowed event handler on SVG element <{tag}>")
+        if root.tag.rpartition("}")[2] != "svg":
+            raise ValueError("Generated markup is not an <svg> element")
+
+    def _build_entry(self, term: str, icon_data: Any) -> Dict[str, Any]:
+        """Build a search result from the model output and cache it."""
+        self._validate_svg(icon_data.svg)
+        entry = {
+            "id": f"llm/{self._cache_key(term)}",
+            "name": icon_data.name,
+            "source": self.name,
+            "image": self._svg_to_data_uri(icon_data.svg),
+            "tags": icon_data.tags,
+        }
+        self._save_cache(term, entry)
+        return entry
+
+    def _generate(self, term: str) -> List[Dict[str, Any]]:
+        """Generate an icon via the LLM, unless a concurrent call already has."""
+        cached = self._get_cached(term)
+        if cached:
+            return [cached]
+        if self._agent is None:
+            return []
+        try:
+            result = self._agent.run_sync(self._prompt(term))
+            return [self._build_entry(term, result.output)]
+        except Exception:
+            logger.exception("LLM SVG generation failed for '%s'", term)
+            return []
+
+    async def _agenerate(self, term: str) -> List[Dict[str, Any]]:
+        """Async variant of _generate."""
+        cached = self._get_cached(term)
+        if cached:
+            return [cached]
+        if self._agent is None:
+            return []
+        try:
+            result = await self._agent.run(self._prompt(term))
+            return [self._build_entry(term, result.output)]
+        except Exception:
+            logger.exception("LLM SVG generation failed for '%s'", term)
+            return []
+
     def search(self, term: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Generate an SVG icon for the given term."""
+        """Generate an SVG icon for the given term.
+
+        Concurrent calls for the same uncached term wait on a single generation.
+        """
         if not self.is_available():
             return []
 
@@ -129,35 +299,154 @@ class LLMSVGProvider:
             logger.debug("Cache hit for LLM icon '%s'", term)
             return [cached]
 
-        # Generate via LLM
+        future, is_leader = self._claim(term)
+        if not is_leader:
+            logger.debug("Waiting on in-flight LLM generation for '%s'", term)
+            return list(future.result())
+
+        results: List[Dict[str, Any]] = []
         try:
-            result = self._agent.run_sync(
-                f"Generate a simple icon for the concept: {term}"
-            )
-            icon_data = result.output
-
-            entry = {
-                "id": f"llm/{self._cache_key(term)}",
-                "name": icon_data.name,
-                "source": self.name,
-                "image": self._svg_to_data_uri(icon_data.svg),
-                "tags": icon_data.tags,
-            }
-            self._save_cache(term, entry)
-            return [entry]
-        except Exception:
-            logger.exception("LLM SVG generation failed for '%s'", term)
+            results = self._generate(term)
+        finally:
+            self._release(term, future, results)
+        return list(results)
+
+    async def asearch(self, term: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Async variant of search, sharing in-flight generations with threads."""
+        if not self.is_available():
             return []
 
+        cached = self._get_cached(term)
+        if cached:
+            logger.debug("Cache hit for LLM icon '%s'", term)
+            return [cached]
+
+        future, is_leader = self._claim(term)
+        if not is_leader:
+            logger.debug("Waiting on in-flight LLM generation for '%s'", term)
+            shared: List[Dict[str, Any]] = await asyncio.wrap_future(future)
+            return list(shared)
+
+        results: List[Dict[str, Any]] = []
+        try:
+            results = await self._agenerate(term)
+        finally:
+            self._release(term, future, results)
+        return list(results)
+
+    def search_many(
+        self,
+        terms: Iterable[str],
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Generate icons for many terms using batched LLM calls.
+
+        Must not be called from a running event loop; use asearch_many there.
+
+        Args:
+            terms: Terms to generate icons for
+            batch_size: Icons per LLM call. Defaults to the provider's batch_size
+            max_concurrency: Concurrent LLM calls. Defaults to the provider's max_concurrency
+
+        Returns:
+            Mapping of each term to its search results (empty if generation failed)
+        """
+        return asyncio.run(self.asearch_many(terms, batch_size, max_concurrency))
+
+    async def asearch_many(
+        self,
+        terms: Iterable[str],
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Async variant of search_many.
+
+        Cached terms are returned directly and terms already being generated by
+        another caller are awaited. The remaining terms are split into batches,
+        each requested in one structured-output call, with at most
+        max_concurrency calls running at once. Each returned SVG is validated on
+        its own, so one bad icon does not discard the rest of its batch.
+        """
+        unique_terms = list(dict.fromkeys(terms))
+        results: Dict[str, List[Dict[str, Any]]] = {term: [] for term in unique_terms}
+        if not self.is_available():
+            return results
+
+        waiting: Dict[str, "Future[List[Dict[str, Any]]]"] = {}
+        claimed: Dict[str, "Future[List[Dict[str, Any]]]"] = {}
+        try:
+            for term in unique_terms:
+                cached = self._get_cached(term)
+                if cached:
+                    results[term] = [cached]
+                    continue
+                future, is_leader = self._claim(term)
+                if is_leader:
+                    claimed[term] = future
+                else:
+                    waiting[term] = future
+
+            size = max(1, batch_size or self.batch_size)
+            pending = list(claimed)
+            batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+            semaphore = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+
+            async def run_batch(batch: List[str]) -> None:
+                generated: Dict[str, List[Dict[str, Any]]] = {}
+                try:
+                    async with semaphore:
+                        generated = await self._agenerate_batch(batch)
+                finally:
+                    for term in batch:
+                        results[term] = generated.get(term, [])
+                        self._release(term, claimed[term], results[term])
+
+            await asyncio.gather(*(run_batch(batch) for batch in batches))
+        finally:
+            # Batches cancelled before they started never release their terms;
+            # fail them like any other generation so waiters are not stranded
+            for term, future in claimed.items():
+                if not future.done():
+                    self._release(term, future, [])
+
+        for term, future in waiting.items():
+            shared: List[Dict[str, Any]] = await asyncio.wrap_future(future)
+            results[term] = list(shared)
+        return results
+
+    async def _agenerate_batch(self, terms: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Generate icons for several terms in one LLM call."""
+        generated: Dict[str, List[Dict[str, Any]]] = {}
+        if self._batch_agent is None:
+            return generated
+        try:
+            result = await self._batch_agent.run(self._batch_prompt(terms))
+        except Exception:
+            logger.exception("Batched LLM SVG generation failed for %d terms", len(terms))
+            return generated
+
+        by_term = {term.lower(): term for term in terms}
+        for icon_data in result.output.icons:
+            term = by_term.get(icon_data.term.lower())
+            if term is None or term in generated:
+                continue
+            try:
+                generated[term] = [self._build_entry(term, icon_data)]
+            except ValueError as e:
+                logger.warning("Discarding generated icon for '%s': %s", term, e)
+
+        missing = [term for term in terms if term not in generated]
+        if missing:
+            logger.warning("Batched LLM SVG generation returned no icon for %s", missing)
+        return generated
+
     def get_icon(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Get a cached LLM-generated icon by identifier."""
-        # Identifier format: "llm/{hash}" — extract hash and look up cache
+        # Identifier format: "llm/{id}" — look up the cache entry directly
         if identifier.startswith("llm/"):
-            cache_hash = identifier[4:]
-            cache_file = self._cache_dir / f"{cache_hash}.json"
-            if cache_file.exists():
-                try:
-                    return json.loads(cache_file.read_text())
-                except (json.JSONDecodeError, OSError):
-                    pass
+            try:
+                return self._cache.get_by_id(identifier[4:])
+            except sqlite3.Error:
+                logger.warning("Failed to read cached LLM icon '%s'", identifier)
         return None
@@ -15,6 +15,7 @@ class MaterialIconProviderAdapter:
 
     def __init__(self) -> None:
         self._provider = MaterialIconProvider()
+        self._data_uri_cache: Dict[str, str] = {}
 
     @property
     def name(self) -> str:
@@ -29,30 +30,35 @@ class MaterialIconProviderAdapter:
 
     def _path_to_data_uri(self, icon_path: str) -> str:
         """Convert a local file path to a data URI."""
+        if icon_path in self._data_uri_cache:
+            return self._data_uri_cache[icon_path]
         path = Path(icon_path)
-        if not path.exists():
+        try:
+            content = path.read_bytes()
+        except OSError:
             return icon_path
-        content = path.read_bytes()
         b64 = base64.b64encode(content).decode()
         suffix = path.suffix.lstrip(".")
         mime = f"image/{suffix}" if suffix != "svg" else "image/svg+xml"
-        return f"data:{mime};base64,{b64}"
+        data_uri = f"data:{mime};base64,{b64}"
+        self._data_uri_cache[icon_path] = data_uri
+        return data_uri
 
     def search(self, term: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Search Material Design Icons for a term."""
+        """Search Material Design Icons for a term, best matches first."""
         if not self.is_available():
             return []
 
-        icon_path = self._provider.get_icon_path(term)
-        if not icon_path:
-            return []
-
-        return [{
-            "id": term,
-            "name": term,
-            "source": self.name,
-            "image": self._path_to_data_uri(icon_path),
-        }]
+        return [
+            {
+                "id": f"{match['category']}/{match['name']}",
+                "name": match["name"],
+                "source": self.name,
+                "image": self._path_to_data_uri(match["path"]),
+                "tags": [match["category"]],
+            }
+            for match in self._provider.search(term, limit)
+        ]
 
     def get_icon(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Get a Material Design icon by name."""
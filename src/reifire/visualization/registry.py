@@ -1,8 +1,16 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, MutableMapping, Optional, Any, Set, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError, as_completed
 from pathlib import Path
 import json
+import logging
+import threading
+from .persistence import FileLock, FileSignature, WriteBehind, atomic_write_text, file_signature
+from .sqlite_store import SQLiteMapping
 from .suggestions import IconSuggester
 
+logger = logging.getLogger(__name__)
+
 
 class IconRegistry:
     """Manages icon associations and metadata for reified concepts."""
@@ -12,35 +20,146 @@ class IconRegistry:
         provider_chain: Optional[Any] = None,
         registry_path: Optional[Path] = None,
         suggester: Optional[IconSuggester] = None,
+        flush_interval: Optional[float] = 1.0,
+        flush_threshold: int = 100,
+        backend: str = "json",
+        payload_cache_size: int = 256,
+        search_workers: int = 4,
     ) -> None:
         """Initialize the registry.
 
+        With the "json" backend, associations are kept in memory and written
+        behind: the registry file is rewritten once per flush_interval, after
+        flush_threshold changes, on flush()/close(), or at interpreter exit.
+        Writes hold an advisory lock on the registry file and merge this
+        registry's changes into whatever other processes have written, and
+        lookups reload the file only when its signature has changed.
+        With the "sqlite" backend, associations and usage statistics live in a
+        shared SQLite database and each change is written as it happens.
+
         Args:
             provider_chain: ProviderChain for fetching icons. If None, creates a default chain.
-            registry_path: Path to store registry data (defaults to ~/.reifire/icon_registry.json)
+            registry_path: Path to store registry data (defaults to
+                ~/.reifire/icon_registry.json, or icon_registry.sqlite3 for sqlite)
             suggester: Suggestion engine for intelligent suggestions
+            flush_interval: Seconds before unsaved changes are written. 0 writes on
+                every change; None only writes on threshold, flush or close
+            flush_threshold: Number of unsaved changes that triggers a write
+            backend: Storage backend, "json" or "sqlite"
+            payload_cache_size: Maximum number of resolved icon payloads kept in
+                memory for get_icon. 0 disables the cache
+            search_workers: Maximum number of concurrent provider searches when
+                suggesting icons
         """
+        if backend not in ("json", "sqlite"):
+            raise ValueError(f"Unknown registry backend: {backend}")
+        self.backend = backend
         if provider_chain is None:
             from .providers.chain import ProviderChain
 
             provider_chain = ProviderChain()
         self.provider_chain = provider_chain
-        self.registry_path = (
-            registry_path or Path.home() / ".reifire" / "icon_registry.json"
-        )
+        default_name = "icon_registry.sqlite3" if backend == "sqlite" else "icon_registry.json"
+        self.registry_path = registry_path or Path.home() / ".reifire" / default_name
         self.registry_path.parent.mkdir(parents=True, exist_ok=True)
-        self.suggester = suggester or IconSuggester()
+        self._owns_suggester = suggester is None
+        self.suggester = suggester or IconSuggester(
+            # The sqlite backend keeps usage statistics in the registry database
+            usage_data_path=self.registry_path if backend == "sqlite" else None,
+            flush_interval=flush_interval,
+            flush_threshold=flush_threshold,
+            backend=backend,
+        )
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.registry_path)
+        self._signature: Optional[FileSignature] = None
+        self._dirty_terms: Set[str] = set()
+        self.payload_cache_size = payload_cache_size
+        self.search_workers = search_workers
+        self._search_executor: Optional[ThreadPoolExecutor] = None
+        # term -> ((icon_id, source, version), payload), least recently used first
+        self._payload_cache: "OrderedDict[str, Tuple[Tuple[Any, ...], Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._writer: Optional[WriteBehind] = None
+        if backend == "json":
+            self._writer = WriteBehind(self._save_registry, flush_interval, flush_threshold)
         self._load_registry()
 
     def _load_registry(self) -> None:
         """Load the registry from disk."""
-        self.associations: Dict[str, Dict[str, Any]] = {}
-        if self.registry_path.exists():
-            self.associations = json.loads(self.registry_path.read_text())
+        self.associations: MutableMapping[str, Dict[str, Any]] = {}
+        if self.backend == "sqlite":
+            self.associations = SQLiteMapping(self.registry_path, "associations")
+        elif self.registry_path.exists():
+            self._merge_from_disk(file_signature(self.registry_path))
+
+    def _merge_from_disk(self, signature: Optional[FileSignature]) -> None:
+        """Replace associations with the file's, keeping unsaved local changes.
+
+        Args:
+            signature: Signature of the registry file taken before reading it
+        """
+        associations: Dict[str, Dict[str, Any]] = {}
+        if signature is not None:
+            associations = json.loads(self.registry_path.read_text())
+        for term in self._dirty_terms:
+            if term in self.associations:
+                associations[term] = self.associations[term]
+        self.associations = associations
+        self._signature = signature
+
+    def _refresh(self) -> None:
+        """Reload the registry if another process has written it since we last did."""
+        if self._writer is None:
+            return
+        signature = file_signature(self.registry_path)
+        if signature != self._signature:
+            with self._lock:
+                self._merge_from_disk(signature)
+
+    def _mark_dirty(self, term: str) -> None:
+        """Schedule an unsaved in-memory change to be written."""
+        if self._writer is not None:
+            with self._lock:
+                self._dirty_terms.add(term)
+            self._writer.mark_dirty()
 
     def _save_registry(self) -> None:
-        """Save the registry to disk."""
-        self.registry_path.write_text(json.dumps(self.associations, indent=2))
+        """Merge unsaved changes into the registry file under the file lock."""
+        with self._lock, self._file_lock:
+            signature = file_signature(self.registry_path)
+            if signature != self._signature:
+                self._merge_from_disk(signature)
+            atomic_write_text(self.registry_path, json.dumps(self.associations, indent=2))
+            self._signature = file_signature(self.registry_path)
+            self._dirty_terms.clear()
+
+    def flush(self) -> None:
+        """Write unsaved registry and usage changes to disk."""
+        if self._writer is not None:
+            self._writer.flush()
+        self.suggester.flush()
+
+    def close(self) -> None:
+        """Flush unsaved changes and stop background writes."""
+        if self._writer is not None:
+            self._writer.close()
+        if self._search_executor is not None:
+            self._search_executor.shutdown(wait=False)
+            self._search_executor = None
+        if isinstance(self.associations, SQLiteMapping):
+            self.associations.close()
+        if self._owns_suggester:
+            self.suggester.close()
+        else:
+            self.suggester.flush()
+
+    def __enter__(self) -> "IconRegistry":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def associate_icon(
         self, term: str, icon_id: str, metadata: Optional[Dict] = None
@@ -52,60 +171,169 @@ class IconRegistry:
             icon_id: The icon identifier (provider-specific)
             metadata: Optional metadata about the association
         """
-        self.associations[term] = {
-            "icon_id": icon_id,
-            "metadata": metadata or {},
-            "version": 1,
-        }
-        self._save_registry()
+        with self._lock:
+            previous = self.associations.get(term) or {}
+            self.associations[term] = {
+                "icon_id": icon_id,
+                "metadata": metadata or {},
+                "version": previous.get("version", 0) + 1,
+            }
+        self._mark_dirty(term)
         self.suggester.record_selection(term, icon_id)
 
     def get_icon(self, term: str) -> Optional[Dict[str, Any]]:
         """Get the icon associated with a term.
 
+        Resolved payloads are cached per term and reused until the association
+        changes, so repeated lookups do not go back to the providers.
+
         Args:
             term: The term to look up
 
         Returns:
             Icon data if found, None otherwise
         """
-        if term in self.associations:
-            assoc = self.associations[term]
-            icon_id = assoc["icon_id"]
-            source = assoc.get("metadata", {}).get("source", "")
-            if source:
-                return self.provider_chain.get_icon(source, icon_id)
+        self._refresh()
+        assoc = self.associations.get(term)
+        if assoc is None:
+            return None
+        icon_id = assoc["icon_id"]
+        source = assoc.get("metadata", {}).get("source", "")
+        stamp = (icon_id, source, assoc.get("version", 1))
+        with self._lock:
+            cached = self._payload_cache.get(term)
+            if cached is not None and cached[0] == stamp:
+                self._payload_cache.move_to_end(term)
+                # Callers own the returned payload, so hand out a copy
+                return dict(cached[1])
+
+        if source:
+            icon = self.provider_chain.get_icon(source, icon_id)
+        else:
             # If no source stored, search by term as fallback
             results = self.provider_chain.search(term, limit=1)
-            return results[0] if results else None
-        return None
+            icon = results[0] if results else None
+
+        # Misses are not cached so that a temporarily unavailable provider can recover
+        if icon is not None and self.payload_cache_size > 0:
+            with self._lock:
+                self._payload_cache[term] = (stamp, dict(icon))
+                self._payload_cache.move_to_end(term)
+                while len(self._payload_cache) > self.payload_cache_size:
+                    self._payload_cache.popitem(last=False)
+        return icon
 
     def suggest_icons(
-        self, term: str, limit: int = 5, context: Optional[Dict[str, Any]] = None
+        self,
+        term: str,
+        limit: int = 5,
+        context: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
     ) -> List[Dict[str, Any]]:
-        """Suggest icons for a term."""
-        related_terms = self.suggester.get_related_terms(term)
+        """Suggest icons for a term.
+
+        Args:
+            term: The term to suggest icons for
+            limit: Maximum number of suggestions
+            context: Optional context passed to the scorer
+            timeout: Total seconds to wait for provider searches. Searches still
+                running when it elapses are left out of the suggestions
+
+        Returns:
+            The best suggestions from every search that finished in time
+        """
+        suggestions: List[Dict[str, Any]] = []
+        for suggestions in self.iter_suggestions(term, limit, context, timeout):
+            pass
+        return suggestions
 
-        # Search all providers for original and related terms
-        all_icons = self.provider_chain.search_all(term, limit=limit)
-        for related_term in related_terms[:2]:
-            all_icons.extend(self.provider_chain.search_all(related_term, limit=limit))
+    def iter_suggestions(
+        self,
+        term: str,
+        limit: int = 5,
+        context: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield improving icon suggestions as provider searches complete.
+
+        The term and its first two related terms are searched concurrently,
+        once each. After every search finishes, the icons found so far are
+        rescored and the current best suggestions are yielded, so callers can
+        show results before slow providers respond.
+
+        Args:
+            term: The term to suggest icons for
+            limit: Maximum number of suggestions per yielded list
+            context: Optional context passed to the scorer
+            timeout: Total seconds to wait for provider searches
+
+        Yields:
+            The best suggestions found so far
+        """
+        terms = self._search_terms(term)
+        executor = self._get_search_executor()
+        futures: Dict[Future, int] = {
+            executor.submit(self.provider_chain.search_all, search_term, limit=limit): i
+            for i, search_term in enumerate(terms)
+        }
+        # Keep results in term order so ties rank as they would sequentially
+        results: List[List[Dict[str, Any]]] = [[] for _ in terms]
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    logger.exception("Icon search for '%s' failed", terms[futures[future]])
+                    continue
+                all_icons = [icon for found in results for icon in found]
+                yield self.suggester.sort_suggestions(all_icons, term, context, limit=limit)
+        except TimeoutError:
+            finished = sum(future.done() for future in futures)
+            logger.warning(
+                "Icon searches for '%s' exceeded %.2fs; %d of %d finished",
+                term,
+                timeout,
+                finished,
+                len(futures),
+            )
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _search_terms(self, term: str) -> List[str]:
+        """The term and its first two related terms, without duplicates."""
+        related_terms = self.suggester.get_related_terms(term)
+        terms: List[str] = []
+        seen: Set[str] = set()
+        for candidate in [term, *related_terms[:2]]:
+            if candidate.lower() not in seen:
+                seen.add(candidate.lower())
+                terms.append(candidate)
+        return terms
 
-        # Score and sort suggestions
-        sorted_icons = self.suggester.sort_suggestions(all_icons, term, context)
-        return sorted_icons[:limit]
+    def _get_search_executor(self) -> ThreadPoolExecutor:
+        """Create the search thread pool on first use."""
+        with self._lock:
+            if self._search_executor is None:
+                self._search_executor = ThreadPoolExecutor(
+                    max_workers=self.search_workers, thread_name_prefix="icon-search"
+                )
+            return self._search_executor
 
     def get_custom_mapping(self, term: str) -> Optional[str]:
         """Get any custom mapping for a term."""
-        if term in self.associations:
-            metadata = self.associations[term].get("metadata", {})
+        self._refresh()
+        assoc = self.associations.get(term)
+        if assoc is not None:
+            metadata = assoc.get("metadata", {})
             mapping: Optional[str] = metadata.get("custom_mapping")
             return mapping
         return None
 
     def set_custom_mapping(self, term: str, mapping: str) -> None:
         """Set a custom mapping for a term."""
-        if term not in self.associations:
-            self.associations[term] = {"metadata": {}, "version": 1}
-        self.associations[term]["metadata"]["custom_mapping"] = mapping
-        self._save_registry()
+        with self._lock:
+            entry = self.associations.get(term) or {"metadata": {}, "version": 1}
+            entry.setdefault("metadata", {})["custom_mapping"] = mapping
+            self.associations[term] = entry
+        self._mark_dirty(term)
@@ -0,0 +1,176 @@
+"""SQLite storage for icon associations and usage statistics.
+
+These stores are an optional backend for the registries and the suggester.
+Each thread (and each process) uses its own connection to a database in WAL
+mode, so many readers can share one file with a writer, and every change is
+an incremental upsert rather than a rewrite of the whole data set.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SQLiteStore(ABC):
+    """Base class managing per-thread connections to a WAL-mode database."""
+
+    def __init__(self, path: Path) -> None:
+        """Open the database.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._conn
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema(conn)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use."""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: each statement is its own transaction unless batched
+            conn = sqlite3.connect(
+                str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @abstractmethod
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        """Create tables and indexes if they do not exist."""
+
+    def close(self) -> None:
+        """Close every connection opened by this store."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class SQLiteMapping(SQLiteStore, MutableMapping[str, Any]):
+    """Dict-like store of JSON values keyed by term.
+
+    Values are decoded on every read, so mutating a returned value does not
+    change the store; assign it back to persist the change.
+    """
+
+    def __init__(self, path: Path, table: str) -> None:
+        """Open the mapping.
+
+        Args:
+            path: Path of the SQLite database file
+            table: Name of the table holding the mapping
+        """
+        if not _IDENTIFIER.match(table):
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+        super().__init__(path)
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(term TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+
+    def __getitem__(self, term: str) -> Any:
+        row = self._conn.execute(
+            f"SELECT value FROM {self.table} WHERE term = ?", (term,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(term)
+        return json.loads(row[0])
+
+    def __setitem__(self, term: str, value: Any) -> None:
+        self._conn.execute(
+            f"INSERT INTO {self.table} (term, value) VALUES (?, ?) "
+            "ON CONFLICT (term) DO UPDATE SET value = excluded.value",
+            (term, json.dumps(value)),
+        )
+
+    def __delitem__(self, term: str) -> None:
+        cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE term = ?", (term,))
+        if not cursor.rowcount:
+            raise KeyError(term)
+
+    def __contains__(self, term: object) -> bool:
+        row = self._conn.execute(f"SELECT 1 FROM {self.table} WHERE term = ?", (term,)).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (term,) in self._conn.execute(f"SELECT term FROM {self.table}").fetchall():
+            yield term
+
+    def __len__(self) -> int:
+        return int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+    def update_many(self, items: Mapping[str, Any]) -> None:
+        """Upsert many values in a single transaction."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT INTO {self.table} (term, value) VALUES (?, ?) "
+                "ON CONFLICT (term) DO UPDATE SET value = excluded.value",
+                [(term, json.dumps(value)) for term, value in items.items()],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def clear(self) -> None:
+        self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class SQLiteUsageStore(SQLiteStore, Mapping[str, Dict[str, int]]):
+    """Icon selection counters, readable as a mapping of term -> {icon_id: count}."""
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            "term TEXT NOT NULL, icon_id TEXT NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (term, icon_id)) WITHOUT ROWID"
+        )
+
+    def increment(self, term: str, icon_id: str, amount: int = 1) -> None:
+        """Add to the selection count of an icon for a term."""
+        self._conn.execute(
+            "INSERT INTO usage (term, icon_id, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (term, icon_id) DO UPDATE SET count = count + excluded.count",
+            (term, icon_id, amount),
+        )
+
+    def __getitem__(self, term: str) -> Dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT icon_id, count FROM usage WHERE term = ?", (term,)
+        ).fetchall()
+        if not rows:
+            raise KeyError(term)
+        return {icon_id: count for icon_id, count in rows}
+
+    def __contains__(self, term: object) -> bool:
+        row = self._conn.execute("SELECT 1 FROM usage WHERE term = ? LIMIT 1", (term,)).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (term,) in self._conn.execute("SELECT DISTINCT term FROM usage").fetchall():
+            yield term
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(DISTINCT term) FROM usage").fetchone()[0])
@@ -1,84 +1,289 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Mapping, Optional, Pattern, Sequence, Tuple, cast
+import heapq
 import json
+import logging
+import re
+import threading
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass
-import nltk
-from nltk.corpus import wordnet
+from .compat import HAVE_NUMPY
+from .persistence import FileLock, FileSignature, WriteBehind, atomic_write_text, file_signature
+from .sqlite_store import SQLiteUsageStore
 
+if HAVE_NUMPY:
+    import numpy as np
 
-@dataclass
-class ScoredIcon:
-    """Icon with relevance score."""
+logger = logging.getLogger(__name__)
 
-    icon_data: Dict[str, Any]
-    score: float
+RELATED_TERMS_CACHE_SIZE = 4096
+
+# Built by scripts/build_synonyms.py from WordNet and the bundled icon manifest
+SYNONYMS_PATH = Path(__file__).parent / "providers" / "icons" / "synonyms.json"
+
+
+@lru_cache(maxsize=None)
+def _synonym_table() -> Dict[str, List[str]]:
+    """Load the precomputed table of words -> related bundled icon terms."""
+    try:
+        terms: Dict[str, List[str]] = json.loads(SYNONYMS_PATH.read_text())["terms"]
+        return terms
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Could not load synonym table %s: %s", SYNONYMS_PATH, e)
+        return {}
+
+
+def synonym_key(word: str) -> str:
+    """Normalize a word to its key in the synonym table.
+
+    WordNet joins compound words with underscores or hyphens and the bundled
+    manifest with hyphens; the table keys use spaces for both.
+    """
+    return word.lower().replace("_", " ").replace("-", " ")
+
+
+def _lookup_synonyms(term: str) -> Tuple[str, ...]:
+    """Look up the bundled icon terms related to a term in the synonym table."""
+    return tuple(_synonym_table().get(synonym_key(term), ()))
+
+
+@lru_cache(maxsize=None)
+def _load_wordnet() -> Any:
+    """Import NLTK's WordNet reader, downloading the corpus if needed.
+
+    Raises:
+        ImportError: If NLTK is not installed
+    """
+    import nltk
+    from nltk.corpus import wordnet
+
+    try:
+        nltk.data.find("corpora/wordnet")
+    except LookupError:
+        nltk.download("wordnet", quiet=True)
+    return wordnet
+
+
+@lru_cache(maxsize=RELATED_TERMS_CACHE_SIZE)
+def _expand_term(term: str) -> Tuple[str, ...]:
+    """Expand a term into its WordNet synonyms, hypernyms and hyponyms.
+
+    The walk is expensive, so results are cached process-wide.
+
+    Args:
+        term: The term to expand
+
+    Returns:
+        Sorted related terms, excluding the term itself, with spaces for underscores
+    """
+    related_terms: set[str] = set()
+
+    # Get synsets for the term
+    synsets = _load_wordnet().synsets(term)
+    for synset in synsets:
+        # Add synonyms
+        related_terms.update(lemma.name() for lemma in synset.lemmas())
+
+        # Add hypernyms (more general terms)
+        for hypernym in synset.hypernyms():
+            related_terms.update(lemma.name() for lemma in hypernym.lemmas())
+
+        # Add hyponyms (more specific terms)
+        for hyponym in synset.hyponyms():
+            related_terms.update(lemma.name() for lemma in hyponym.lemmas())
+
+    # Remove the original term and clean up underscores
+    related_terms.discard(term)
+    return tuple(sorted(t.replace("_", " ") for t in related_terms))
+
+
+@lru_cache(maxsize=RELATED_TERMS_CACHE_SIZE)
+def _related_set(term: str, use_wordnet: bool) -> FrozenSet[str]:
+    """Lowercased related terms for a term, for fast membership tests."""
+    related = _expand_term(term) if use_wordnet else _lookup_synonyms(term)
+    return frozenset(t.lower() for t in related)
+
+
+@lru_cache(maxsize=RELATED_TERMS_CACHE_SIZE)
+def _related_pattern(term: str, use_wordnet: bool) -> Optional[Pattern[str]]:
+    """Compile one regex that finds any related term inside a string."""
+    related = _related_set(term, use_wordnet)
+    if not related:
+        return None
+    return re.compile("|".join(re.escape(r) for r in sorted(related, key=len, reverse=True)))
+
+
+def _any_per_row(flags: Any, offsets: Sequence[int]) -> Any:
+    """Reduce flags grouped by CSR-style offsets to one "any" per group."""
+    counts = np.concatenate(([0], np.cumsum(flags, dtype=np.intp)))
+    bounds = np.asarray(offsets, dtype=np.intp)
+    return counts[bounds[1:]] > counts[bounds[:-1]]
+
+
+def _top_k(scores: Sequence[float], k: int) -> List[int]:
+    """Indices of the k highest scores, best first, ties in input order."""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    if not HAVE_NUMPY:
+        return heapq.nsmallest(k, range(n), key=lambda i: (-scores[i], i))
+    values = np.asarray(scores)
+    if k < n:
+        threshold = values[np.argpartition(-values, k - 1)[:k]].min()
+        above = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)[: k - len(above)]
+        chosen = np.concatenate((above, ties))
+    else:
+        chosen = np.arange(n)
+    return [int(i) for i in chosen[np.lexsort((chosen, -values[chosen]))]]
 
 
 class IconSuggester:
     """Suggests icons based on terms and context."""
 
-    def __init__(self, usage_data_path: Optional[Path] = None) -> None:
-        """Initialize the suggester."""
-        self.usage_data_path = (
-            usage_data_path or Path.home() / ".reifire" / "icon_usage.json"
-        )
+    def __init__(
+        self,
+        usage_data_path: Optional[Path] = None,
+        flush_interval: Optional[float] = 1.0,
+        flush_threshold: int = 100,
+        backend: str = "json",
+        use_wordnet: bool = False,
+    ) -> None:
+        """Initialize the suggester.
+
+        With the "json" backend, usage counts are written behind and merged
+        into the file under an advisory lock, so processes sharing the file
+        add up their selections instead of overwriting each other.
+
+        Related terms come from a precomputed table of the bundled icon
+        vocabulary. Set use_wordnet to expand terms through NLTK's WordNet
+        instead, which covers more words but needs the nltk package and
+        loads (or downloads) the full corpus.
+
+        Args:
+            usage_data_path: Path to store usage statistics (defaults to
+                ~/.reifire/icon_usage.json, or icon_usage.sqlite3 for sqlite)
+            flush_interval: Seconds before unsaved usage changes are written
+            flush_threshold: Number of unsaved changes that triggers a write
+            backend: Storage backend, "json" or "sqlite"
+            use_wordnet: Expand related terms with WordNet instead of the synonym table
+        """
+        if backend not in ("json", "sqlite"):
+            raise ValueError(f"Unknown usage data backend: {backend}")
+        self.backend = backend
+        default_name = "icon_usage.sqlite3" if backend == "sqlite" else "icon_usage.json"
+        self.usage_data_path = usage_data_path or Path.home() / ".reifire" / default_name
         self.usage_data_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.usage_data_path)
+        self._signature: Optional[FileSignature] = None
+        self._usage_deltas: Dict[str, Dict[str, int]] = {}
+        self._writer: Optional[WriteBehind] = None
+        if backend == "json":
+            self._writer = WriteBehind(self._save_usage_data, flush_interval, flush_threshold)
         self._load_usage_data()
 
-        # Download required NLTK data
-        try:
-            nltk.data.find("corpora/wordnet")
-        except LookupError:
-            nltk.download("wordnet", quiet=True)
+        self.use_wordnet = use_wordnet
+        if use_wordnet:
+            _load_wordnet()
 
     def _load_usage_data(self) -> None:
         """Load icon usage statistics."""
-        self.usage_data: Dict[str, Dict[str, int]] = {}
-        if self.usage_data_path.exists():
-            self.usage_data = json.loads(self.usage_data_path.read_text())
+        self.usage_data: Mapping[str, Dict[str, int]] = {}
+        if self.backend == "sqlite":
+            self.usage_data = SQLiteUsageStore(self.usage_data_path)
+        elif self.usage_data_path.exists():
+            self._merge_from_disk(file_signature(self.usage_data_path))
 
-    def _save_usage_data(self) -> None:
-        """Save icon usage statistics."""
-        self.usage_data_path.write_text(json.dumps(self.usage_data, indent=2))
+    def _merge_from_disk(self, signature: Optional[FileSignature]) -> None:
+        """Replace usage data with the file's plus this process's unsaved counts.
 
-    def get_related_terms(self, term: str) -> List[str]:
-        """Get related terms using WordNet."""
-        related_terms: set[str] = set()
+        Args:
+            signature: Signature of the usage file taken before reading it
+        """
+        usage_data: Dict[str, Dict[str, int]] = {}
+        if signature is not None:
+            usage_data = json.loads(self.usage_data_path.read_text())
+        for term, deltas in self._usage_deltas.items():
+            usage = usage_data.setdefault(term, {})
+            for icon_id, count in deltas.items():
+                usage[icon_id] = usage.get(icon_id, 0) + count
+        self.usage_data = usage_data
+        self._signature = signature
+
+    def _refresh(self) -> None:
+        """Reload usage data if another process has written it since we last did."""
+        if self._writer is None:
+            return
+        signature = file_signature(self.usage_data_path)
+        if signature != self._signature:
+            with self._lock:
+                self._merge_from_disk(signature)
 
-        # Get synsets for the term
-        synsets = wordnet.synsets(term)
-        for synset in synsets:
-            # Add synonyms
-            related_terms.update(lemma.name() for lemma in synset.lemmas())
+    def _save_usage_data(self) -> None:
+        """Merge unsaved usage counts into the usage file under the file lock."""
+        with self._lock, self._file_lock:
+            signature = file_signature(self.usage_data_path)
+            if signature != self._signature:
+                self._merge_from_disk(signature)
+            atomic_write_text(self.usage_data_path, json.dumps(self.usage_data, indent=2))
+            self._signature = file_signature(self.usage_data_path)
+            self._usage_deltas.clear()
 
-            # Add hypernyms (more general terms)
-            for hypernym in synset.hypernyms():
-                related_terms.update(lemma.name() for lemma in hypernym.lemmas())
+    def flush(self) -> None:
+        """Write unsaved usage statistics to disk."""
+        if self._writer is not None:
+            self._writer.flush()
 
-            # Add hyponyms (more specific terms)
-            for hyponym in synset.hyponyms():
-                related_terms.update(lemma.name() for lemma in hyponym.lemmas())
+    def close(self) -> None:
+        """Flush unsaved usage statistics and stop background writes."""
+        if self._writer is not None:
+            self._writer.close()
+        if isinstance(self.usage_data, SQLiteUsageStore):
+            self.usage_data.close()
 
-        # Remove the original term and clean up underscores
-        related_terms.discard(term)
-        return [t.replace("_", " ") for t in related_terms]
+    def get_related_terms(self, term: str) -> List[str]:
+        """Get related terms from the synonym table, or WordNet if enabled."""
+        if self.use_wordnet:
+            return list(_expand_term(term))
+        return list(_lookup_synonyms(term))
 
     def record_selection(self, term: str, icon_id: str) -> None:
         """Record that an icon was selected for a term."""
-        if term not in self.usage_data:
-            self.usage_data[term] = {}
-        self.usage_data[term][icon_id] = self.usage_data[term].get(icon_id, 0) + 1
-        self._save_usage_data()
+        if isinstance(self.usage_data, SQLiteUsageStore):
+            self.usage_data.increment(term, icon_id)
+            return
+        usage_data = cast(Dict[str, Dict[str, int]], self.usage_data)
+        with self._lock:
+            usage = usage_data.setdefault(term, {})
+            usage[icon_id] = usage.get(icon_id, 0) + 1
+            deltas = self._usage_deltas.setdefault(term, {})
+            deltas[icon_id] = deltas.get(icon_id, 0) + 1
+        if self._writer is not None:
+            self._writer.mark_dirty()
 
     def score_icon(
         self, icon: Dict[str, Any], term: str, context: Optional[Dict[str, Any]] = None
     ) -> float:
         """Score an icon's relevance."""
-        score = 0.0
         term = term.lower()
+        self._refresh()
+        related = _related_set(term, self.use_wordnet)
+        return self._score(icon, term, related, self.usage_data.get(term))
+
+    def _score(
+        self,
+        icon: Dict[str, Any],
+        term: str,
+        related: FrozenSet[str],
+        usage: Optional[Dict[str, int]],
+    ) -> float:
+        """Score an icon against a lowercased term and its precomputed expansion."""
+        score = 0.0
+        icon_term = icon.get("term", "").lower()
 
         # Direct term match
-        if term in icon.get("term", "").lower():
+        if term in icon_term:
             score += 0.5
 
         # Tag matches
@@ -86,31 +291,128 @@ class IconSuggester:
         if term in tags:
             score += 0.3
 
-        # Related term matches
-        related = self.get_related_terms(term)
-        if any(r.lower() in icon.get("term", "").lower() for r in related):
+        # Related term matches; exact hits are set lookups, substrings need a scan
+        if icon_term in related or any(r in icon_term for r in related):
             score += 0.2
-        if any(r.lower() in tag for r in related for tag in tags):
+        if any(tag in related for tag in tags) or any(r in tag for r in related for tag in tags):
             score += 0.1
 
         # Usage history
-        if term in self.usage_data and icon["id"] in self.usage_data[term]:
-            usage_score = self.usage_data[term][icon["id"]] / max(
-                self.usage_data[term].values()
-            )
+        if usage and icon["id"] in usage:
+            usage_score = usage[icon["id"]] / max(usage.values())
             score += 0.2 * usage_score
 
         return min(score, 1.0)
 
+    def batch_score(
+        self,
+        icons: List[Dict[str, Any]],
+        term: str,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> List[float]:
+        """Score many candidate icons at once.
+
+        Returns the same scores as calling score_icon on each icon, but each
+        distinct term or tag string is tested against the term and its related
+        terms only once, and the per-icon reduction is vectorized when numpy
+        is installed.
+
+        Args:
+            icons: Candidate icons
+            term: The term being illustrated
+            context: Optional context (currently unused, as in score_icon)
+
+        Returns:
+            One score per icon, in input order
+        """
+        term = term.lower()
+        self._refresh()
+        return [float(score) for score in self._batch_scores(icons, term)]
+
+    def _batch_scores(self, icons: List[Dict[str, Any]], term: str) -> Sequence[float]:
+        """Score icons against a lowercased term (see batch_score)."""
+        related = _related_set(term, self.use_wordnet)
+        pattern = _related_pattern(term, self.use_wordnet)
+        usage = self.usage_data.get(term)
+        top_usage = max(usage.values()) if usage else 0
+
+        # Intern each distinct lowercased string; tags are stored as CSR rows
+        string_ids: Dict[str, int] = {}
+        term_ids: List[int] = []
+        tag_ids: List[int] = []
+        tag_offsets = [0]
+        usage_scores: List[float] = []
+        for icon in icons:
+            icon_term = icon.get("term", "").lower()
+            term_ids.append(string_ids.setdefault(icon_term, len(string_ids)))
+            for tag in icon.get("tags", []):
+                tag_ids.append(string_ids.setdefault(tag.lower(), len(string_ids)))
+            tag_offsets.append(len(tag_ids))
+            icon_id = icon.get("id")
+            if usage and icon_id in usage:
+                usage_scores.append(0.2 * (usage[icon_id] / top_usage))
+            else:
+                usage_scores.append(0.0)
+
+        strings = list(string_ids)
+        contains_term = [term in string for string in strings]
+        equals_term = [string == term for string in strings]
+        has_related = [
+            string in related or (pattern is not None and pattern.search(string) is not None)
+            for string in strings
+        ]
+
+        # Accumulate in the same order as _score so results are bit-identical
+        if HAVE_NUMPY:
+            term_index = np.asarray(term_ids, dtype=np.intp)
+            tag_index = np.asarray(tag_ids, dtype=np.intp)
+            contains_arr = np.asarray(contains_term, dtype=bool)
+            equals_arr = np.asarray(equals_term, dtype=bool)
+            related_arr = np.asarray(has_related, dtype=bool)
+            scores = np.zeros(len(icons))
+            scores += np.where(contains_arr[term_index], 0.5, 0.0)
+            scores += np.where(_any_per_row(equals_arr[tag_index], tag_offsets), 0.3, 0.0)
+            scores += np.where(related_arr[term_index], 0.2, 0.0)
+            scores += np.where(_any_per_row(related_arr[tag_index], tag_offsets), 0.1, 0.0)
+            scores += np.asarray(usage_scores)
+            return cast(Sequence[float], np.minimum(scores, 1.0))
+
+        results: List[float] = []
+        for i, term_id in enumerate(term_ids):
+            row = tag_ids[tag_offsets[i] : tag_offsets[i + 1]]
+            score = 0.0
+            if contains_term[term_id]:
+                score += 0.5
+            if any(equals_term[tag_id] for tag_id in row):
+                score += 0.3
+            if has_related[term_id]:
+                score += 0.2
+            if any(has_related[tag_id] for tag_id in row):
+                score += 0.1
+            score += usage_scores[i]
+            results.append(min(score, 1.0))
+        return results
+
     def sort_suggestions(
         self,
         icons: List[Dict[str, Any]],
         term: str,
         context: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Sort icon suggestions by relevance score."""
-        scored_icons = [
-            ScoredIcon(icon, self.score_icon(icon, term, context)) for icon in icons
-        ]
-        scored_icons.sort(key=lambda x: x.score, reverse=True)
-        return [icon.icon_data for icon in scored_icons]
+        """Sort icon suggestions by relevance score.
+
+        Args:
+            icons: Candidate icons
+            term: The term being illustrated
+            context: Optional context passed through to scoring
+            limit: Only select and return the best limit icons
+
+        Returns:
+            Icons ordered best first; equally scored icons keep their input order
+        """
+        term = term.lower()
+        self._refresh()
+        scores = self._batch_scores(icons, term)
+        order = _top_k(scores, len(icons) if limit is None else limit)
+        return [icons[i] for i in order]
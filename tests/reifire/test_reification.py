@@ -7,6 +7,7 @@ from typing import Generator
 from reifire.reification import ReifiedConcept
 from reifire.visualization.metadata import IconMetadata
 from reifire.visualization.registry import IconRegistry
+from reifire.visualization.suggestions import IconSuggester
 from reifire.visualization.providers.chain import ProviderChain
 
 
@@ -23,7 +24,9 @@ def mock_chain() -> ProviderChain:
 def registry(mock_chain: ProviderChain) -> Generator[IconRegistry, None, None]:
     with tempfile.TemporaryDirectory() as tmpdir:
         registry_path = Path(tmpdir) / "registry.json"
-        yield IconRegistry(mock_chain, registry_path)
+        suggester = IconSuggester(Path(tmpdir) / "usage.json")
+        with IconRegistry(mock_chain, registry_path, suggester) as registry:
+            yield registry
 
 
 def test_set_icon_with_id(registry: IconRegistry) -> None:
@@ -0,0 +1,74 @@
+"""Tests for keyword-based component categorization."""
+
+from typing import Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from reifire.visualization.category_matcher import CategoryMatcher
+from reifire.visualization.icon_manager import IconManager
+
+
+def _naive_match(categories: Dict[str, List[str]], text: str) -> str:
+    normalized = text.lower()
+    for category, keywords in categories.items():
+        if any(keyword in normalized for keyword in keywords):
+            return category
+    return "default"
+
+
+@pytest.fixture
+def manager() -> IconManager:
+    return IconManager(MagicMock(), provider_chain=MagicMock())
+
+
+def test_matches_first_priority_category() -> None:
+    """Test that the earliest category wins regardless of match position."""
+    matcher = CategoryMatcher({"first": ["she", "xyz"], "second": ["he", "hers"], "third": ["s"]})
+    assert matcher.match("ushers") == "first"
+    assert matcher.match("HERS") == "second"
+    assert matcher.match("as") == "third"
+    assert matcher.match("abc") is None
+    assert matcher.match("") is None
+
+
+def test_agrees_with_substring_scan(manager: IconManager) -> None:
+    """Test that the automaton reproduces the keyword-by-keyword substring scan."""
+    terms = [
+        "SubmitButton",
+        "user_profile_form",
+        "navbar",
+        "DataTable",
+        "progress bar",
+        "api endpoint",
+        "schema migration",
+        "AuthToken",
+        "metrics dashboard",
+        "release build",
+        "timeline",
+        "cardholder",
+        "monitoring",
+        "unrelated",
+        "colorful datetime",
+        "rowboat",
+        "indexer",
+        "listing",
+        "",
+    ]
+    for term in terms:
+        expected = _naive_match(IconManager.COMPONENT_CATEGORIES, term)
+        assert manager._get_component_category(term) == expected, term
+
+
+def test_register_category(manager: IconManager) -> None:
+    """Test extending the category table at runtime."""
+    assert manager._get_component_category("kubernetes pod") == "default"
+    manager.register_category("infrastructure", ["Kubernetes", "pod"], fallback_icon="k8s.svg")
+    assert manager._get_component_category("kubernetes pod") == "infrastructure"
+    assert manager.FALLBACK_ICONS["infrastructure"] == "k8s.svg"
+    # Built-in categories keep priority over registered ones
+    assert manager._get_component_category("pod build") == "deployment"
+
+    manager.register_category("api", ["grpc"])
+    assert manager._get_component_category("grpc service") == "api"
+    assert "infrastructure" not in IconManager.COMPONENT_CATEGORIES
+    assert "infrastructure" not in IconManager.FALLBACK_ICONS
@@ -0,0 +1,74 @@
+"""Tests for color swatch generation."""
+
+import base64
+from unittest.mock import MagicMock
+
+from reifire.visualization import color_swatch
+from reifire.visualization.color_swatch import ColorSwatchGenerator
+from reifire.visualization.icon_manager import IconManager
+from reifire.visualization.processor import VisualizationProcessor
+
+
+def _decode(data_uri: str) -> str:
+    prefix = "data:image/svg+xml;base64,"
+    assert data_uri.startswith(prefix)
+    return base64.b64decode(data_uri[len(prefix) :]).decode()
+
+
+def test_parse_color() -> None:
+    """Test hex passthrough, named colors and the gray default."""
+    assert ColorSwatchGenerator._parse_color("#abc") == "#abc"
+    assert ColorSwatchGenerator._parse_color("#A0B1C2") == "#A0B1C2"
+    assert ColorSwatchGenerator._parse_color("Red") == "#FF0000"
+    assert ColorSwatchGenerator._parse_color("#abcd") == "#808080"
+    assert ColorSwatchGenerator._parse_color("chartreuse") == "#808080"
+
+
+def test_swatch_data_uris_are_cached() -> None:
+    """Test that repeated schemes reuse cached data URIs."""
+    color_swatch._swatch_data_uri.cache_clear()
+    first = ColorSwatchGenerator.swatch_data_uris(["red", "blue", "red"])
+    second = ColorSwatchGenerator.swatch_data_uris(["blue", "red"])
+
+    assert _decode(first[0]) == ColorSwatchGenerator.generate_swatch("red")
+    assert first[0] == first[2] == second[1]
+    info = color_swatch._swatch_data_uri.cache_info()
+    assert (info.misses, info.hits) == (2, 3)
+
+
+def test_combined_swatch() -> None:
+    """Test that a scheme can be rendered as one striped swatch."""
+    (uri,) = ColorSwatchGenerator.swatch_data_uris(["red", "#00f", "white"], combined=True)
+    svg = _decode(uri)
+    assert 'viewBox="0 0 3 1"' in svg
+    assert svg.count("<rect") == 3
+    assert '<rect x="1" width="1" height="1" fill="#00f"/>' in svg
+    assert ColorSwatchGenerator.swatch_data_uris([], combined=True) == []
+
+
+def test_processor_with_combined_swatches() -> None:
+    """Test that color nodes still get one swatch each when schemes are combined."""
+    manager = IconManager(MagicMock(), provider_chain=MagicMock(), combine_color_swatches=True)
+    processor = VisualizationProcessor(manager)
+    data = {
+        "object": {"name": "poster"},
+        "artifact": {
+            "type": "poster",
+            "attributes": [
+                {
+                    "name": "color scheme",
+                    "value": "red-blue",
+                    "visualization": {"source": "colors", "name": "red-blue"},
+                }
+            ],
+        },
+    }
+    components, _ = processor.process_json(data)
+
+    scheme = next(c for c in components if c.label.startswith("color scheme"))
+    assert len(scheme.properties["visualization"]["images"]) == 1
+    colors = [c for c in components if c.type == "color"]
+    assert [c.label for c in colors] == ["red", "blue"]
+    for component in colors:
+        (image,) = component.properties["visualization"]["images"]
+        assert _decode(image) == ColorSwatchGenerator.generate_swatch(component.label)
@@ -0,0 +1,114 @@
+"""Tests for the compact component store."""
+
+import sys
+from typing import Any, Dict
+
+import pytest
+from reifire.visualization import component_store
+from reifire.visualization.component_store import ComponentStore, ConnectionStore
+from reifire.visualization.layout import LayoutComponent, Position, Size
+from reifire.visualization.processor import (
+    VisualizationComponent,
+    VisualizationConnection,
+    VisualizationProcessor,
+)
+
+
+@pytest.fixture
+def large_document() -> Dict[str, Any]:
+    """A document with many attributes, alternatives and relationships."""
+    return {
+        "object": {"name": "system", "modifiers": [{"name": "fast", "value": True}]},
+        "type": {"name": "service"},
+        "artifact": {
+            "type": "api",
+            "attributes": [
+                {
+                    "name": f"field_{i}",
+                    "value": i,
+                    "alternatives": [{"name": f"field_{i}", "value": -i}],
+                }
+                for i in range(200)
+            ],
+            "relationships": [
+                {"type": "calls", "source": f"field_{i}", "target": f"field_{i + 1}"}
+                for i in range(100)
+            ],
+        },
+    }
+
+
+def test_store_views_read_and_write() -> None:
+    """Test that views expose and update the stored columns."""
+    store = ComponentStore()
+    store.append(VisualizationComponent("a", "object", "A", 1, 2, 3, 4, {"k": "v"}))
+    view = store.add("b", "attribute", "B", 5, 6, 7, 8)
+
+    assert len(store) == 2
+    assert store[0].properties == {"k": "v"}
+    assert store[-1].id == "b"
+    assert view.properties == {}
+    view.x = 50
+    view.properties["added"] = True
+    assert store[1].x == 50
+    assert store[1].properties == {"added": True}
+    assert [v.id for v in store[0:2]] == ["a", "b"]
+    with pytest.raises(IndexError):
+        store[2]
+
+
+def test_store_interns_types() -> None:
+    """Test that repeated type names share one table entry."""
+    store = ComponentStore()
+    for i in range(10):
+        store.add(str(i), "attribute" if i % 2 else "object", "", 0, 0, 0, 0)
+
+    assert store.types == ["object", "attribute"]
+    assert store[3].type == "attribute"
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_store_as_arrays(use_numpy: bool, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test copying the geometry columns out, with and without NumPy."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(component_store, "HAVE_NUMPY", False)
+    store = ComponentStore()
+    store.add("a", "object", "", 1, 2, 3, 4)
+    store.add("b", "color", "", 5, 6, 7, 8)
+
+    arrays = store.as_arrays()
+
+    assert list(arrays["x"]) == [1, 5]
+    assert list(arrays["height"]) == [4, 8]
+    assert list(arrays["type"]) == [0, 1]
+    arrays["x"][0] = 100
+    assert store[0].x == 1
+
+
+def test_process_compact_matches_process_json(large_document: Dict[str, Any]) -> None:
+    """Test that compact processing yields the same components and connections."""
+    processor = VisualizationProcessor()
+    components, connections = processor.process_json(large_document)
+    store, connection_store = processor.process_compact(large_document)
+
+    assert isinstance(store, ComponentStore)
+    assert isinstance(connection_store, ConnectionStore)
+    assert store.to_components() == components
+    assert connection_store.to_connections() == connections
+    assert processor.components is components
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="dataclass slots need Python 3.10")
+def test_records_are_slotted() -> None:
+    """Test that the per-component records carry no instance dict."""
+    records = [
+        VisualizationComponent("a", "object", "A", 0, 0, 1, 1, {}),
+        VisualizationConnection("a", "b", "type", {}),
+        LayoutComponent("a", None, Position(0, 0), Size(1, 1)),  # type: ignore[arg-type]
+        Position(0, 0),
+        Size(1, 1),
+    ]
+    for record in records:
+        assert not hasattr(record, "__dict__")
@@ -1,8 +1,13 @@
 """Tests for the HTML renderer."""
 
 import pytest
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import MagicMock
 from reifire.visualization.htmlrenderer import HTMLRenderer
+from reifire.visualization.icon_manager import IconManager, resolve_fallback_icon
 from typing import Dict, Any
 
 
@@ -152,3 +157,63 @@ def test_render_complex(sample_data: Dict[str, Any], tmp_path: Path) -> None:
     assert "alt_value" in html
     assert "component1" in html
     assert "component2" in html
+
+
+def test_render_offline(sample_data: Dict[str, Any]) -> None:
+    """Test that offline rendering inlines every image."""
+    sample_data["object"]["modifiers"] = [
+        {"name": "remote", "icon": "https://example.com/icon.svg"}
+    ]
+    renderer = HTMLRenderer()
+
+    html = renderer.render(sample_data)
+    assert "https://example.com/icon.svg" in html
+
+    html = renderer.render(sample_data, offline=True)
+    sources = re.findall(r'src="([^"]*)"', html)
+    assert sources and all(src.startswith("data:image/svg+xml;base64,") for src in sources)
+    assert "example.com" not in html and "test.svg" not in html
+    # The input data is left untouched
+    assert sample_data["object"]["visualization"]["image"] == "test.svg"
+
+
+def test_icon_manager_fallbacks_are_bundled() -> None:
+    """Test that fallback icons resolve to inline bundled SVGs."""
+    chain = MagicMock()
+    chain.search.return_value = []
+    registry = MagicMock()
+    registry.get_icon.return_value = None
+    manager = IconManager(registry, provider_chain=chain)
+
+    for obj in ({}, {"name": "submit button"}, {"name": "zzz", "type": "object"}):
+        props = manager.get_visualization_properties(obj)
+        assert props["source"] == "fallback"
+        assert props["image"].startswith("data:image/svg+xml;base64,")
+    assert manager.get_visualization_properties({"name": "query"})["image"] == (
+        resolve_fallback_icon("octicons/database-24")
+    )
+
+
+def test_render_concurrently(sample_data: Dict[str, Any]) -> None:
+    """Test that one renderer renders identical output from many threads."""
+    documents = []
+    for index in range(12):
+        document = dict(sample_data)
+        document["object"] = {
+            "name": f"object_{index}",
+            "modifiers": [{"name": f"mod_{index}_{n}", "value": n} for n in range(index * 5)],
+        }
+        documents.append(document)
+    expected = [HTMLRenderer().render(document) for document in documents]
+
+    renderer = HTMLRenderer()
+    # Switch threads often so that renders interleave mid-document
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rendered = list(executor.map(renderer.render, documents * 10))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert [html.encode() for html in rendered] == [html.encode() for html in expected * 10]
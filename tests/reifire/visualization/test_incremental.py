@@ -0,0 +1,133 @@
+"""Tests for incremental visualization processing."""
+
+import copy
+import json
+from typing import Any, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+from reifire.visualization.icon_manager import IconManager
+from reifire.visualization.incremental import IncrementalProcessor, VisualizationPatch
+from reifire.visualization.processor import VisualizationProcessor
+
+
+@pytest.fixture
+def document() -> Dict[str, Any]:
+    """A document exercising every kind of subtree."""
+    return {
+        "object": {
+            "name": "dashboard",
+            "modifiers": [{"name": "fast", "value": True}, {"name": "fast", "value": True}],
+        },
+        "type": {"name": "web app"},
+        "artifact": {
+            "type": "page",
+            "attributes": [
+                {
+                    "name": "color scheme",
+                    "value": "red-blue",
+                    "visualization": {"source": "colors", "name": "red-blue"},
+                },
+                {
+                    "name": "layout",
+                    "value": "grid",
+                    "alternatives": [{"name": "layout", "value": "list"}],
+                },
+                {"name": "title", "value": "Sales"},
+            ],
+            "relationships": [{"type": "contains", "source": "page", "target": "chart"}],
+        },
+    }
+
+
+def _edits(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """A sequence of edits an editor might make."""
+    versions = []
+    doc = copy.deepcopy(document)
+    doc["artifact"]["attributes"][2]["value"] = "Sales 2024"
+    versions.append(copy.deepcopy(doc))
+    doc["artifact"]["attributes"][1]["alternatives"].append({"name": "layout", "value": "grid"})
+    versions.append(copy.deepcopy(doc))
+    doc["object"]["modifiers"].pop(0)
+    versions.append(copy.deepcopy(doc))
+    doc["artifact"]["relationships"][0]["target"] = "table"
+    versions.append(copy.deepcopy(doc))
+    doc["object"]["name"] = "report"
+    versions.append(copy.deepcopy(doc))
+    return versions
+
+
+def _apply(state: Dict[str, Dict[str, Any]], patch: VisualizationPatch) -> None:
+    patch_dict = patch.to_dict()
+    json.dumps(patch_dict)
+    for component_id in patch_dict["removed"]:
+        del state[component_id]
+    for component in patch_dict["added"] + patch_dict["changed"]:
+        state[component["id"]] = component
+
+
+def test_updates_match_process_json(document: Dict[str, Any]) -> None:
+    """Test that every update yields the same result as a full process."""
+    incremental = IncrementalProcessor()
+    full = VisualizationProcessor()
+    for version in [document] + _edits(document):
+        incremental.update(version)
+        components, connections = full.process_json(version)
+        assert incremental.components == components
+        assert incremental.connections == connections
+
+
+def test_patches_transform_previous_state(document: Dict[str, Any]) -> None:
+    """Test that applying each patch to the previous state gives the new state."""
+    incremental = IncrementalProcessor()
+    state: Dict[str, Dict[str, Any]] = {}
+    connections: List[Any] = []
+    for version in [document] + _edits(document):
+        patch = incremental.update(version)
+        _apply(state, patch)
+        for connection in patch.removed_connections:
+            connections.remove(connection)
+        connections.extend(patch.added_connections)
+
+        expected = {component.id: component for component in incremental.components}
+        assert state.keys() == expected.keys()
+        assert all(state[key]["label"] == expected[key].label for key in state)
+        assert all(state[key]["y"] == expected[key].y for key in state)
+        assert sorted(map(repr, connections)) == sorted(map(repr, incremental.connections))
+
+
+def test_edit_in_place_reuses_other_subtrees(document: Dict[str, Any]) -> None:
+    """Test that editing one value changes one component and rebuilds nothing else."""
+    incremental = IncrementalProcessor()
+    incremental.update(document)
+    before = list(incremental.components)
+
+    edited = copy.deepcopy(document)
+    edited["artifact"]["attributes"][2]["value"] = "Sales 2024"
+    patch = incremental.update(edited)
+
+    assert [component.label for component in patch.changed] == ["title: Sales 2024"]
+    assert not (patch.added or patch.removed)
+    assert not (patch.added_connections or patch.removed_connections)
+    reused = [new is old for new, old in zip(incremental.components, before)]
+    assert reused.count(False) == 1
+    assert incremental.update(edited).empty
+
+
+def test_only_changed_subtrees_resolve_icons(document: Dict[str, Any]) -> None:
+    """Test that icons are only resolved for new or edited subtrees."""
+    registry = MagicMock()
+    registry.get_icon.return_value = "cached.svg"
+    icon_manager = IconManager(registry, provider_chain=MagicMock())
+    incremental = IncrementalProcessor(VisualizationProcessor(icon_manager))
+    incremental.update(document)
+    registry.get_icon.reset_mock()
+
+    edited = copy.deepcopy(document)
+    edited["artifact"]["attributes"][1]["alternatives"][0]["name"] = "columns"
+    incremental.update(edited)
+
+    assert sorted(call.args[0] for call in registry.get_icon.call_args_list) == [
+        "columns",
+        "layout",
+    ]
@@ -1,6 +1,15 @@
 """Tests for the visualization layout engine."""
 
+import random
+import sys
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from reifire.visualization import layout as layout_module
+from reifire.visualization.force_layout import ForceLayout, _QuadTree
+from reifire.visualization.layered_layout import LayeredLayout, _count_crossings
 from reifire.visualization.layout import (
+    ConnectionType,
     LayoutEngine,
     ComponentType,
     LayoutType,
@@ -242,3 +251,250 @@ def test_grid_layout() -> None:
     col1_x = positions[0].x
     col2_x = positions[1].x
     assert col1_x < col2_x
+
+
+def _random_tree(layout_type: LayoutType, size: int, seed: int = 0) -> LayoutEngine:
+    rng = random.Random(seed)
+    engine = LayoutEngine(layout_type=layout_type)
+    engine.add_component("n0", ComponentType.OBJECT, Size(100, 50))
+    for i in range(1, size):
+        parent = f"n{rng.randrange(i)}"
+        width = rng.choice((40, 60, 120))
+        engine.add_component(f"n{i}", ComponentType.ATTRIBUTE, Size(width, 30), parent)
+    return engine
+
+
+def test_hierarchical_layout_is_tidy() -> None:
+    """Test that the tree layout has no overlaps and centers parents over children."""
+    engine = _random_tree(LayoutType.HIERARCHICAL, 300)
+    layout = engine.layout()
+
+    assert layout["n0"][0].x == 0 and layout["n0"][0].y == 0
+    rows: Dict[float, List[Tuple[float, float]]] = {}
+    for position, size in layout.values():
+        rows.setdefault(position.y, []).append((position.x, position.x + size.width))
+    for spans in rows.values():
+        spans.sort()
+        for (_, left_end), (right_start, _) in zip(spans, spans[1:]):
+            assert right_start >= left_end + 20 - 1e-6
+
+    for component in engine.components.values():
+        if component.children:
+            first, last = component.children[0], component.children[-1]
+            children_center = (
+                first.position.x + first.size.width / 2 + last.position.x + last.size.width / 2
+            ) / 2
+            center = component.position.x + component.size.width / 2
+            assert abs(center - children_center) < 1e-6
+            xs = [child.position.x for child in component.children]
+            assert xs == sorted(xs)
+            for child in component.children:
+                assert child.position.y == component.position.y + component.size.height + 50
+
+
+def test_hierarchical_layout_separates_grandchildren() -> None:
+    """Test that wide subtrees push each other apart, not just their roots."""
+    engine = LayoutEngine(layout_type=LayoutType.HIERARCHICAL)
+    engine.add_component("root", ComponentType.OBJECT, Size(100, 50))
+    for side in ("left", "right"):
+        engine.add_component(side, ComponentType.GROUP, Size(40, 40), "root")
+        for i in range(4):
+            engine.add_component(f"{side}{i}", ComponentType.ICON, Size(80, 30), side)
+    layout = engine.layout()
+
+    assert layout["right0"][0].x >= layout["left3"][0].x + 80 + 20
+
+
+def test_layouts_handle_deep_trees() -> None:
+    """Test that a chain deeper than the recursion limit can be laid out."""
+    depth = sys.getrecursionlimit() * 3
+    for layout_type in LayoutType:
+        if layout_type == LayoutType.FORCE and not layout_module.HAVE_NUMPY:
+            continue
+        engine = LayoutEngine(layout_type=layout_type)
+        engine.add_component("n0", ComponentType.OBJECT, Size(40, 20))
+        for i in range(1, depth):
+            engine.add_component(f"n{i}", ComponentType.GROUP, Size(40, 20), f"n{i - 1}")
+        layout = engine.layout()
+        assert len(layout) == depth
+
+    # The hierarchical layout stacks the chain straight down
+    engine.layout_type = LayoutType.HIERARCHICAL
+    layout = engine.layout()
+    last = layout[f"n{depth - 1}"][0]
+    assert (last.x, last.y) == (0, (depth - 1) * 70)
+
+
+def _star_layout(layout_type: LayoutType, sizes: List[Tuple[float, float]]) -> Tuple[Any, ...]:
+    engine = LayoutEngine(layout_type=layout_type)
+    engine.add_component("root", ComponentType.OBJECT, Size(*sizes[0]))
+    for i, size in enumerate(sizes[1:]):
+        engine.add_component(f"c{i}", ComponentType.ICON, Size(*size), "root")
+    layout = engine.layout()
+    return tuple((position.x, position.y) for position, _ in layout.values())
+
+
+@pytest.mark.parametrize("layout_type", [LayoutType.GRID, LayoutType.FLOW, LayoutType.CENTERED])
+@pytest.mark.parametrize("fractional", [False, True])
+def test_vectorized_layouts_match_scalar(
+    layout_type: LayoutType, fractional: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the numpy layouts place every child exactly like the loops."""
+    pytest.importorskip("numpy")
+    rng = random.Random(7)
+    for n in (1, 5, 300, 2000):
+        if fractional:
+            sizes = [(rng.uniform(1, 300), rng.uniform(1, 300)) for _ in range(n + 1)]
+        else:
+            # Includes children wider than a flow row
+            sizes = [(rng.choice((40, 80, 120, 1200)), rng.choice((30, 60))) for _ in range(n + 1)]
+        monkeypatch.setattr(layout_module, "_VECTORIZE_MIN_CHILDREN", 1)
+        vectorized = _star_layout(layout_type, sizes)
+        monkeypatch.setattr(layout_module, "HAVE_NUMPY", False)
+        scalar = _star_layout(layout_type, sizes)
+        monkeypatch.undo()
+        assert vectorized == scalar
+
+
+def test_quadtree_repulsion_matches_direct_sum() -> None:
+    """Test that the Barnes–Hut forces are exact at theta 0 and close above it."""
+    np = pytest.importorskip("numpy")
+    points = np.random.default_rng(3).uniform(0, 1000, size=(400, 2))
+    points[1] = points[0]  # Coincident points are ignored, not infinite
+    delta = points[:, None, :] - points[None, :, :]
+    distance2 = np.einsum("ijk,ijk->ij", delta, delta)
+    distance2[distance2 == 0] = np.inf
+    exact = (delta / distance2[..., None]).sum(axis=1)
+
+    tree = _QuadTree(points)
+    assert np.allclose(tree.repulsion(points, 1.0, 0.0, 1e-9), exact, rtol=1e-9, atol=1e-12)
+    approximate = tree.repulsion(points, 1.0, 1.2, 1e-9)
+    error = np.linalg.norm(approximate - exact, axis=1) / np.linalg.norm(exact, axis=1)
+    assert np.median(error) < 0.05
+
+
+def _graph(size: int, extra_edges: int, seed: int = 0) -> LayoutEngine:
+    engine = _random_tree(LayoutType.FORCE, size, seed)
+    rng = random.Random(seed)
+    for _ in range(extra_edges):
+        source, target = rng.sample(range(size), 2)
+        engine.add_connection(f"n{source}", f"n{target}", ConnectionType.ASSOCIATION)
+    return engine
+
+
+def test_force_layout_is_deterministic() -> None:
+    """Test that the same graph and seed give the same drawing."""
+    pytest.importorskip("numpy")
+    first = _graph(200, 40).layout()
+    second = _graph(200, 40).layout()
+    assert first == second
+
+    engine = _graph(200, 40)
+    engine.force_layout = ForceLayout(seed=1)
+    assert engine.layout() != first
+
+
+def test_force_layout_draws_graphs() -> None:
+    """Test that connected components end up close and unconnected ones apart."""
+    np = pytest.importorskip("numpy")
+    engine = _graph(1500, 300)
+    engine.add_component("loose", ComponentType.ICON, Size(40, 40))
+    layout = engine.layout()
+
+    centers = {
+        id: (position.x + size.width / 2, position.y + size.height / 2)
+        for id, (position, size) in layout.items()
+    }
+    assert min(position.x for position, _ in layout.values()) == 0
+    assert min(position.y for position, _ in layout.values()) == 0
+    edges = np.array(
+        [
+            (centers[connection.source_id], centers[connection.target_id])
+            for connection in engine.get_all_connections()
+        ]
+    )
+    edge_lengths = np.hypot(*(edges[:, 0] - edges[:, 1]).T)
+    points = np.array(list(centers.values()))
+    pairs = np.random.default_rng(0).integers(0, len(points), size=(5000, 2))
+    pair_distances = np.hypot(*(points[pairs[:, 0]] - points[pairs[:, 1]]).T)
+    assert np.median(edge_lengths) * 5 < np.median(pair_distances)
+    # The unconnected component is packed next to the rest, not pushed away
+    connected = np.array([center for id, center in centers.items() if id != "loose"])
+    assert np.all(points.max(axis=0) - connected.max(axis=0) < 200)
+
+
+def test_force_layout_needs_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the force layout explains what is missing without numpy."""
+    from reifire.visualization import force_layout
+
+    monkeypatch.setattr(force_layout, "HAVE_NUMPY", False)
+    with pytest.raises(ImportError, match="numpy"):
+        _graph(5, 0).layout()
+
+
+def test_layered_layout_points_edges_down() -> None:
+    """Test that parents and sources are placed in layers above their targets."""
+    engine = _random_tree(LayoutType.LAYERED, 400)
+    rng = random.Random(1)
+    for _ in range(150):
+        source, target = sorted(rng.sample(range(400), 2))  # Keeps the graph acyclic
+        engine.add_connection(f"n{source}", f"n{target}", ConnectionType.DEPENDENCY)
+    layout = engine.layout()
+
+    assert min(position.x for position, _ in layout.values()) == 0
+    assert layout["n0"][0].y == 0
+    for connection in engine.get_all_connections():
+        above, below = connection.target_id, connection.source_id
+        if connection.type != ConnectionType.PARENT_CHILD:
+            above, below = below, above
+        assert layout[above][0].y + layout[above][1].height + 50 <= layout[below][0].y
+
+    rows: Dict[float, List[Tuple[float, float]]] = {}
+    for position, size in layout.values():
+        rows.setdefault(position.y, []).append((position.x, position.x + size.width))
+    for spans in rows.values():
+        spans.sort()
+        for (_, left_end), (right_start, _) in zip(spans, spans[1:]):
+            assert right_start >= left_end + 20 - 1e-6
+
+
+def test_layered_layout_reduces_crossings() -> None:
+    """Test that the barycenter sweeps untangle crossed edges."""
+    layered = LayeredLayout()
+    centers = layered.positions([(40, 20)] * 4, [(0, 3), (1, 2)])
+    assert layered.crossings == 0
+    assert centers[3][0] < centers[2][0]
+
+    rng = random.Random(2)
+    sizes = [(rng.choice((40, 80)), 30) for _ in range(300)]
+    edges: List[Tuple[int, int]] = []
+    for _ in range(500):
+        a, b = sorted(rng.sample(range(300), 2))
+        edges.append((a, b))
+    unordered = LayeredLayout(sweeps=0)
+    unordered.positions(sizes, edges)
+    layered.positions(sizes, edges)
+    assert layered.crossings * 2 < unordered.crossings
+
+
+def test_count_crossings() -> None:
+    """Test counting crossings against comparing every pair of edges."""
+    rng = random.Random(3)
+    edges = [(rng.randrange(20), rng.randrange(20)) for _ in range(200)]
+    expected = sum(
+        (a[0] - b[0]) * (a[1] - b[1]) < 0 for i, a in enumerate(edges) for b in edges[:i]
+    )
+    assert _count_crossings(edges, 20) == expected
+
+
+def test_layered_layout_breaks_cycles() -> None:
+    """Test that a cycle is drawn with one edge reversed."""
+    engine = LayoutEngine(layout_type=LayoutType.LAYERED)
+    for name in "abc":
+        engine.add_component(name, ComponentType.OBJECT, Size(40, 20))
+    engine.add_connection("a", "b", ConnectionType.REFERENCE)
+    engine.add_connection("b", "c", ConnectionType.REFERENCE)
+    engine.add_connection("c", "a", ConnectionType.REFERENCE)
+    layout = engine.layout()
+
+    assert sorted(position.y for position, _ in layout.values()) == [0, 70, 140]
@@ -0,0 +1,281 @@
+"""Tests for the LLM SVG icon provider."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, List, cast
+
+import pytest
+from reifire.visualization.providers.llm_cache import LLMIconCache
+from reifire.visualization.providers.llm_svg import LLMSVGProvider
+
+SVG = '<svg viewBox="0 0 24 24"><circle cx="12" cy="12" r="10"/></svg>'
+
+
+class FakeAgent:
+    """Stands in for a Pydantic AI agent, counting slow generations."""
+
+    def __init__(self, delay: float = 0.2) -> None:
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _output(self, prompt: str) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+        return SimpleNamespace(output=SimpleNamespace(svg=SVG, name="icon", tags=["test"]))
+
+    def run_sync(self, prompt: str) -> Any:
+        time.sleep(self.delay)
+        return self._output(prompt)
+
+    async def run(self, prompt: str) -> Any:
+        await asyncio.sleep(self.delay)
+        return self._output(prompt)
+
+
+@pytest.fixture
+def agent() -> FakeAgent:
+    return FakeAgent()
+
+
+@pytest.fixture
+def provider(tmp_path: Path, agent: FakeAgent) -> LLMSVGProvider:
+    provider = LLMSVGProvider(model="test", cache_dir=tmp_path / "llm_icons")
+    provider._agent = cast(Any, agent)
+    provider._pydantic_ai_available = True
+    return provider
+
+
+def test_search_caches_generated_icon(provider: LLMSVGProvider, agent: FakeAgent) -> None:
+    """Test that a generated icon is served from cache on the next search."""
+    first = provider.search("database")
+    second = provider.search("Database")
+    assert first == second
+    assert first[0]["image"].startswith("data:image/svg+xml;base64,")
+    assert agent.calls == 1
+    assert provider.get_icon(first[0]["id"]) == first[0]
+    assert list(provider._cache_dir.iterdir()) != []
+    assert not list(provider._cache_dir.glob("*.json"))
+
+
+def test_cache_keys_include_model(tmp_path: Path, agent: FakeAgent) -> None:
+    """Test that switching models does not serve icons generated by another model."""
+    first = LLMSVGProvider(model="test", cache_dir=tmp_path)
+    first._agent = cast(Any, agent)
+    first._pydantic_ai_available = True
+    first.search("database")
+
+    other = LLMSVGProvider(model="test", cache_dir=tmp_path)
+    other._model = "openai:gpt-4o-mini"
+    other._agent = cast(Any, agent)
+    other._pydantic_ai_available = True
+    result = other.search("database")
+
+    assert agent.calls == 2
+    assert result[0]["id"] != first.search("database")[0]["id"]
+
+
+def test_concurrent_threads_share_one_generation(
+    provider: LLMSVGProvider, agent: FakeAgent
+) -> None:
+    """Test that concurrent thread callers coalesce onto one LLM call."""
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(lambda _: provider.search("database"), range(10)))
+
+    assert agent.calls == 1
+    assert all(result == results[0] for result in results)
+    assert results[0]
+    assert provider._inflight == {}
+
+
+def test_concurrent_async_callers_share_one_generation(
+    provider: LLMSVGProvider, agent: FakeAgent
+) -> None:
+    """Test that asyncio callers and a thread caller share one generation."""
+
+    async def run() -> List[Any]:
+        loop = asyncio.get_running_loop()
+        thread_call = loop.run_in_executor(None, provider.search, "network")
+        async_calls = [provider.asearch("network") for _ in range(5)]
+        results: List[Any] = await asyncio.gather(thread_call, *async_calls)
+        return results
+
+    results = asyncio.run(run())
+    assert agent.calls == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_failed_generation_releases_waiters(provider: LLMSVGProvider) -> None:
+    """Test that a failing generation returns no results and can be retried."""
+
+    def fail(prompt: str) -> Any:
+        raise RuntimeError("model unavailable")
+
+    provider._agent = cast(Any, SimpleNamespace(run_sync=fail))
+    assert provider.search("database") == []
+    assert provider._inflight == {}
+
+
+def test_cancelled_search_many_releases_waiters(provider: LLMSVGProvider, agent: FakeAgent) -> None:
+    """Test that cancelling a batched search before it starts frees its terms."""
+    provider._batch_agent = cast(Any, agent)
+
+    async def run() -> None:
+        task = asyncio.ensure_future(provider.asearch_many(["database", "server"]))
+        await asyncio.sleep(0)  # Let it claim the terms and schedule the batches
+        assert set(provider._inflight) == {("database", "test"), ("server", "test")}
+        futures = list(provider._inflight.values())
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert all(future.result(timeout=0) == [] for future in futures)
+
+    asyncio.run(run())
+    assert provider._inflight == {}
+    assert agent.calls == 0
+
+
+def test_validate_svg_rejects_disallowed_markup() -> None:
+    """Test that generated SVGs are checked against the icon rules."""
+    LLMSVGProvider._validate_svg(SVG)
+    for svg in [
+        "<svg><text>hi</text></svg>",
+        '<svg onload="alert(1)"></svg>',
+        "<div></div>",
+        "<svg><path",
+    ]:
+        with pytest.raises(ValueError):
+            LLMSVGProvider._validate_svg(svg)
+
+
+def test_search_many_batches_with_bounded_concurrency(tmp_path: Path) -> None:
+    """Test batched generation against a local fake model with canned outputs."""
+    pytest.importorskip("pydantic_ai")
+    from pydantic_ai.messages import ModelResponse, ToolCallPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    calls = []
+    active = 0
+    max_active = 0
+
+    async def canned_icons(messages: list, info: AgentInfo) -> ModelResponse:
+        nonlocal active, max_active
+        prompt = messages[-1].parts[-1].content
+        terms = [line[2:] for line in prompt.splitlines() if line.startswith("- ")]
+        calls.append(terms)
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        icons = [
+            {
+                "term": term,
+                "name": term,
+                "tags": [term],
+                "svg": "<svg><text>bad</text></svg>" if term == "broken" else SVG,
+            }
+            for term in terms
+        ]
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"icons": icons})])
+
+    provider = LLMSVGProvider(
+        model=FunctionModel(canned_icons), cache_dir=tmp_path, batch_size=2, max_concurrency=2
+    )
+    terms = ["database", "server", "network", "broken", "cloud", "database"]
+    results = provider.search_many(terms)
+
+    assert len(calls) == 3
+    assert sorted(t for batch in calls for t in batch) == sorted(set(terms))
+    assert max_active == 2
+    assert results["broken"] == []
+    assert results["database"][0]["name"] == "database"
+    assert all(results[term] for term in ["database", "server", "network", "cloud"])
+
+    # Generated icons are cached; only the invalid one is requested again
+    calls.clear()
+    again = provider.search_many(terms)
+    assert calls == [["broken"]]
+    assert again["server"] == results["server"]
+
+
+def test_icon_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test size-based eviction of the least recently used icons."""
+    cache = LLMIconCache(tmp_path / "icons.sqlite3", max_bytes=None)
+    entry = {"name": "icon", "image": "x" * 100}
+    for term in ["a", "b", "c"]:
+        cache.put(term, "model", "1", entry)
+    size = cache.total_size
+    assert len(cache) == 3
+
+    cache.get("a", "model", "1")  # Touch "a" so "b" is the oldest
+    cache.max_bytes = size
+    cache.put("d", "model", "1", entry)
+    assert len(cache) == 3
+    assert cache.get("b", "model", "1") is None
+    assert cache.get("a", "model", "1") == entry
+    assert cache.total_size <= size
+
+
+def test_icon_cache_batches_last_used_writes(tmp_path: Path) -> None:
+    """Test that lookups do not write until the pending touches are flushed."""
+    path = tmp_path / "icons.sqlite3"
+    cache = LLMIconCache(path, touch_interval=3600)
+    icon_id = cache.put("a", "model", "1", {"name": "icon"})
+    reader = sqlite3.connect(str(path))
+    query = "SELECT last_used FROM icons WHERE id = ?"
+    stored = reader.execute(query, (icon_id,)).fetchone()[0]
+    time.sleep(0.01)
+
+    assert cache.get_by_id(icon_id) == {"name": "icon"}
+    assert reader.execute(query, (icon_id,)).fetchone()[0] == stored
+    cache.close()
+    assert reader.execute(query, (icon_id,)).fetchone()[0] > stored
+    reader.close()
+
+
+def test_icon_cache_export_import(tmp_path: Path) -> None:
+    """Test warming a new cache from an export of another."""
+    source = LLMIconCache(tmp_path / "source.sqlite3")
+    icon_id = source.put("Database", "model", "1", {"name": "database"})
+    source.put("database", "other-model", "1", {"name": "other"})
+    export_path = tmp_path / "icons.jsonl"
+    assert source.export(export_path) == 2
+
+    target = LLMIconCache(tmp_path / "target.sqlite3")
+    assert target.import_file(export_path) == 2
+    assert target.get_by_id(icon_id) == {"name": "database"}
+    assert target.get("database", "other-model", "1") == {"name": "other"}
+    assert target.get("database", "model", "2") is None
+
+
+def test_icon_cache_import_is_one_transaction(tmp_path: Path) -> None:
+    """Test that a failing import leaves the cache unchanged."""
+    export_path = tmp_path / "icons.jsonl"
+    record = {"term": "a", "model": "model", "prompt_version": "1", "entry": {"name": "a"}}
+    export_path.write_text(json.dumps(record) + "\n" + json.dumps({"term": "b"}) + "\n")
+    cache = LLMIconCache(tmp_path / "icons.sqlite3")
+    with pytest.raises(KeyError):
+        cache.import_file(export_path)
+    assert len(cache) == 0
+
+
+def test_legacy_icons_keep_resolving(tmp_path: Path, agent: FakeAgent) -> None:
+    """Test that icons from the per-term JSON cache are migrated on first open."""
+    entry = {"id": "llm/0123456789abcdef", "name": "database", "source": "llm_svg"}
+    (tmp_path / "0123456789abcdef.json").write_text(json.dumps(entry))
+
+    with LLMSVGProvider(model="test", cache_dir=tmp_path) as provider:
+        assert provider.get_icon("llm/0123456789abcdef") == entry
+        assert not list(tmp_path.glob("*.json"))
+        export_path = tmp_path / "icons.jsonl"
+        provider.cache.export(export_path)
+
+    target = LLMIconCache(tmp_path / "target.sqlite3")
+    target.import_file(export_path)
+    assert target.get_by_id("0123456789abcdef") == entry
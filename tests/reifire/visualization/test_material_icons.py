@@ -0,0 +1,134 @@
+"""Tests for the Material Design Icons provider index."""
+
+import os
+import pytest
+from pathlib import Path
+from reifire.visualization.material_icons import MaterialIconProvider
+
+
+def _make_icon(root: Path, category: str, icon_name: str) -> Path:
+    """Create a fake Material icon PNG in the expected directory layout."""
+    icon_dir = root / "png" / category / icon_name / "materialicons" / "24dp" / "1x"
+    icon_dir.mkdir(parents=True, exist_ok=True)
+    icon_path = icon_dir / f"baseline_{icon_name}_black_24dp.png"
+    icon_path.write_bytes(b"\x89PNG")
+    return icon_path
+
+
+@pytest.fixture
+def icons_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Create a small Material icon tree and point the provider at it."""
+    root = tmp_path / "material-design-icons"
+    _make_icon(root, "action", "settings")
+    _make_icon(root, "action", "delete_forever")
+    _make_icon(root, "alert", "warning")
+    # Icon directory without a PNG for our style is ignored
+    (root / "png" / "alert" / "error" / "outlined").mkdir(parents=True)
+    monkeypatch.setenv("MATERIAL_DESIGN_ICONS_DIR", str(root))
+    return root
+
+
+def test_index_is_loaded_lazily(icons_root: Path, tmp_path: Path) -> None:
+    """Test that construction does not scan the icon directory."""
+    cache_dir = tmp_path / "cache"
+    provider = MaterialIconProvider(cache_dir=cache_dir)
+    assert not provider._index_loaded.is_set()
+    assert not cache_dir.exists()
+
+    assert provider.get_icon_path("settings") is not None
+    assert provider._index_loaded.is_set()
+    assert provider._available_icons == {
+        "action": ["delete_forever", "settings"],
+        "alert": ["warning"],
+    }
+
+
+def test_index_cache_is_reused(
+    icons_root: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a warm cache avoids rescanning the icon directory."""
+    cache_dir = tmp_path / "cache"
+    first = MaterialIconProvider(cache_dir=cache_dir)
+    expected = first._term_to_icons
+    assert list(cache_dir.glob("*.json"))
+
+    def fail_scan(self: MaterialIconProvider) -> None:
+        raise AssertionError("index should come from cache")
+
+    monkeypatch.setattr(MaterialIconProvider, "_load_available_icons", fail_scan)
+    second = MaterialIconProvider(cache_dir=cache_dir)
+    assert second._term_to_icons == expected
+    assert second.get_icon_path("delete") is not None
+
+
+def test_index_cache_invalidated_by_settings(icons_root: Path, tmp_path: Path) -> None:
+    """Test that cache entries are keyed by style, size and resolution."""
+    cache_dir = tmp_path / "cache"
+    MaterialIconProvider(cache_dir=cache_dir)._ensure_index()
+
+    provider = MaterialIconProvider(cache_dir=cache_dir)
+    provider.resolution = "2x"
+    assert provider._available_icons == {"action": [], "alert": []}
+    assert len(list(cache_dir.glob("*.json"))) == 2
+
+
+def test_index_cache_invalidated_by_new_category(icons_root: Path, tmp_path: Path) -> None:
+    """Test that a change to the icon root's mtime triggers a rescan."""
+    cache_dir = tmp_path / "cache"
+    MaterialIconProvider(cache_dir=cache_dir)._ensure_index()
+
+    _make_icon(icons_root, "maps", "map")
+    png_dir = icons_root / "png"
+    stat = png_dir.stat()
+    os.utime(png_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    provider = MaterialIconProvider(cache_dir=cache_dir)
+    assert "maps" in provider._available_icons
+
+
+def test_ranked_search(icons_root: Path, tmp_path: Path) -> None:
+    """Test that search ranks full-name, bigram and word matches."""
+    _make_icon(icons_root, "action", "delete")
+    _make_icon(icons_root, "action", "delete_outline")
+    provider = MaterialIconProvider(cache_dir=tmp_path / "cache")
+
+    names = [match["name"] for match in provider.search("delete forever", limit=5)]
+    assert names[0] == "delete_forever"  # Full name beats single word matches
+    assert set(names) == {"delete_forever", "delete", "delete_outline"}
+
+    names = [match["name"] for match in provider.search("delete", limit=5)]
+    assert names[0] == "delete"
+    assert len(provider.search("delete", limit=2)) == 2
+    assert provider.search("nonexistent") == []
+
+
+def test_search_does_no_filesystem_io(
+    icons_root: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that search returns pre-resolved paths without touching the disk."""
+    provider = MaterialIconProvider(cache_dir=tmp_path / "cache")
+    provider._ensure_index()
+
+    def fail_exists(self: Path) -> bool:
+        raise AssertionError("search should not stat icon paths")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(Path, "exists", fail_exists)
+        match = provider.search("warnings", limit=1)[0]
+    assert match["category"] == "alert"
+    assert match["path"].endswith("baseline_warning_black_24dp.png")
+
+
+def test_adapter_honours_limit(icons_root: Path, tmp_path: Path) -> None:
+    """Test that the provider adapter returns multiple ranked candidates."""
+    from reifire.visualization.providers.material import MaterialIconProviderAdapter
+
+    _make_icon(icons_root, "action", "delete")
+    adapter = MaterialIconProviderAdapter()
+    adapter._provider.cache_dir = tmp_path / "cache"
+
+    results = adapter.search("delete", limit=2)
+    assert [r["id"] for r in results] == ["action/delete", "action/delete_forever"]
+    assert results[0]["image"].startswith("data:image/png;base64,")
+    assert adapter.get_icon("action/delete") is not None
+    assert adapter.search("delete", limit=1)[0]["name"] == "delete"
@@ -1,8 +1,13 @@
 """Tests for the visualization processor."""
 
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import MagicMock
+
 import pytest
+from reifire.visualization.icon_manager import IconManager
 from reifire.visualization.processor import VisualizationProcessor
-from typing import Dict, Any
 
 
 @pytest.fixture
@@ -188,3 +193,85 @@ def test_add_connection() -> None:
     assert connection.source == "source"
     assert connection.target == "target"
     assert connection.type == "test_type"
+
+
+class _CountingChain:
+    """Provider chain fake that records searches and how many overlap."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.searched: List[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def search(self, term: str, limit: int = 1) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.searched.append(term)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if term == "missing":
+            return []
+        return [{"image": f"{term}.svg"}]
+
+
+def _icon_registry(known: Optional[Dict[str, str]] = None) -> MagicMock:
+    registry = MagicMock()
+    registry.get_icon.side_effect = (known or {}).get
+    return registry
+
+
+def _document(*names: str) -> Dict[str, Any]:
+    return {
+        "object": {"name": names[0], "modifiers": [{"name": name} for name in names[1:]]},
+    }
+
+
+def test_collect_icon_terms(sample_data: Dict[str, Any]) -> None:
+    """Test that every provider-backed term is collected once, in order."""
+    processor = VisualizationProcessor()
+    sample_data["type"]["visualization"]["source"] = "custom"
+    terms = processor.collect_icon_terms([sample_data, _document("test", "extra")])
+
+    assert terms == ["test", "test_artifact", "attr1", "alt_attr1", "dependency", "extra"]
+
+
+def test_process_batch_resolves_each_term_once() -> None:
+    """Test that a batch resolves shared terms once and concurrently."""
+    chain = _CountingChain(delay=0.05)
+    registry = _icon_registry({"cached": "cached.svg"})
+    processor = VisualizationProcessor(IconManager(registry, provider_chain=chain))
+    documents = [
+        _document("a", "b", "cached"),
+        _document("b", "c", "missing"),
+        _document("a", "c", "missing"),
+    ]
+
+    results = processor.process_batch(documents)
+
+    assert sorted(chain.searched) == ["a", "b", "c", "missing"]
+    assert chain.max_active > 1
+    assert registry.register_icon.call_count == 3
+    images = [
+        [component.properties["visualization"]["image"] for component in components]
+        for components, _ in results
+    ]
+    assert images[0][:3] == ["a.svg", "b.svg", "cached.svg"]
+    assert images[1][:2] == ["b.svg", "c.svg"]
+    # Unresolved terms fall back without searching again
+    assert images[1][2].startswith("data:")
+
+
+def test_process_json_reads_resolved_icons() -> None:
+    """Test that processing reads from a resolved map without searching."""
+    chain = _CountingChain()
+    processor = VisualizationProcessor(IconManager(_icon_registry(), provider_chain=chain))
+
+    components, _ = processor.process_json(_document("a", "b"), resolved={"a": "x.svg", "b": None})
+
+    assert chain.searched == []
+    assert components[0].properties["visualization"]["image"] == "x.svg"
+    assert components[1].properties["visualization"]["source"] != "provider"
@@ -1,10 +1,18 @@
 import pytest
+import multiprocessing
+import sys
 from pathlib import Path
 import tempfile
-from unittest.mock import MagicMock
+import threading
+import time
+import json
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+from reifire.visualization.persistence import atomic_write_text
 from reifire.visualization.registry import IconRegistry
 from reifire.visualization.providers.base import IconProvider
-from typing import Generator
+from reifire.visualization.suggestions import IconSuggester
+from typing import Any, Dict, Generator, List, Tuple
 
 
 @pytest.fixture
@@ -33,7 +41,9 @@ def mock_chain(mock_provider: IconProvider) -> MagicMock:
 def registry(mock_chain: MagicMock) -> Generator[IconRegistry, None, None]:
     with tempfile.TemporaryDirectory() as tmpdir:
         registry_path = Path(tmpdir) / "registry.json"
-        yield IconRegistry(mock_chain, registry_path)
+        suggester = IconSuggester(Path(tmpdir) / "usage.json")
+        with IconRegistry(mock_chain, registry_path, suggester) as registry:
+            yield registry
 
 
 def test_associate_icon(registry: IconRegistry) -> None:
@@ -64,3 +74,202 @@ def test_custom_mappings(registry: IconRegistry) -> None:
     """Test custom mapping functionality."""
     registry.set_custom_mapping("test", "custom_value")
     assert registry.get_custom_mapping("test") == "custom_value"
+
+
+def test_bulk_changes_are_written_behind(mock_chain: MagicMock, tmp_path: Path) -> None:
+    """Test that many changes coalesce into a few atomic writes."""
+    registry_path = tmp_path / "registry.json"
+    suggester = IconSuggester(tmp_path / "usage.json", flush_interval=None, flush_threshold=50)
+    registry = IconRegistry(
+        mock_chain, registry_path, suggester, flush_interval=None, flush_threshold=50
+    )
+
+    with patch(
+        "reifire.visualization.registry.atomic_write_text",
+        wraps=atomic_write_text,
+    ) as write:
+        for i in range(120):
+            registry.associate_icon(f"term{i}", str(i))
+        assert write.call_count == 2  # One write per 50 changes
+        registry.close()
+        assert write.call_count == 3
+
+    assert len(json.loads(registry_path.read_text())) == 120
+    assert sum(len(v) for v in json.loads((tmp_path / "usage.json").read_text()).values()) == 120
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_changes_flush_after_interval(mock_chain: MagicMock, tmp_path: Path) -> None:
+    """Test that unsaved changes are written once the flush interval elapses."""
+    registry_path = tmp_path / "registry.json"
+    suggester = IconSuggester(tmp_path / "usage.json")
+    registry = IconRegistry(mock_chain, registry_path, suggester, flush_interval=0.05)
+    registry.set_custom_mapping("test", "custom_value")
+    assert not registry_path.exists()
+
+    deadline = time.monotonic() + 5
+    while not registry_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reloaded = IconRegistry(mock_chain, registry_path, suggester)
+    assert reloaded.get_custom_mapping("test") == "custom_value"
+    registry.close()
+
+
+def test_reloads_changes_from_other_registries(mock_chain: MagicMock, tmp_path: Path) -> None:
+    """Test that registries sharing a file see and keep each other's writes."""
+    registry_path = tmp_path / "registry.json"
+    suggester = IconSuggester(tmp_path / "usage.json", flush_interval=None)
+    first = IconRegistry(mock_chain, registry_path, suggester, flush_interval=None)
+    second = IconRegistry(mock_chain, registry_path, suggester, flush_interval=None)
+
+    first.set_custom_mapping("first", "one")
+    first.flush()
+    assert second.get_custom_mapping("first") == "one"
+
+    second.set_custom_mapping("second", "two")
+    first.set_custom_mapping("third", "three")
+    second.flush()
+    first.flush()
+    assert set(json.loads(registry_path.read_text())) == {"first", "second", "third"}
+    assert second.get_custom_mapping("third") == "three"
+
+
+def _associate_in_worker(tmpdir: str, worker: int, count: int) -> None:
+    chain = MagicMock()
+    suggester = IconSuggester(Path(tmpdir) / "usage.json", flush_interval=None, flush_threshold=7)
+    registry = IconRegistry(
+        chain, Path(tmpdir) / "registry.json", suggester, flush_interval=None, flush_threshold=5
+    )
+    for i in range(count):
+        registry.associate_icon(f"w{worker}-t{i}", str(i))
+        registry.suggester.record_selection("shared", "icon")
+    registry.close()
+    suggester.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses fork start method")
+def test_concurrent_processes_do_not_lose_associations(tmp_path: Path) -> None:
+    """Test that processes writing one registry file never clobber each other."""
+    workers, count = 6, 40
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_associate_in_worker, args=(str(tmp_path), w, count))
+        for w in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    associations = json.loads((tmp_path / "registry.json").read_text())
+    assert set(associations) == {f"w{w}-t{i}" for w in range(workers) for i in range(count)}
+    usage = json.loads((tmp_path / "usage.json").read_text())
+    assert usage["shared"]["icon"] == workers * count
+
+
+def test_get_icon_caches_payloads(registry: IconRegistry, mock_chain: MagicMock) -> None:
+    """Test that resolved payloads are reused until the association changes."""
+    registry.associate_icon("test", "123", {"source": "mock"})
+    registry.associate_icon("fallback", "456")
+    for _ in range(3):
+        assert registry.get_icon("test") is not None
+        assert registry.get_icon("fallback") is not None
+    assert mock_chain.get_icon.call_count == 1
+    assert mock_chain.search.call_count == 1
+
+    registry.associate_icon("test", "789", {"source": "mock"})
+    assert registry.associations["test"]["version"] == 2
+    registry.get_icon("test")
+    mock_chain.get_icon.assert_called_with("mock", "789")
+    assert mock_chain.get_icon.call_count == 2
+
+
+def test_cached_payloads_are_copies(registry: IconRegistry) -> None:
+    """Test that mutating a returned payload does not change the cached one."""
+    registry.associate_icon("test", "123", {"source": "mock"})
+    first = registry.get_icon("test")
+    assert first is not None
+    first["id"] = "changed"
+    second = registry.get_icon("test")
+    assert second is not None
+    assert second["id"] == "123"
+    second["id"] = "changed"
+    assert registry.get_icon("test") == {**second, "id": "123"}
+
+
+def test_payload_cache_is_bounded(mock_chain: MagicMock, tmp_path: Path) -> None:
+    """Test that the payload cache evicts the least recently used terms."""
+    suggester = IconSuggester(tmp_path / "usage.json", flush_interval=None)
+    registry = IconRegistry(
+        mock_chain, tmp_path / "registry.json", suggester, flush_interval=None, payload_cache_size=2
+    )
+    for term in ("a", "b", "c"):
+        registry.associate_icon(term, "123", {"source": "mock"})
+    registry.get_icon("a")
+    registry.get_icon("b")
+    registry.get_icon("a")
+    registry.get_icon("c")  # Evicts "b"
+    assert list(registry._payload_cache) == ["a", "c"]
+
+    registry.get_icon("a")
+    assert mock_chain.get_icon.call_count == 3
+    registry.get_icon("b")
+    assert mock_chain.get_icon.call_count == 4
+
+
+class _GatedChain:
+    """Provider chain stand-in whose searches block until their term's gate opens."""
+
+    def __init__(self) -> None:
+        self.gates: Dict[str, threading.Event] = {}
+        self.started: Dict[str, threading.Event] = defaultdict(threading.Event)
+        self.calls: List[str] = []
+
+    def search_all(self, term: str, limit: int = 5) -> List[Dict[str, Any]]:
+        self.calls.append(term)
+        self.started[term].set()
+        gate = self.gates.get(term)
+        if gate is not None and not gate.wait(timeout=10):
+            raise TimeoutError(f"Search for '{term}' was never released")
+        return [{"id": f"{term}-icon", "term": term, "tags": [], "source": "gated"}]
+
+
+@pytest.fixture
+def gated_registry(tmp_path: Path) -> Generator[Tuple[IconRegistry, _GatedChain], None, None]:
+    chain = _GatedChain()
+    suggester = IconSuggester(tmp_path / "usage.json", flush_interval=None)
+    suggester.get_related_terms = lambda term: ["Alpha", "beta", "slow"]  # type: ignore
+    with IconRegistry(chain, tmp_path / "registry.json", suggester) as registry:
+        yield registry, chain
+    for gate in chain.gates.values():
+        gate.set()
+
+
+def test_suggest_icons_searches_concurrently(
+    gated_registry: Tuple[IconRegistry, _GatedChain],
+) -> None:
+    """Test that related-term searches are deduplicated and run in parallel."""
+    registry, chain = gated_registry
+    # Each search only finishes once the other has started, which needs both in flight
+    chain.gates = {"alpha": chain.started["beta"], "beta": chain.started["alpha"]}
+    suggestions = registry.suggest_icons("alpha")
+
+    assert sorted(chain.calls) == ["alpha", "beta"]  # "Alpha" duplicates the term
+    assert [icon["id"] for icon in suggestions] == ["alpha-icon", "beta-icon"]
+
+
+def test_suggestions_stream_within_budget(
+    gated_registry: Tuple[IconRegistry, _GatedChain],
+) -> None:
+    """Test that suggestions arrive as searches finish and slow ones are dropped."""
+    registry, chain = gated_registry
+    registry.suggester.get_related_terms = lambda term: ["slow"]  # type: ignore
+    chain.gates = {"slow": threading.Event()}  # Never released during the test
+
+    stream = registry.iter_suggestions("beta", timeout=0.5)
+    assert [icon["id"] for icon in next(stream)] == ["beta-icon"]
+    assert list(stream) == []
+    assert chain.started["slow"].is_set()
+
+    assert [icon["id"] for icon in registry.suggest_icons("beta", timeout=0.5)] == ["beta-icon"]
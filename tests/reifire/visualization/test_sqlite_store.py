@@ -0,0 +1,101 @@
+"""Tests for the SQLite storage backend."""
+
+import multiprocessing
+import sqlite3
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from reifire.icon_registry import IconRegistry as UrlIconRegistry
+from reifire.visualization.registry import IconRegistry
+from reifire.visualization.sqlite_store import SQLiteMapping, SQLiteUsageStore
+
+
+def test_mapping_round_trip(tmp_path: Path) -> None:
+    """Test dict-like access to a SQLite-backed mapping."""
+    mapping = SQLiteMapping(tmp_path / "store.sqlite3", "associations")
+    mapping["a"] = {"icon_id": "1"}
+    mapping.update_many({"b": {"icon_id": "2"}, "a": {"icon_id": "3"}})
+
+    assert mapping["a"] == {"icon_id": "3"}
+    assert "b" in mapping and "c" not in mapping
+    assert sorted(mapping) == ["a", "b"]
+    assert len(mapping) == 2
+    assert mapping.get("c") is None
+
+    del mapping["a"]
+    with pytest.raises(KeyError):
+        mapping["a"]
+    mapping.close()
+
+    journal_mode = sqlite3.connect(tmp_path / "store.sqlite3").execute("PRAGMA journal_mode")
+    assert journal_mode.fetchone()[0] == "wal"
+
+
+def test_mapping_rejects_invalid_table(tmp_path: Path) -> None:
+    """Test that table names are validated before use in SQL."""
+    with pytest.raises(ValueError):
+        SQLiteMapping(tmp_path / "store.sqlite3", "icons; DROP TABLE x")
+
+
+def test_usage_store_increments(tmp_path: Path) -> None:
+    """Test incremental usage counter upserts."""
+    usage = SQLiteUsageStore(tmp_path / "usage.sqlite3")
+    usage.increment("computer", "123")
+    usage.increment("computer", "123")
+    usage.increment("computer", "456", amount=3)
+
+    assert usage["computer"] == {"123": 2, "456": 3}
+    assert "computer" in usage and "desk" not in usage
+    assert usage.get("desk") is None
+    assert list(usage) == ["computer"]
+
+
+def test_registry_sqlite_backend(tmp_path: Path) -> None:
+    """Test that a sqlite-backed registry persists changes without flushing."""
+    db_path = tmp_path / "registry.sqlite3"
+    chain = MagicMock()
+    registry = IconRegistry(chain, db_path, backend="sqlite")
+    registry.associate_icon("test", "123", {"source": "mock"})
+    registry.set_custom_mapping("test", "custom_value")
+
+    other = IconRegistry(chain, db_path, backend="sqlite")
+    assert other.associations["test"]["icon_id"] == "123"
+    assert other.get_custom_mapping("test") == "custom_value"
+    assert other.suggester.usage_data["test"] == {"123": 1}
+    registry.close()
+    other.close()
+
+
+def test_url_registry_sqlite_backend(tmp_path: Path) -> None:
+    """Test the term-to-URL registry with the sqlite backend."""
+    db_path = tmp_path / "icons.sqlite3"
+    registry = UrlIconRegistry(db_path, backend="sqlite")
+    registry.register_icon("test", "test.svg")
+    assert UrlIconRegistry(db_path, backend="sqlite").get_icon("test") == "test.svg"
+    registry.clear()
+    assert registry.get_icon("test") is None
+
+
+def _increment_usage(db_path: Path, count: int) -> None:
+    usage = SQLiteUsageStore(db_path)
+    for _ in range(count):
+        usage.increment("shared", "icon")
+    usage.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses fork start method")
+def test_usage_store_shared_between_processes(tmp_path: Path) -> None:
+    """Test that worker processes can update the same store concurrently."""
+    db_path = tmp_path / "usage.sqlite3"
+    SQLiteUsageStore(db_path).close()
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment_usage, args=(db_path, 50)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert SQLiteUsageStore(db_path)["shared"] == {"icon": 200}
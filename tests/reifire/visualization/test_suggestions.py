@@ -1,22 +1,45 @@
 import pytest
 from pathlib import Path
 import tempfile
+from unittest.mock import MagicMock
+from reifire.visualization import suggestions
 from reifire.visualization.suggestions import IconSuggester
-from typing import Generator
+from typing import Any, Dict, Generator, List
 
 
 @pytest.fixture
 def suggester() -> Generator[IconSuggester, None, None]:
     with tempfile.TemporaryDirectory() as tmpdir:
         usage_path = Path(tmpdir) / "usage.json"
-        yield IconSuggester(usage_path)
+        suggester = IconSuggester(usage_path)
+        yield suggester
+        suggester.close()
 
 
 def test_related_terms(suggester: IconSuggester) -> None:
-    """Test getting related terms."""
+    """Test getting related bundled icon terms from the synonym table."""
     related = suggester.get_related_terms("computer")
     assert len(related) > 0
-    assert "machine" in related
+    assert "server" in related
+    assert "home" in suggester.get_related_terms("Dwelling")
+    assert suggester.get_related_terms("xyzzy") == []
+
+
+def test_related_terms_for_hyphenated_words(suggester: IconSuggester) -> None:
+    """Test that hyphenated words match the normalized synonym table keys."""
+    assert "comment" in suggester.get_related_terms("ad-lib")
+    assert "bike" in suggester.get_related_terms("All-Terrain_Bike")
+    assert all(key == suggestions.synonym_key(key) for key in suggestions._synonym_table())
+
+
+def test_related_terms_with_wordnet() -> None:
+    """Test getting related terms using WordNet."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        suggester = IconSuggester(Path(tmpdir) / "usage.json", use_wordnet=True)
+        related = suggester.get_related_terms("computer")
+        assert len(related) > 0
+        assert "machine" in related
+        suggester.close()
 
 
 def test_icon_scoring(suggester: IconSuggester) -> None:
@@ -52,3 +75,101 @@ def test_suggestion_sorting(suggester: IconSuggester) -> None:
     sorted_icons = suggester.sort_suggestions(icons, "computer")
     assert len(sorted_icons) == 3
     assert sorted_icons[0]["id"] == "1"  # Most relevant first
+
+
+class _FakeLemma:
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def name(self) -> str:
+        return self._name
+
+
+class _FakeSynset:
+    def __init__(self, names: List[str]) -> None:
+        self._lemmas = [_FakeLemma(n) for n in names]
+
+    def lemmas(self) -> List[_FakeLemma]:
+        return self._lemmas
+
+    def hypernyms(self) -> List["_FakeSynset"]:
+        return [_FakeSynset(["Machine"])]
+
+    def hyponyms(self) -> List["_FakeSynset"]:
+        return []
+
+
+@pytest.fixture
+def fake_wordnet(monkeypatch: pytest.MonkeyPatch) -> Generator[MagicMock, None, None]:
+    """Replace WordNet with a counting fake and reset the expansion cache."""
+    wordnet = MagicMock()
+    wordnet.synsets.side_effect = lambda term: [_FakeSynset([term, "data_processor"])]
+    monkeypatch.setattr(suggestions, "_load_wordnet", lambda: wordnet)
+    suggestions._expand_term.cache_clear()
+    suggestions._related_set.cache_clear()
+    suggestions._related_pattern.cache_clear()
+    yield wordnet
+    suggestions._expand_term.cache_clear()
+    suggestions._related_set.cache_clear()
+    suggestions._related_pattern.cache_clear()
+
+
+def test_expansion_computed_once_per_term(
+    suggester: IconSuggester, fake_wordnet: MagicMock
+) -> None:
+    """Test that sorting many candidates expands the term only once."""
+    suggester.use_wordnet = True
+    icons = [{"id": str(i), "term": f"icon {i}", "tags": []} for i in range(50)]
+    icons.append({"id": "m", "term": "other", "tags": ["machine"]})
+    icons.append({"id": "d", "term": "big data processor", "tags": []})
+
+    sorted_icons = suggester.sort_suggestions(icons, "Computer")
+    assert [icon["id"] for icon in sorted_icons[:2]] == ["d", "m"]
+    assert suggester.get_related_terms("computer") == ["Machine", "data processor"]
+    suggester.score_icon(icons[0], "computer")
+    assert fake_wordnet.synsets.call_count == 1
+
+
+def _candidates(count: int) -> List[Dict[str, Any]]:
+    words = ["computer", "server", "laptop", "Home", "trash", "data processor", "desk"]
+    return [
+        {
+            "id": str(i),
+            "term": f"{words[i % len(words)]} {i % 3}",
+            "tags": [words[(i * 3 + j) % len(words)] for j in range(i % 4)],
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_batch_scores_match_scalar_scores(
+    suggester: IconSuggester, monkeypatch: pytest.MonkeyPatch, use_numpy: bool
+) -> None:
+    """Test that the batch scorer reproduces score_icon exactly."""
+    if not use_numpy:
+        monkeypatch.setattr(suggestions, "HAVE_NUMPY", False)
+    for _ in range(3):
+        suggester.record_selection("computer", "4")
+    suggester.record_selection("computer", "9")
+    icons = _candidates(200)
+
+    expected = [suggester.score_icon(icon, "Computer") for icon in icons]
+    assert suggester.batch_score(icons, "Computer") == expected
+    assert suggester.batch_score([], "computer") == []
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_sort_suggestions_top_k(
+    suggester: IconSuggester, monkeypatch: pytest.MonkeyPatch, use_numpy: bool
+) -> None:
+    """Test that partial top-k selection matches a full stable sort."""
+    if not use_numpy:
+        monkeypatch.setattr(suggestions, "HAVE_NUMPY", False)
+    icons = _candidates(300)
+    scores = [suggester.score_icon(icon, "computer") for icon in icons]
+    expected = [icons[i] for i in sorted(range(len(icons)), key=lambda i: -scores[i])]
+
+    assert suggester.sort_suggestions(icons, "computer") == expected
+    for limit in (0, 1, 7, 50, 1000):
+        assert suggester.sort_suggestions(icons, "computer", limit=limit) == expected[:limit]